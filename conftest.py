@@ -10,6 +10,7 @@ from pathlib import Path
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 from django_quotes.models import Quote, Source, SourceGroup
 from tests.factories.users import UserFactory
@@ -22,6 +23,11 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def user() -> User:  # type: ignore
     return UserFactory()
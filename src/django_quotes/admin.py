@@ -46,14 +46,14 @@ class QuoteAdmin(admin.ModelAdmin):
 class GroupStatsAdmin(admin.ModelAdmin):
     """Model admin for GroupStats"""
 
-    pass
+    readonly_fields = ["quotes_requested", "quotes_generated"]
 
 
 @admin.register(SourceStats)
 class SourceStatAdmin(admin.ModelAdmin):
     """Model admin for SourceStats"""
 
-    pass
+    readonly_fields = ["quotes_requested", "quotes_generated"]
 
 
 @admin.register(QuoteStats)
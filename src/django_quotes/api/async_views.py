@@ -0,0 +1,168 @@
+#
+# async_views.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Async counterparts of the random quote and sentence generation API actions.
+
+Django REST Framework views are synchronous, so under ASGI every request to the viewsets in
+`django_quotes.api.views` runs in a thread pool. These plain Django views use the async ORM, cache, and
+signal interfaces end to end instead. They run the same DRF authentication, permission, and throttle classes
+as the viewsets, in a thread, apply the same object permissions, and return the same payloads.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from django_quotes.api.serializers import QuoteSerializer
+from django_quotes.models import Source, SourceGroup
+
+
+def run_api_checks(api_view: APIView, request: HttpRequest, **kwargs) -> Request | HttpResponse:
+    """
+    Authenticate the request and check its permissions and throttles, as `APIView.dispatch` does before calling
+    the handler. The DRF classes are synchronous, so async callers should wrap this in `sync_to_async`.
+
+    Args:
+        api_view (APIView): The DRF view whose authentication, permission, and throttle classes apply.
+        request (HttpRequest): The request being handled.
+        **kwargs: The URL keyword arguments.
+
+    Returns:
+        (Request | HttpResponse): The authenticated DRF request, or the rendered error response if a check failed.
+    """
+    api_view.args = ()
+    api_view.kwargs = kwargs
+    drf_request = api_view.initialize_request(request, **kwargs)
+    api_view.request = drf_request  # type: ignore
+    api_view.headers = api_view.default_response_headers
+    try:
+        api_view.initial(drf_request, **kwargs)
+    except Exception as exc:
+        response = api_view.finalize_response(drf_request, api_view.handle_exception(exc), **kwargs)
+        return response.render()  # type: ignore
+    return drf_request
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class AsyncReadView(ABC, View):
+    """
+    Base view that looks up a source or group the requesting user may read, and passes it to `respond`,
+    which subclasses must implement. The request first goes through the authentication, permission, and
+    throttle classes of `api_view_class`, which default to the `REST_FRAMEWORK` settings. Django cannot wrap
+    async views in `ATOMIC_REQUESTS`, so they opt out of it; the stats receivers use their own transactions.
+    """
+
+    http_method_names = ["get"]
+    model: type[Source] | type[SourceGroup]
+    lookup_url_kwarg: str
+    api_view_class: type[APIView] = APIView
+
+    async def get(self, request: HttpRequest, **kwargs) -> HttpResponse:
+        checked = await sync_to_async(run_api_checks)(self.api_view_class(), request, **kwargs)
+        if isinstance(checked, HttpResponse):
+            return checked
+        user = checked.user
+        readable = Q(owner=user) | Q(public=True) if user.is_authenticated else Q(public=True)
+        try:
+            obj = await self.model.objects.select_related("owner", "text_model").aget(
+                readable, slug=kwargs[self.lookup_url_kwarg]
+            )
+        except self.model.DoesNotExist:
+            return JsonResponse(status=404, data={"detail": "Not found."})
+        # The owner is already loaded, so the rules predicates do not touch the database.
+        if not user.has_perm(self.model.get_perm("read"), obj):
+            return JsonResponse(status=403, data={"detail": "You do not have permission to perform this action."})
+        return await self.respond(obj)
+
+    @abstractmethod
+    async def respond(self, obj: Any) -> JsonResponse:
+        """
+        Build the response for the object.
+
+        Args:
+            obj (Source | SourceGroup): The object the user asked for, with its owner and text model loaded.
+
+        Returns:
+            (JsonResponse): The response.
+        """
+
+
+class AsyncRandomQuoteMixin:
+    """Respond with a random quote from the object."""
+
+    async def respond(self, obj: Any) -> JsonResponse:
+        quote = await obj.aget_random_quote()
+        if quote is not None:
+            return JsonResponse(status=200, data=QuoteSerializer(quote).data)
+        return JsonResponse(status=404, data={"error": "No quotes found."})
+
+
+class SourceGroupRandomQuoteView(AsyncRandomQuoteMixin, AsyncReadView):
+    """
+    Async version of `SourceGroupViewSet.get_random_quote`.
+    """
+
+    model = SourceGroup
+    lookup_url_kwarg = "group"
+
+
+class SourceGroupGenerateSentenceView(AsyncReadView):
+    """
+    Async version of `SourceGroupViewSet.generate_sentence`.
+    """
+
+    model = SourceGroup
+    lookup_url_kwarg = "group"
+
+    async def respond(self, obj: Any) -> JsonResponse:
+        if not await Source.objects.filter(group=obj, allow_markov=True).aexists():
+            return JsonResponse(status=403, data={"error": "This group does not currently allow sentence generation."})
+        sentence = await obj.agenerate_markov_sentence()
+        if sentence is not None:
+            return JsonResponse(status=200, data={"sentence": sentence})
+        return JsonResponse(status=204, data={"error": "Insufficent data to generate sentence."})
+
+
+class SourceRandomQuoteView(AsyncRandomQuoteMixin, AsyncReadView):
+    """
+    Async version of `SourceViewSet.get_random_quote`.
+    """
+
+    model = Source
+    lookup_url_kwarg = "source"
+
+
+class SourceGenerateSentenceView(AsyncReadView):
+    """
+    Async version of `SourceViewSet.generate_sentence`.
+    """
+
+    model = Source
+    lookup_url_kwarg = "source"
+
+    async def respond(self, obj: Any) -> JsonResponse:
+        if not obj.allow_markov:
+            return JsonResponse(status=403, data={"error": "This source does not permit sentence generation."})
+        sentence = await obj.aget_markov_sentence()
+        if sentence is not None:
+            return JsonResponse(status=200, data={"sentence": sentence})
+        return JsonResponse(
+            status=204,
+            data={"error": "Unable to generate markov sentence. This source may not have enough quotes yet."},
+        )
@@ -9,7 +9,7 @@
 
 from __future__ import annotations
 
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import DateTimeField, IntegerField, ModelSerializer, Serializer
 
 from django_quotes.models import Quote, Source, SourceGroup
 
@@ -69,3 +69,47 @@ class QuoteSerializer(ModelSerializer):
     class Meta:
         model = Quote
         fields = ["quote", "quote_rendered", "source", "citation", "citation_url"]
+
+
+class UsageBucketSerializer(Serializer):
+    """
+    Serializer for an entry of the usage series of a SourceGroup or Source.
+
+    Includes the following fields:
+
+    - start (datetime)
+    - quotes_requested (int)
+    - quotes_generated (int)
+    """
+
+    start = DateTimeField()
+    quotes_requested = IntegerField()
+    quotes_generated = IntegerField()
+
+
+class RankedQuoteSerializer(Serializer):
+    """
+    Serializer for an entry of the most requested quotes of a SourceGroup or Source.
+
+    Includes the following fields:
+
+    - quote (QuoteSerializer)
+    - times_used (int)
+    """
+
+    quote = QuoteSerializer()
+    times_used = IntegerField()
+
+
+class RankedSourceSerializer(Serializer):
+    """
+    Serializer for an entry of the most requested sources of a SourceGroup.
+
+    Includes the following fields:
+
+    - source (SourceSerializer)
+    - quotes_requested (int)
+    """
+
+    source = SourceSerializer()
+    quotes_requested = IntegerField()
@@ -7,11 +7,16 @@
 # SPDX-License-Identifier: BSD-3-Clause
 #
 
+from datetime import datetime
+
 from django.core.exceptions import ObjectDoesNotExist
-from drf_spectacular.utils import extend_schema, inline_serializer
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.fields import CharField
+from rest_framework.fields import CharField, ListField
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
@@ -19,10 +24,156 @@ from rules.contrib.rest_framework import AutoPermissionViewSetMixin
 
 from django_quotes.api.serializers import (
     QuoteSerializer,
+    RankedQuoteSerializer,
+    RankedSourceSerializer,
     SourceGroupSerializer,
     SourceSerializer,
+    UsageBucketSerializer,
+)
+from django_quotes.leaderboards import get_leaderboard_size, get_top_quotes, get_top_sources
+from django_quotes.models import (
+    MAX_MARKOV_SENTENCES,
+    MAX_QUOTES_FOR_RANDOM_GROUP_SET,
+    MAX_QUOTES_FOR_RANDOM_SET,
+    Source,
+    SourceGroup,
+)
+
+count_parameter = OpenApiParameter(
+    name="count", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description="Number of quotes to return."
+)
+
+sentence_count_parameter = OpenApiParameter(
+    name="count", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description="Number of sentences to return."
 )
-from django_quotes.models import Source, SourceGroup
+
+generated_sentences_response = inline_serializer(
+    name="generated_sentences", fields={"sentences": ListField(child=CharField())}
+)
+
+leaderboard_count_parameter = OpenApiParameter(
+    name="count",
+    type=OpenApiTypes.INT,
+    location=OpenApiParameter.QUERY,
+    description="Number of entries to return. Defaults to the whole leaderboard.",
+)
+
+usage_parameters = [
+    OpenApiParameter(
+        name="period",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        enum=["hour", "day"],
+        description="Whether to count usage per hour or per day. Defaults to day.",
+    ),
+    OpenApiParameter(
+        name="since",
+        type=OpenApiTypes.DATETIME,
+        location=OpenApiParameter.QUERY,
+        description="Start of the series. Defaults to 48 hours or 30 days ago.",
+    ),
+    OpenApiParameter(
+        name="until",
+        type=OpenApiTypes.DATETIME,
+        location=OpenApiParameter.QUERY,
+        description="End of the series, exclusive. Defaults to now.",
+    ),
+]
+
+
+def get_requested_count(request, maximum: int | None) -> int | None:
+    """
+    Parse the `count` query parameter of a batch request.
+
+    Args:
+        request (Request): The request being handled.
+        maximum (int | None): The largest count allowed, if any.
+
+    Returns:
+        (int | None): The requested count, or None if it is missing or invalid.
+    """
+    try:
+        count = int(request.query_params.get("count", 1))
+    except ValueError:
+        return None
+    if count < 1 or (maximum is not None and count > maximum):
+        return None
+    return count
+
+
+def leaderboard_response(request, get_entries, serializer_class) -> Response:
+    """
+    Respond with the entries of a leaderboard.
+
+    Args:
+        request (Request): The request being handled.
+        get_entries (Callable): Called with the requested count to get the entries.
+        serializer_class (type[Serializer]): The serializer for the entries.
+
+    Returns:
+        (Response): The entries, most requested first, or an error if the count is invalid.
+    """
+    maximum = get_leaderboard_size()
+    count = get_requested_count(request, maximum) if "count" in request.query_params else maximum
+    if count is None:
+        return Response(
+            status=status.HTTP_400_BAD_REQUEST,
+            data={"error": f"count must be an integer between 1 and {maximum}."},
+        )
+    return Response(status=status.HTTP_200_OK, data=serializer_class(get_entries(count), many=True).data)
+
+
+def get_requested_usage_range(request) -> tuple[str, datetime | None, datetime | None] | None:
+    """
+    Parse the `period`, `since`, and `until` query parameters of a usage series request.
+
+    Args:
+        request (Request): The request being handled.
+
+    Returns:
+        (tuple[str, datetime | None, datetime | None] | None): The period and range requested, or None if
+            any of them is invalid.
+    """
+    period = request.query_params.get("period", "day")
+    if period not in ("hour", "day"):
+        return None
+    bounds = []
+    for name in ("since", "until"):
+        value = request.query_params.get(name)
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            bound = parse_datetime(value)
+        except ValueError:
+            bound = None
+        if bound is None:
+            return None
+        if timezone.is_naive(bound):
+            bound = timezone.make_aware(bound)
+        bounds.append(bound)
+    return period, bounds[0], bounds[1]
+
+
+def usage_series_response(obj, request) -> Response:
+    """
+    Respond with the usage series of a group or source.
+
+    Args:
+        obj (SourceGroup | Source): The group or source.
+        request (Request): The request being handled.
+
+    Returns:
+        (Response): The series, or an error if the query parameters are invalid.
+    """
+    usage_range = get_requested_usage_range(request)
+    if usage_range is None:
+        return Response(
+            status=status.HTTP_400_BAD_REQUEST,
+            data={"error": "period must be hour or day, and since and until must be ISO 8601 datetimes."},
+        )
+    series = obj.get_usage_series(*usage_range)
+    return Response(status=status.HTTP_200_OK, data=UsageBucketSerializer(series, many=True).data)
 
 
 class SourceGroupViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet):
@@ -41,7 +192,12 @@ class SourceGroupViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListMod
         "retrieve": "read",
         "update": "change",
         "get_random_quote": "read",
+        "get_random_quotes": "read",
         "generate_sentence": "read",
+        "generate_sentences": "read",
+        "get_usage": "read",
+        "get_top_quotes": "read",
+        "get_top_sources": "read",
     }
 
     def get_queryset(self, *args, **kwargs):
@@ -59,6 +215,22 @@ class SourceGroupViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListMod
             return Response(status=status.HTTP_200_OK, data=qs.data)
         return Response(status=status.HTTP_404_NOT_FOUND, data={"error": "No quotes found."})
 
+    @extend_schema(parameters=[count_parameter], responses={200: QuoteSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_random_quotes(self, request, group=None):
+        count = get_requested_count(request, MAX_QUOTES_FOR_RANDOM_GROUP_SET)
+        if count is None:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"error": f"count must be an integer between 1 and {MAX_QUOTES_FOR_RANDOM_GROUP_SET}."},
+            )
+        g = self.get_object()
+        quotes = g.get_random_quotes(count)
+        if quotes:
+            qs = QuoteSerializer(quotes, many=True)
+            return Response(status=status.HTTP_200_OK, data=qs.data)
+        return Response(status=status.HTTP_404_NOT_FOUND, data={"error": "No quotes found."})
+
     @extend_schema(responses={200: inline_serializer(name="generated_sentence", fields={"sentence": CharField()})})
     @action(detail=True, methods=["get"])
     def generate_sentence(self, request, group=None):
@@ -76,6 +248,46 @@ class SourceGroupViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListMod
             data={"error": "Insufficent data to generate sentence."},
         )
 
+    @extend_schema(parameters=[sentence_count_parameter], responses={200: generated_sentences_response})
+    @action(detail=True, methods=["get"])
+    def generate_sentences(self, request, group=None):
+        count = get_requested_count(request, MAX_MARKOV_SENTENCES)
+        if count is None:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"error": f"count must be an integer between 1 and {MAX_MARKOV_SENTENCES}."},
+            )
+        g = self.get_object()
+        if g.markov_sources == 0:
+            return Response(
+                status=status.HTTP_403_FORBIDDEN,
+                data={"error": "This group does not currently allow sentence generation."},
+            )
+        sentences = g.generate_markov_sentences(count)
+        if sentences:
+            return Response(status=status.HTTP_200_OK, data={"sentences": sentences})
+        return Response(
+            status=status.HTTP_204_NO_CONTENT,
+            data={"error": "Insufficent data to generate sentences."},
+        )
+
+    @extend_schema(parameters=usage_parameters, responses={200: UsageBucketSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_usage(self, request, group=None):
+        return usage_series_response(self.get_object(), request)
+
+    @extend_schema(parameters=[leaderboard_count_parameter], responses={200: RankedQuoteSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_top_quotes(self, request, group=None):
+        g = self.get_object()
+        return leaderboard_response(request, lambda count: get_top_quotes("group", g.pk, count), RankedQuoteSerializer)
+
+    @extend_schema(parameters=[leaderboard_count_parameter], responses={200: RankedSourceSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_top_sources(self, request, group=None):
+        g = self.get_object()
+        return leaderboard_response(request, lambda count: get_top_sources(g.pk, count), RankedSourceSerializer)
+
 
 class SourceViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet):
     """
@@ -93,7 +305,11 @@ class SourceViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListModelMix
         "retrieve": "read",
         "update": "change",
         "get_random_quote": "read",
+        "get_random_quotes": "read",
         "generate_sentence": "read",
+        "generate_sentences": "read",
+        "get_usage": "read",
+        "get_top_quotes": "read",
     }
 
     def get_queryset(self, *args, **kwargs):
@@ -117,6 +333,22 @@ class SourceViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListModelMix
             return Response(status=status.HTTP_200_OK, data=qs.data)
         return Response(status=status.HTTP_404_NOT_FOUND, data={"error": "No quotes found."})
 
+    @extend_schema(parameters=[count_parameter], responses={200: QuoteSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_random_quotes(self, request, source=None):
+        count = get_requested_count(request, MAX_QUOTES_FOR_RANDOM_SET)
+        if count is None:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"error": f"count must be an integer between 1 and {MAX_QUOTES_FOR_RANDOM_SET}."},
+            )
+        source = self.get_object()
+        quotes = source.get_random_quotes(count)
+        if quotes:
+            qs = QuoteSerializer(quotes, many=True)
+            return Response(status=status.HTTP_200_OK, data=qs.data)
+        return Response(status=status.HTTP_404_NOT_FOUND, data={"error": "No quotes found."})
+
     @extend_schema(responses={200: inline_serializer(name="generated_sentence", fields={"sentence": CharField()})})
     @action(detail=True, methods=["get"])
     def generate_sentence(self, request, source=None):
@@ -133,3 +365,39 @@ class SourceViewSet(AutoPermissionViewSetMixin, RetrieveModelMixin, ListModelMix
             status=status.HTTP_204_NO_CONTENT,
             data={"error": "Unable to generate markov sentence. This source may not have enough quotes yet."},
         )
+
+    @extend_schema(parameters=[sentence_count_parameter], responses={200: generated_sentences_response})
+    @action(detail=True, methods=["get"])
+    def generate_sentences(self, request, source=None):
+        count = get_requested_count(request, MAX_MARKOV_SENTENCES)
+        if count is None:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"error": f"count must be an integer between 1 and {MAX_MARKOV_SENTENCES}."},
+            )
+        source = self.get_object()
+        if not source.allow_markov:
+            return Response(
+                status=status.HTTP_403_FORBIDDEN,
+                data={"error": "This source does not permit sentence generation."},
+            )
+        sentences = source.get_markov_sentences(count)
+        if sentences:
+            return Response(status=status.HTTP_200_OK, data={"sentences": sentences})
+        return Response(
+            status=status.HTTP_204_NO_CONTENT,
+            data={"error": "Unable to generate markov sentences. This source may not have enough quotes yet."},
+        )
+
+    @extend_schema(parameters=usage_parameters, responses={200: UsageBucketSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_usage(self, request, source=None):
+        return usage_series_response(self.get_object(), request)
+
+    @extend_schema(parameters=[leaderboard_count_parameter], responses={200: RankedQuoteSerializer(many=True)})
+    @action(detail=True, methods=["get"])
+    def get_top_quotes(self, request, source=None):
+        source = self.get_object()
+        return leaderboard_response(
+            request, lambda count: get_top_quotes("source", source.pk, count), RankedQuoteSerializer
+        )
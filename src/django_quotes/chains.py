@@ -0,0 +1,103 @@
+#
+# chains.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""The CPU-bound work of building, combining, and loading markov chains.
+
+These functions take and return the JSON stored in `MarkovTextModel.data` and never touch the database or the
+Django settings, so `django_quotes.markov.run_markov_task` can run them in a thread or process pool instead of on
+the event loop. Import nothing from Django here, or the workers of a process pool would need a configured project
+to load this module.
+"""
+
+from __future__ import annotations
+
+import markovify  # type: ignore
+
+from django_markov.text_models import POSifiedText
+
+
+def build_chain_data(corpus_entries: list[str], state_size: int, *, compiled: bool = False) -> str:
+    """
+    Parse a corpus into a new chain.
+
+    Args:
+        corpus_entries (list[str]): The corpus as a list of text sentences.
+        state_size (int): The number of words in each state of the chain.
+        compiled (bool): Whether to compile the chain.
+
+    Returns:
+        (str): The JSON of the chain.
+    """
+    chain = POSifiedText(" ".join(corpus_entries), state_size=state_size)
+    if compiled:
+        chain.compile(inplace=True)
+    return chain.to_json()
+
+
+def _combine(chains: list[POSifiedText]) -> POSifiedText:
+    """Combine chains with `markovify.combine`, which returns a chain of the same class for a list of chains."""
+    return markovify.combine(chains)  # type: ignore
+
+
+def combine_chain_data(data: list[str]) -> str:
+    """
+    Combine chains into one.
+
+    Args:
+        data (list[str]): The JSON of the chains to combine.
+
+    Returns:
+        (str): The JSON of the combined chain.
+
+    Raises:
+        ValueError: If any of the chains is compiled, or the chains have different state sizes.
+    """
+    chains = [POSifiedText.from_json(entry) for entry in data]
+    if any(chain.chain.compiled for chain in chains):
+        msg = "Compiled chains cannot be combined!"
+        raise ValueError(msg)
+    return _combine(chains).to_json()
+
+
+def extend_chain_data(data: str, corpus_entries: list[str]) -> str:
+    """
+    Parse a corpus into a chain with the state size of an existing chain, and combine the two.
+
+    Args:
+        data (str): The JSON of the existing chain.
+        corpus_entries (list[str]): The new corpus as a list of text sentences.
+
+    Returns:
+        (str): The JSON of the combined chain.
+
+    Raises:
+        ValueError: If the existing chain is compiled.
+    """
+    chain = POSifiedText.from_json(data)
+    if chain.chain.compiled:
+        msg = "Compiled chains cannot be combined!"
+        raise ValueError(msg)
+    new_chain = POSifiedText(" ".join(corpus_entries), state_size=chain.state_size)
+    return _combine([chain, new_chain]).to_json()
+
+
+def load_chain(data: str) -> POSifiedText:
+    """
+    Parse a chain, and compile it if it was not stored compiled, ready to generate sentences.
+
+    Args:
+        data (str): The JSON of the chain.
+
+    Returns:
+        (POSifiedText): The compiled chain.
+    """
+    chain = POSifiedText.from_json(data)
+    if not chain.chain.compiled:
+        chain.compile(inplace=True)
+    return chain
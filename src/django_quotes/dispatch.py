@@ -0,0 +1,118 @@
+#
+# dispatch.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Dispatching the side effects of requests, such as stats writes and markov model rebuilds, to a task backend.
+
+The backend is chosen with the `QUOTES_TASK_BACKEND` setting:
+
+- `"inline"` (default) runs the task right away, in the request.
+- `"thread"` runs the task in a per process pool of `QUOTES_TASK_THREADS` threads once the current transaction
+  commits, so the request does not wait for it. Tasks still waiting are lost if the process exits.
+- Any other value is the dotted path to a callable that enqueues the task in an external queue. Once the current
+  transaction commits, it is called with the dotted path of the task function, a list of positional arguments,
+  and a dict of keyword arguments, all of which can be serialized as JSON. The worker should pass them on to
+  `run_task`. For example, with Celery:
+
+```python
+@shared_task
+def run_quotes_task(path, args, kwargs):
+    run_task(path, args, kwargs)
+
+
+def enqueue_quotes_task(path, args, kwargs):
+    run_quotes_task.delay(path, args, kwargs)
+```
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from loguru import logger
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_task_backend() -> str:
+    """Get the task backend from settings, defaulting to "inline"."""
+    backend = getattr(settings, "QUOTES_TASK_BACKEND", "inline")
+    if not isinstance(backend, str) or not backend:  # no cov
+        return "inline"
+    return backend
+
+
+def _get_task_threads() -> int:
+    """Get the number of threads for the "thread" task backend from settings or return a default."""
+    threads = getattr(settings, "QUOTES_TASK_THREADS", 2)
+    if not isinstance(threads, int) or threads < 1:  # no cov
+        return 2
+    return threads
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool of the "thread" task backend, starting it the first time it is used."""
+    global _executor  # noqa: PLW0603
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_get_task_threads(), thread_name_prefix="django-quotes-task")
+        return _executor
+
+
+def _run_in_thread(task: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+    """Run a task in the thread pool, logging any error since there is no one to raise it to."""
+    try:
+        task(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Task {task.__module__}.{task.__name__} failed.")
+    finally:
+        # Release the connection this thread opened, it may be a long time until the next task.
+        connections.close_all()
+
+
+def run_task(path: str, args: list[Any], kwargs: dict[str, Any]) -> Any:
+    """
+    Run a task enqueued by an external task backend.
+
+    Args:
+        path (str): The dotted path to the task function.
+        args (list[Any]): The positional arguments for the task.
+        kwargs (dict[str, Any]): The keyword arguments for the task.
+
+    Returns:
+        (Any): Whatever the task returns.
+    """
+    return import_string(path)(*args, **kwargs)
+
+
+def dispatch(task: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+    """
+    Run a task with the backend set by `QUOTES_TASK_BACKEND`. Tasks should be module level functions that take
+    arguments which can be serialized as JSON, e.g. ids instead of model instances.
+
+    Args:
+        task (Callable): The task function.
+        *args (Any): The positional arguments for the task.
+        **kwargs (Any): The keyword arguments for the task.
+    """
+    backend = _get_task_backend()
+    if backend == "inline":
+        task(*args, **kwargs)
+    elif backend == "thread":
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, task, args, kwargs))
+    else:
+        enqueue = import_string(backend)
+        path = f"{task.__module__}.{task.__name__}"
+        transaction.on_commit(lambda: enqueue(path, list(args), kwargs))
@@ -0,0 +1,207 @@
+#
+# leaderboards.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Leaderboards of the most requested quotes of each source and group, and the most requested sources of each group.
+
+Each leaderboard is a list of up to `LEADERBOARD_SIZE` `[id, count]` pairs, highest count first, kept in the
+random quote selection cache. It is built with a single query the first time it is read, and then kept up to
+date by `update_leaderboards`, which the stats writer calls once the new counts are committed. Only the
+leaderboards that are currently cached are updated, using the new totals of the quotes and sources that were
+just counted, so a quote or source that overtakes the last entry moves onto the leaderboard straight away.
+Reading a leaderboard is a cache read plus a fetch of the entries by primary key.
+
+Concurrent updates of the same leaderboard may overwrite each other, and deleting quotes or sources leaves
+gaps. Both only last until the next update of the affected entry, or until the leaderboard expires after
+`LEADERBOARD_TIMEOUT` seconds and is rebuilt.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from django.conf import settings
+from django.db.models import Sum
+
+from django_quotes.models import Quote, Source, SourceStatsShard
+from django_quotes.sampling import get_selection_cache
+
+LEADERBOARD_CACHE_PREFIX = "django_quotes:leaderboard"
+
+
+def get_leaderboard_size() -> int:
+    """Get the number of entries kept in each leaderboard from settings or return a default.
+
+    Returns:
+        (int): The leaderboard size.
+    """
+    size = getattr(settings, "LEADERBOARD_SIZE", 10)
+    if not isinstance(size, int) or size < 1:  # no cov
+        return 10
+    return size
+
+
+def _get_leaderboard_timeout() -> int:
+    """Get the number of seconds a leaderboard is kept before being rebuilt from settings or return a default."""
+    timeout = getattr(settings, "LEADERBOARD_TIMEOUT", 3600)
+    if not isinstance(timeout, int) or timeout < 1:  # no cov
+        return 3600
+    return timeout
+
+
+def leaderboard_cache_key(board: str, scope: str, pk: int) -> str:
+    """Get the cache key for a leaderboard.
+
+    Args:
+        board (str): Either "quotes" or "sources".
+        scope (str): The kind of object owning the leaderboard, i.e. "source" or "group".
+        pk (int): The primary key of the object.
+
+    Returns:
+        (str): The cache key.
+    """
+    return f"{LEADERBOARD_CACHE_PREFIX}:{board}:{scope}:{pk}"
+
+
+def _build_leaderboard(board: str, scope: str, pk: int) -> list[list[int]]:
+    """Query the top entries of a leaderboard."""
+    size = get_leaderboard_size()
+    if board == "sources":
+        rows = (
+            SourceStatsShard.objects.filter(source__group_id=pk)
+            .values("source_id")
+            .annotate(total=Sum("quotes_requested"))
+            .filter(total__gt=0)
+            .order_by("-total", "source_id")
+            .values_list("source_id", "total")[:size]
+        )
+    else:
+        quotes = Quote.objects.filter(published=True, times_used__gt=0)
+        quotes = quotes.filter(source_id=pk) if scope == "source" else quotes.filter(source__group_id=pk)
+        rows = quotes.order_by("-times_used", "pk").values_list("pk", "times_used")[:size]
+    return [list(row) for row in rows]
+
+
+def _get_leaderboard(board: str, scope: str, pk: int) -> list[list[int]]:
+    """Get a leaderboard from the cache, building it if it is missing."""
+    cache = get_selection_cache()
+    key = leaderboard_cache_key(board, scope, pk)
+    entries: list[list[int]] | None = cache.get(key)
+    if entries is None:
+        entries = _build_leaderboard(board, scope, pk)
+        cache.set(key, entries, _get_leaderboard_timeout())
+    return entries
+
+
+def _merge(entries: list[list[int]], totals: Mapping[int, int]) -> list[list[int]]:
+    """Merge new totals into the entries of a leaderboard, keeping the top entries."""
+    merged: dict[int, int] = {}
+    for item_id, total in entries:
+        merged[item_id] = total
+    merged.update(totals)
+    ranked = sorted(merged.items(), key=lambda item: (-item[1], item[0]))
+    return [list(item) for item in ranked[: get_leaderboard_size()]]
+
+
+def get_top_quotes(scope: str, pk: int, count: int | None = None) -> list[dict[str, Any]]:
+    """
+    Get the most requested quotes of a source or group.
+
+    Args:
+        scope (str): Either "source" or "group".
+        pk (int): The primary key of the source or group.
+        count (int | None): The number of quotes to return, at most `LEADERBOARD_SIZE`. Defaults to all of them.
+
+    Returns:
+        (list[dict[str, Any]]): The `quote` and its `times_used`, most requested first.
+    """
+    entries = _get_leaderboard("quotes", scope, pk)[:count]
+    quotes = Quote.objects.select_related("source", "source__group").in_bulk([quote_id for quote_id, _ in entries])
+    return [
+        {"quote": quotes[quote_id], "times_used": times_used} for quote_id, times_used in entries if quote_id in quotes
+    ]
+
+
+def get_top_sources(group_id: int, count: int | None = None) -> list[dict[str, Any]]:
+    """
+    Get the sources of a group that quotes were requested from most often.
+
+    Args:
+        group_id (int): The primary key of the group.
+        count (int | None): The number of sources to return, at most `LEADERBOARD_SIZE`. Defaults to all of them.
+
+    Returns:
+        (list[dict[str, Any]]): The `source` and its `quotes_requested`, most requested first.
+    """
+    entries = _get_leaderboard("sources", "group", group_id)[:count]
+    sources = Source.objects.select_related("group").in_bulk([source_id for source_id, _ in entries])
+    return [
+        {"source": sources[source_id], "quotes_requested": requested}
+        for source_id, requested in entries
+        if source_id in sources
+    ]
+
+
+def update_leaderboards(group_ids: Iterable[int], source_ids: Iterable[int], quote_ids: Iterable[int]) -> None:
+    """
+    Merge the current totals of the quotes and sources that were just counted into the cached leaderboards they
+    belong to. Leaderboards that are not cached are left to be built when they are read, so nothing is queried
+    unless one of them is cached.
+
+    Args:
+        group_ids (Iterable[int]): The ids of the groups the quotes were requested from.
+        source_ids (Iterable[int]): The ids of the sources whose `quotes_requested` changed.
+        quote_ids (Iterable[int]): The ids of the quotes whose `times_used` changed.
+    """
+    source_ids = list(source_ids)
+    cache = get_selection_cache()
+    keys = [leaderboard_cache_key("quotes", "source", source_id) for source_id in source_ids]
+    for group_id in group_ids:
+        keys.append(leaderboard_cache_key("quotes", "group", group_id))
+        keys.append(leaderboard_cache_key("sources", "group", group_id))
+    cached: dict[str, list[list[int]]] = cache.get_many(keys)  # type: ignore
+    if not cached:
+        return
+    totals: dict[str, dict[int, int]] = {key: {} for key in cached}
+    quotes = Quote.objects.filter(pk__in=list(quote_ids), published=True)
+    for quote_id, source_id, group_id, times_used in quotes.values_list(
+        "pk", "source_id", "source__group_id", "times_used"
+    ):
+        for key in (
+            leaderboard_cache_key("quotes", "source", source_id),
+            leaderboard_cache_key("quotes", "group", group_id),
+        ):
+            if key in totals:
+                totals[key][quote_id] = times_used
+    if any(key.startswith(f"{LEADERBOARD_CACHE_PREFIX}:sources:") for key in cached):
+        source_totals = (
+            SourceStatsShard.objects.filter(source_id__in=source_ids)
+            .values("source_id", "source__group_id")
+            .annotate(total=Sum("quotes_requested"))
+            .values_list("source_id", "source__group_id", "total")
+        )
+        for source_id, group_id, total in source_totals:
+            key = leaderboard_cache_key("sources", "group", group_id)
+            if key in totals:
+                totals[key][source_id] = total
+    cache.set_many({key: _merge(entries, totals[key]) for key, entries in cached.items()}, _get_leaderboard_timeout())
+
+
+def invalidate_leaderboards(scope: str, pk: int) -> None:
+    """
+    Discard the cached leaderboards of a source or group, e.g. after quotes were deleted from it.
+
+    Args:
+        scope (str): Either "source" or "group".
+        pk (int): The primary key of the source or group.
+    """
+    keys = [leaderboard_cache_key("quotes", scope, pk)]
+    if scope == "group":
+        keys.append(leaderboard_cache_key("sources", scope, pk))
+    get_selection_cache().delete_many(keys)
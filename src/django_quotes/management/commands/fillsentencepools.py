@@ -0,0 +1,41 @@
+# fillsentencepools.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Pre-generates markov sentences for every markov enabled source and group."""
+
+from django.core.management.base import BaseCommand  # type: ignore
+
+from django_quotes.models import Source, SourceGroup
+from django_quotes.sentences import fill_sentence_pool, get_sentence_pool_size
+
+
+class Command(BaseCommand):
+    help = "Fills the pools of pre-generated markov sentences of every markov enabled source and group."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--char-limit", type=int, default=280, help="Maximum characters of the sentences. Defaults to 280."
+        )
+
+    def handle(self, *args, **options):
+        if not get_sentence_pool_size():
+            self.stdout.write(self.style.WARNING("Sentence pools are disabled, set MARKOV_SENTENCE_POOL_SIZE!"))
+            return
+        num_pools = num_sentences = 0
+        targets = [
+            *(
+                ("group", pk)
+                for pk in SourceGroup.objects.filter(source__allow_markov=True).distinct().values_list("pk", flat=True)
+            ),
+            *(("source", pk) for pk in Source.objects.filter(allow_markov=True).values_list("pk", flat=True)),
+        ]
+        for scope, pk in targets:
+            num_filled = fill_sentence_pool(scope, pk, char_limit=options["char_limit"])
+            if num_filled:
+                num_pools += 1
+                num_sentences += num_filled
+        self.stdout.write(self.style.SUCCESS(f"Filled {num_pools} sentence pools with {num_sentences} sentences!"))
@@ -7,44 +7,80 @@
 
 """Checks if markov models are out of date, and if so regenerates them."""
 
-from django.core.management.base import BaseCommand  # type: ignore
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from django_markov.models import MarkovTextModel  # type: ignore
-from django_quotes.models import SourceGroup  # type: ignore
+import django
+from django.core.management.base import BaseCommand, CommandError  # type: ignore
+from django.db import connections
+
+from django_quotes.models import Source, SourceGroup  # type: ignore
+from django_quotes.tasks import find_stale_markov_models, rebuild_group_markov_models
 
 
 class Command(BaseCommand):
     help = "Checks if markov models are out of date, and if so regenerates them."
 
     def add_arguments(self, parser):
-        parser.add_argument("--force", action="store_true", help="Update all models regardless of modification times.")
+        parser.add_argument(
+            "--force", action="store_true", help="Update all models regardless of whether they are marked dirty."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes rebuilding the models of different groups in parallel. Defaults to 1.",
+        )
+        parser.add_argument(
+            "--group", action="append", default=[], help="Slug of a group to update. Can be given more than once."
+        )
+        parser.add_argument(
+            "--source",
+            action="append",
+            default=[],
+            help="Slug of a source to update, along with its group. Can be given more than once.",
+        )
 
     def handle(self, *args, **options):
-        groups = SourceGroup.objects.all()
-        groups_updated = 0
-        characters_updated = 0
-        for group in groups:
-            if group.text_model is None:  # no cov
-                group.text_model = MarkovTextModel.objects.create()
-            gmm = group.text_model
-            update_group = False if not options["force"] else True
-            for character in group.source_set.filter(allow_markov=True):
-                if character.markov_ready:
-                    quote_to_test = character.quote_set.all().order_by("-modified")[0]
-                    if character.text_model is None:  # no cov
-                        character.text_model = MarkovTextModel.objects.create()
-                    cmm = character.text_model
-                    if cmm.modified > gmm.modified:
-                        update_group = True
-                    if quote_to_test.modified > cmm.modified or options["force"]:
-                        character.update_markov_model()
-                        characters_updated += 1
-                        update_group = True
-            if update_group:
-                group.update_markov_model()
-                groups_updated += 1
+        start = time.perf_counter()
+        group_ids = source_ids = None
+        if options["group"]:
+            group_ids = self._resolve_slugs(SourceGroup, options["group"])
+        if options["source"]:
+            source_ids = self._resolve_slugs(Source, options["source"])
+        stale = find_stale_markov_models(force=options["force"], group_ids=group_ids, source_ids=source_ids)
+        if options["workers"] > 1 and len(stale) > 1:
+            # Each worker opens its own connection, none may be inherited from this process.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as executor:
+                self._report(executor.map(rebuild_group_markov_models, stale.keys(), stale.values()), start)
+        else:
+            self._report(map(rebuild_group_markov_models, stale.keys(), stale.values()), start)
+
+    def _resolve_slugs(self, model, slugs):
+        ids_by_slug = dict(model.objects.filter(slug__in=slugs).values_list("slug", "pk"))
+        unknown = [slug for slug in slugs if slug not in ids_by_slug]
+        if unknown:
+            msg = f"No {model._meta.verbose_name} with the slug: {', '.join(unknown)}"
+            raise CommandError(msg)
+        return list(ids_by_slug.values())
+
+    def _report(self, results, start):
+        groups_updated = characters_updated = bytes_written = 0
+        for group_results in results:
+            for result in group_results:
+                if result["model"] == "group":
+                    groups_updated += 1
+                else:
+                    characters_updated += 1
+                bytes_written += result["bytes"]
+                self.stdout.write(
+                    f"Rebuilt {result['model']} {result['slug']} in {result['seconds'] * 1000:.0f} ms, "
+                    f"{result['bytes'] / 1024:.0f} KiB."
+                )
         self.stdout.write(
             self.style.SUCCESS(
-                f"Updated models for {groups_updated} Character Groups and {characters_updated} Characters!"
+                f"Updated models for {groups_updated} Character Groups and {characters_updated} Characters "
+                f"in {time.perf_counter() - start:.1f} s, writing {bytes_written / 1024:.0f} KiB!"
             )
         )
@@ -0,0 +1,20 @@
+# publishquotes.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Publishes quotes whose pub_date has passed."""
+
+from django.core.management.base import BaseCommand  # type: ignore
+
+from django_quotes.tasks import publish_scheduled_quotes
+
+
+class Command(BaseCommand):
+    help = "Publishes quotes whose pub_date has passed so they are available for random quotes and markov models."
+
+    def handle(self, *args, **options):
+        num_published = publish_scheduled_quotes()
+        self.stdout.write(self.style.SUCCESS(f"Published {num_published} scheduled quotes!"))
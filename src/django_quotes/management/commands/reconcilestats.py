@@ -0,0 +1,36 @@
+# reconcilestats.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Rebuilds the usage stats of groups and sources from the usage counts of their quotes."""
+
+from django.core.management.base import BaseCommand  # type: ignore
+
+from django_quotes.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the quotes requested from each group and source from the usage of their quotes, "
+        "and creates any missing stats rows. This loses history: the uses of deleted quotes are no longer "
+        "counted for their group and source afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of objects to update per statement. Defaults to 1000.",
+        )
+
+    def handle(self, *args, **options):
+        num_groups, num_sources, num_quotes = reconcile_stats(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled the stats of {num_groups} groups, {num_sources} sources, and {num_quotes} quotes!"
+            )
+        )
@@ -0,0 +1,22 @@
+# rollupusage.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Compacts hourly usage history into daily buckets and prunes old history."""
+
+from django.core.management.base import BaseCommand  # type: ignore
+
+from django_quotes.tasks import rollup_usage_history
+
+
+class Command(BaseCommand):
+    help = "Rolls up old hourly usage buckets of groups and sources into daily buckets, and deletes expired ones."
+
+    def handle(self, *args, **options):
+        num_rolled_up, num_pruned = rollup_usage_history()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rolled up {num_rolled_up} hourly usage buckets and pruned {num_pruned} old buckets!")
+        )
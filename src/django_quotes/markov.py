@@ -0,0 +1,437 @@
+#
+# markov.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Generating markov sentences from a per process cache of loaded text models.
+
+`MarkovTextModel.generate_sentence` parses the JSON chain stored in `MarkovTextModel.data` and compiles it on
+every new instance, i.e. on every request, which dominates the time it takes to generate a sentence from a
+large group model. `generate_sentence` and `agenerate_sentence` instead keep the compiled chains in a least
+recently used cache in each process, keyed on the primary key and `modified` timestamp of the text model, so
+saving a new version of a model makes the old entry unreachable. On a hit, `data` is not even needed, so
+callers can fetch text models with `data` deferred.
+
+The cache holds up to `MARKOV_MODEL_CACHE_SIZE` bytes of chains, measured by the size of their stored JSON,
+and evicts the least recently used chains beyond that. Set it to 0 to disable the cache. Text models updated
+without `save()`, e.g. with a queryset `update()`, keep their timestamp and are not reloaded until evicted.
+
+Text models stored compiled (see `Source.store_compiled_model`) skip compiling on every cache miss, at the cost
+of larger stored JSON. `benchmark_text_model`, and the `benchmarkmarkov` management command built on it, measure
+both sides of that trade for existing models.
+
+Parsing a corpus and combining or loading chains is CPU-bound. The async code paths run that work, found in
+`django_quotes.chains`, with `run_markov_task` on the executor set by `MARKOV_EXECUTOR`, so it does not block the
+event loop of an ASGI worker, while the text models are still read and saved with the async ORM:
+
+- `"thread"` (default) runs it in a per process pool of `MARKOV_EXECUTOR_WORKERS` threads.
+- `"process"` runs building and combining chains in a pool of `MARKOV_EXECUTOR_WORKERS` processes, which sidesteps
+  the GIL. Loading chains and generating sentences need the chains cached in this process, so they still run in
+  threads.
+- `"inline"` runs it right away, on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+
+from django_markov.models import STATE_SIZE, MarkovCombineError, MarkovEmptyError, MarkovTextModel, sentence_generated
+from django_markov.text_models import POSifiedText
+from django_quotes.chains import build_chain_data, combine_chain_data, extend_chain_data, load_chain
+
+MARKOV_EXECUTORS = ("inline", "thread", "process")
+
+_executor: Executor | None = None
+_executor_kind = ""
+_executor_lock = threading.Lock()
+
+
+def _get_markov_model_cache_size() -> int:
+    """Get the maximum size of the cached markov chains in bytes from settings or return a default."""
+    size = getattr(settings, "MARKOV_MODEL_CACHE_SIZE", 64 * 1024 * 1024)
+    if not isinstance(size, int) or size < 0:  # no cov
+        return 64 * 1024 * 1024
+    return size
+
+
+def _get_markov_executor_kind() -> str:
+    """Get the kind of executor for CPU-bound markov work from settings, defaulting to "thread"."""
+    kind = getattr(settings, "MARKOV_EXECUTOR", "thread")
+    if kind not in MARKOV_EXECUTORS:  # no cov
+        return "thread"
+    return kind
+
+
+def _get_markov_executor_workers() -> int:
+    """Get the number of workers of the markov executor from settings or return a default."""
+    workers = getattr(settings, "MARKOV_EXECUTOR_WORKERS", 2)
+    if not isinstance(workers, int) or workers < 1:  # no cov
+        return 2
+    return workers
+
+
+def _get_executor() -> Executor | None:
+    """Get the executor for CPU-bound markov work, starting it the first time it is used or after the
+    `MARKOV_EXECUTOR` setting changed. Returns None for "inline"."""
+    global _executor, _executor_kind  # noqa: PLW0603
+    kind = _get_markov_executor_kind()
+    if kind == "inline":
+        return None
+    with _executor_lock:
+        if _executor is None or _executor_kind != kind:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            workers = _get_markov_executor_workers()
+            if kind == "process":
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="django-quotes-markov")
+            _executor_kind = kind
+        return _executor
+
+
+async def run_markov_task(func: Callable[..., Any], *args: Any, local: bool = False, **kwargs: Any) -> Any:
+    """
+    Run CPU-bound markov work on the executor set by `MARKOV_EXECUTOR`, without blocking the event loop.
+
+    Args:
+        func (Callable): The function to run. For the process executor, it has to be a module level function taking
+            and returning values that can be pickled, like those in `django_quotes.chains`.
+        *args (Any): The positional arguments for the function.
+        local (bool): Whether the function needs objects of this process, such as cached chains. Such functions run
+            in a thread even with the process executor.
+        **kwargs (Any): The keyword arguments for the function.
+
+    Returns:
+        (Any): Whatever the function returns.
+    """
+    executor = _get_executor()
+    if executor is None:
+        return func(*args, **kwargs)
+    if local and isinstance(executor, ProcessPoolExecutor):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+def _get_corpus_char_limit() -> int:
+    """Get the maximum characters of a corpus from the django_markov settings, defaulting to no limit."""
+    char_limit = getattr(settings, "MARKOV_CORPUS_MAX_CHAR_LIMIT", 0)
+    if not isinstance(char_limit, int):  # no cov
+        return 0
+    return char_limit
+
+
+async def aupdate_text_model_from_corpus(
+    text_model: MarkovTextModel, corpus_entries: list[str], *, store_compiled: bool = False
+) -> None:
+    """
+    Rebuild and save a text model from a full corpus, like `MarkovTextModel.aupdate_model_from_corpus` does, but
+    with the chain built by `run_markov_task`.
+
+    Args:
+        text_model (MarkovTextModel): The text model to update.
+        corpus_entries (list[str]): The corpus as a list of text sentences.
+        store_compiled (bool): Whether to store the chain compiled.
+
+    Raises:
+        ValueError: If the corpus is longer than `MARKOV_CORPUS_MAX_CHAR_LIMIT`.
+    """
+    char_limit = _get_corpus_char_limit()
+    if char_limit and char_limit < len(" ".join(corpus_entries)):  # no cov
+        msg = f"Supplied corpus is over the maximum character limit: {char_limit}"
+        raise ValueError(msg)
+    text_model.data = await run_markov_task(build_chain_data, corpus_entries, STATE_SIZE, compiled=store_compiled)
+    await text_model.asave()
+
+
+async def acombine_text_models(text_models: list[MarkovTextModel]) -> str:
+    """
+    Combine the chains of text models with `run_markov_task`.
+
+    Args:
+        text_models (list[MarkovTextModel]): The text models to combine.
+
+    Returns:
+        (str): The JSON of the combined chain.
+
+    Raises:
+        MarkovCombineError: If any of the text models is empty or compiled, or their state sizes differ.
+    """
+    try:
+        return await run_markov_task(combine_chain_data, [text_model.data for text_model in text_models])
+    except (TypeError, ValueError) as ve:
+        msg = f"Combining models caused the following error: {ve}"
+        raise MarkovCombineError(msg) from ve
+
+
+async def aadd_corpus_to_text_model(text_model: MarkovTextModel, corpus_entries: list[str]) -> None:
+    """
+    Add new corpus entries to a text model and save it, like `MarkovTextModel.aadd_new_corpus_data_to_model` does,
+    but with the chains built and combined by `run_markov_task`. An empty text model is built from the entries.
+
+    Args:
+        text_model (MarkovTextModel): The text model to add to.
+        corpus_entries (list[str]): The text sentences to add.
+
+    Raises:
+        MarkovCombineError: If the text model is compiled.
+        MarkovEmptyError: If there are no entries, or they have no text.
+    """
+    if not text_model.data:
+        await aupdate_text_model_from_corpus(text_model, corpus_entries)
+        return
+    if not "".join(corpus_entries).strip():
+        msg = "There are no corpus entries to add!"
+        raise MarkovEmptyError(msg)
+    try:
+        text_model.data = await run_markov_task(extend_chain_data, text_model.data, corpus_entries)
+    except ValueError as ve:
+        msg = f"Unable to add corpus entries: {ve}"
+        raise MarkovCombineError(msg) from ve
+    await text_model.asave()
+
+
+class MarkovModelCache:
+    """
+    Per process least recently used cache of compiled markov chains. It is safe to use from multiple threads.
+
+    Attributes:
+        hits (int): The number of lookups that found a cached chain.
+        misses (int): The number of lookups that had to load the chain from the text model.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._chains: OrderedDict[tuple[int, datetime], tuple[POSifiedText, int]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: tuple[int, datetime]) -> POSifiedText | None:
+        """Get a cached chain, marking it as the most recently used, and count the hit or miss."""
+        with self._lock:
+            entry = self._chains.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._chains.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key: tuple[int, datetime], text_model: MarkovTextModel, chain: POSifiedText) -> POSifiedText:
+        """Cache the loaded chain of a text model if it fits."""
+        data = text_model.data
+        size = len(data) if isinstance(data, str) else len(json.dumps(data))
+        max_size = _get_markov_model_cache_size()
+        if size > max_size:
+            return chain
+        with self._lock:
+            if key not in self._chains:
+                self._chains[key] = (chain, size)
+                self._size += size
+            while self._size > max_size:
+                _, (_, evicted_size) = self._chains.popitem(last=False)
+                self._size -= evicted_size
+        return chain
+
+    def get(self, text_model: MarkovTextModel) -> POSifiedText | None:
+        """
+        Get the compiled chain of a text model, loading `data` if it was deferred and the chain is not cached.
+
+        Args:
+            text_model (MarkovTextModel): A saved text model.
+
+        Returns:
+            (POSifiedText | None): The compiled chain, or None if the text model is empty.
+        """
+        key = (text_model.pk, text_model.modified)
+        chain = self._lookup(key)
+        if chain is None:
+            if "data" in text_model.get_deferred_fields():
+                text_model.refresh_from_db(fields=["data"])
+            if not text_model.data:
+                return None
+            chain = self._store(key, text_model, load_chain(text_model.data))
+        return chain
+
+    async def aget(self, text_model: MarkovTextModel) -> POSifiedText | None:
+        """
+        Async version of `get`, which loads the chain with `run_markov_task`.
+
+        Args:
+            text_model (MarkovTextModel): A saved text model.
+
+        Returns:
+            (POSifiedText | None): The compiled chain, or None if the text model is empty.
+        """
+        key = (text_model.pk, text_model.modified)
+        chain = self._lookup(key)
+        if chain is None:
+            if "data" in text_model.get_deferred_fields():
+                await text_model.arefresh_from_db(fields=["data"])
+            if not text_model.data:
+                return None
+            chain = self._store(key, text_model, await run_markov_task(load_chain, text_model.data, local=True))
+        return chain
+
+    def clear(self) -> None:
+        """Discard all cached chains and reset the counters."""
+        with self._lock:
+            self._chains.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> dict[str, Any]:
+        """
+        Get the usage of the cache.
+
+        Returns:
+            (dict[str, Any]): The `hits`, `misses`, number of `entries`, their total `size`, and the `max_size`.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._chains),
+                "size": self._size,
+                "max_size": _get_markov_model_cache_size(),
+            }
+
+
+markov_model_cache = MarkovModelCache()
+
+
+def _make_sentence(chain: POSifiedText, char_limit: int, tries: int) -> str | None:
+    """Generate a sentence from a chain, within the character limit if there is one."""
+    if char_limit > 0:
+        return chain.make_short_sentence(max_chars=char_limit, tries=tries)
+    return chain.make_sentence(tries=tries)
+
+
+def generate_sentence(text_model: MarkovTextModel, char_limit: int = 0, tries: int = 10) -> str | None:
+    """
+    Generate a sentence from the cached chain of a text model, and send the `sentence_generated` signal for it
+    like `MarkovTextModel.generate_sentence` does.
+
+    Args:
+        text_model (MarkovTextModel): The text model to generate the sentence from.
+        char_limit (int): Maximum characters to use. If zero, no limit.
+        tries (int): Number of attempts to make a sentence.
+
+    Returns:
+        (str | None): The sentence, or None if the model is empty or no sentence could be made.
+    """
+    chain = markov_model_cache.get(text_model)
+    if chain is None:
+        return None
+    sentence = _make_sentence(chain, char_limit, tries)
+    if sentence is not None:
+        sentence_generated.send(MarkovTextModel, instance=text_model, char_limit=char_limit, sentence=sentence)
+    return sentence
+
+
+async def agenerate_sentence(text_model: MarkovTextModel, char_limit: int = 0, tries: int = 10) -> str | None:
+    """
+    Async version of `generate_sentence`, which generates the sentence with `run_markov_task`.
+
+    Args:
+        text_model (MarkovTextModel): The text model to generate the sentence from.
+        char_limit (int): Maximum characters to use. If zero, no limit.
+        tries (int): Number of attempts to make a sentence.
+
+    Returns:
+        (str | None): The sentence, or None if the model is empty or no sentence could be made.
+    """
+    chain = await markov_model_cache.aget(text_model)
+    if chain is None:
+        return None
+    sentence = await run_markov_task(_make_sentence, chain, char_limit, tries, local=True)
+    if sentence is not None:
+        await sentence_generated.asend(MarkovTextModel, instance=text_model, char_limit=char_limit, sentence=sentence)
+    return sentence
+
+
+def _make_sentences(chain: POSifiedText, count: int, char_limit: int, tries: int) -> list[str]:
+    """Generate up to `count` distinct sentences from a chain, making at most `tries` attempts in total."""
+    sentences: dict[str, None] = {}
+    for _ in range(tries):
+        if len(sentences) >= count:
+            break
+        sentence = _make_sentence(chain, char_limit, 1)
+        if sentence is not None:
+            sentences[sentence] = None
+    return list(sentences)
+
+
+def make_sentences(text_model: MarkovTextModel, count: int, char_limit: int = 0, tries: int = 100) -> list[str]:
+    """
+    Generate distinct sentences from the cached chain of a text model without sending the `sentence_generated`
+    signal, e.g. for batches that record their stats at once, or to fill the sentence pool (see
+    `django_quotes.sentences`), which sends it once a sentence is served.
+
+    Args:
+        text_model (MarkovTextModel): The text model to generate the sentences from.
+        count (int): The number of sentences to generate.
+        char_limit (int): Maximum characters to use. If zero, no limit.
+        tries (int): Number of attempts at making a sentence shared by the whole batch.
+
+    Returns:
+        (list[str]): The sentences, at most `count` of them, in the order they were generated.
+    """
+    chain = markov_model_cache.get(text_model)
+    if chain is None:
+        return []
+    return _make_sentences(chain, count, char_limit, tries)
+
+
+def benchmark_text_model(text_model: MarkovTextModel, rounds: int = 5) -> dict[str, float] | None:
+    """
+    Measure the stored size and the time it takes to load the chain of a text model, both when it is stored as
+    is and when it is stored compiled. Storing it compiled pays off when the model is loaded often, e.g. in
+    many processes or after frequent cache evictions, and the time saved per load matters more than the space.
+
+    Args:
+        text_model (MarkovTextModel): A text model that is not stored compiled.
+        rounds (int): The number of times each load is timed. The fastest time is reported.
+
+    Returns:
+        (dict[str, float] | None): The `size` and `compiled_size` of the stored JSON in bytes, and the `load_time`
+            and `compiled_load_time` in seconds, or None if the model is empty or already stored compiled.
+    """
+    if not text_model.data:
+        return None
+    chain = POSifiedText.from_json(text_model.data)
+    if chain.chain.compiled:
+        return None
+    data = chain.to_json()
+    compiled_data = chain.compile(inplace=True).to_json()
+
+    def time_load(stored: str) -> float:
+        fastest = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            load_chain(stored)
+            fastest = min(fastest, time.perf_counter() - start)
+        return fastest
+
+    return {
+        "size": len(data),
+        "compiled_size": len(compiled_data),
+        "load_time": time_load(data),
+        "compiled_load_time": time_load(compiled_data),
+    }
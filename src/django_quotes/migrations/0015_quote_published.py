@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_published_from_pub_date(apps, schema_editor):
+    Quote = apps.get_model("django_quotes", "Quote")
+    Quote.objects.filter(pub_date__gt=timezone.now()).update(published=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_quotes", "0014_alter_source_text_model_alter_sourcegroup_text_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quote",
+            name="published",
+            field=models.BooleanField(
+                default=True,
+                editable=False,
+                help_text="Has the pub_date passed? Updated on save and by the publishing schedule.",
+            ),
+        ),
+        migrations.RunPython(set_published_from_pub_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0015_quote_published'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['source', '-created'], name='quote_source_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('published', False)), fields=['pub_date'], name='quote_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='source',
+            index=models.Index(fields=['group', 'name'], name='source_group_name_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copy_times_used_to_quotes(apps, schema_editor):
+    Quote = apps.get_model("django_quotes", "Quote")
+    QuoteStats = apps.get_model("django_quotes", "QuoteStats")
+    Quote.objects.update(
+        times_used=Coalesce(
+            Subquery(QuoteStats.objects.filter(quote_id=OuterRef("pk")).values("times_used")[:1]), 0
+        )
+    )
+
+
+def copy_times_used_to_stats(apps, schema_editor):
+    Quote = apps.get_model("django_quotes", "Quote")
+    QuoteStats = apps.get_model("django_quotes", "QuoteStats")
+    QuoteStats.objects.update(
+        times_used=Subquery(Quote.objects.filter(pk=OuterRef("quote_id")).values("times_used")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0016_quote_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='times_used',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Times used for random quotes, etc.'),
+        ),
+        migrations.RunPython(copy_times_used_to_quotes, copy_times_used_to_stats),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('published', True)), fields=['source', 'times_used'], name='quote_source_usage_idx'),
+        ),
+    ]
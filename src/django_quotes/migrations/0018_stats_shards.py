@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+STATS_MODELS = [("GroupStats", "GroupStatsShard", "group"), ("SourceStats", "SourceStatsShard", "source")]
+
+
+def copy_counts_to_shards(apps, schema_editor):
+    for stats_name, shard_name, owner in STATS_MODELS:
+        stats_model = apps.get_model("django_quotes", stats_name)
+        shard_model = apps.get_model("django_quotes", shard_name)
+        shard_model.objects.bulk_create(
+            shard_model(
+                **{f"{owner}_id": owner_id, "shard": 0},
+                quotes_requested=quotes_requested,
+                quotes_generated=quotes_generated,
+            )
+            for owner_id, quotes_requested, quotes_generated in stats_model.objects.values_list(
+                owner, "quotes_requested", "quotes_generated"
+            ).iterator()
+        )
+
+
+def copy_counts_from_shards(apps, schema_editor):
+    for stats_name, shard_name, owner in STATS_MODELS:
+        stats_model = apps.get_model("django_quotes", stats_name)
+        shard_model = apps.get_model("django_quotes", shard_name)
+        totals = shard_model.objects.filter(**{owner: OuterRef(owner)}).values(owner).order_by()
+        stats_model.objects.update(
+            quotes_requested=Coalesce(Subquery(totals.annotate(total=Sum("quotes_requested")).values("total")), 0),
+            quotes_generated=Coalesce(Subquery(totals.annotate(total=Sum("quotes_generated")).values("total")), 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0017_quote_times_used'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStatsShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(help_text='Number of this shard.')),
+                ('quotes_requested', models.PositiveIntegerField(default=0, help_text='Number of time child quotes have been requested.')),
+                ('quotes_generated', models.PositiveIntegerField(default=0, help_text='Number of times markov generated quotes have been requested.')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_shards', to='django_quotes.sourcegroup')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group', 'shard'), name='unique_group_stats_shard')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SourceStatsShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(help_text='Number of this shard.')),
+                ('quotes_requested', models.PositiveIntegerField(default=0, help_text='Number of time child quotes have been requested.')),
+                ('quotes_generated', models.PositiveIntegerField(default=0, help_text='Number of times markov generated quotes have been requested.')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_shards', to='django_quotes.source')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'shard'), name='unique_source_stats_shard')],
+            },
+        ),
+        migrations.RunPython(copy_counts_to_shards, copy_counts_from_shards),
+        migrations.RemoveField(
+            model_name='groupstats',
+            name='quotes_generated',
+        ),
+        migrations.RemoveField(
+            model_name='groupstats',
+            name='quotes_requested',
+        ),
+        migrations.RemoveField(
+            model_name='sourcestats',
+            name='quotes_generated',
+        ),
+        migrations.RemoveField(
+            model_name='sourcestats',
+            name='quotes_requested',
+        ),
+    ]
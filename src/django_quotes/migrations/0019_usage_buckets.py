@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0018_stats_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupUsageBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(help_text='Start of the period counted.')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], help_text='Length of the period counted.', max_length=4)),
+                ('shard', models.PositiveSmallIntegerField(default=0, help_text='Number of this shard.')),
+                ('quotes_requested', models.PositiveIntegerField(default=0, help_text='Number of time child quotes have been requested.')),
+                ('quotes_generated', models.PositiveIntegerField(default=0, help_text='Number of times markov generated quotes have been requested.')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_buckets', to='django_quotes.sourcegroup')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group', 'start', 'period', 'shard'), name='unique_group_usage_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SourceUsageBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(help_text='Start of the period counted.')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], help_text='Length of the period counted.', max_length=4)),
+                ('shard', models.PositiveSmallIntegerField(default=0, help_text='Number of this shard.')),
+                ('quotes_requested', models.PositiveIntegerField(default=0, help_text='Number of time child quotes have been requested.')),
+                ('quotes_generated', models.PositiveIntegerField(default=0, help_text='Number of times markov generated quotes have been requested.')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_buckets', to='django_quotes.source')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'start', 'period', 'shard'), name='unique_source_usage_bucket')],
+            },
+        ),
+    ]
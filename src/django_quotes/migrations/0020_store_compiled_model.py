@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0019_usage_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='store_compiled_model',
+            field=models.BooleanField(blank=True, default=None, help_text='Store the markov model compiled, so it loads faster but takes more space. Leave empty to use the site default.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sourcegroup',
+            name='store_compiled_model',
+            field=models.BooleanField(blank=True, default=None, help_text='Store the markov model compiled, so it loads faster but takes more space. Leave empty to use the site default.', null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0020_store_compiled_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='markov_dirty',
+            field=models.BooleanField(default=True, editable=False, help_text='Whether the markov model needs to be rebuilt.'),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='markov_generation',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped whenever the markov model needs to be rebuilt.'),
+        ),
+        migrations.AddField(
+            model_name='sourcegroup',
+            name='markov_dirty',
+            field=models.BooleanField(default=True, editable=False, help_text='Whether the markov model needs to be rebuilt.'),
+        ),
+        migrations.AddField(
+            model_name='sourcegroup',
+            name='markov_generation',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped whenever the markov model needs to be rebuilt.'),
+        ),
+        migrations.AddIndex(
+            model_name='source',
+            index=models.Index(condition=models.Q(('markov_dirty', True)), fields=['group'], name='source_markov_dirty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sourcegroup',
+            index=models.Index(condition=models.Q(('markov_dirty', True)), fields=['id'], name='group_markov_dirty_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_quotes', '0021_markov_dirty'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('pub_date__isnull', False), ('published', True)), fields=['pub_date'], name='quote_dated_published_idx'),
+        ),
+    ]
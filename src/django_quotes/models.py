@@ -7,8 +7,8 @@
 
 from __future__ import annotations
 
-import random
 from collections.abc import AsyncIterable, Iterable
+from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING, Any
 
 import rules as django_rules
@@ -17,8 +17,10 @@ from asgiref.sync import async_to_sync
 if TYPE_CHECKING:
     from django.db.models.manager import RelatedManager
 from django.conf import settings
-from django.db import models
-from django.db.models import Count
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.fields.related_descriptors import ReverseOneToOneDescriptor
+from django.db.models.functions import Coalesce, Trunc
 from django.db.models.query import QuerySet
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -27,17 +29,37 @@ from loguru import logger
 from markdown import markdown
 from rules.contrib.models import RulesModelBase, RulesModelMixin
 
-from django_markov.models import MarkovCombineError, MarkovEmptyError, MarkovTextModel
-from django_markov.text_models import POSifiedText
+from django_markov.models import MarkovCombineError, MarkovEmptyError, MarkovTextModel, sentence_generated
+from django_quotes.markov import (
+    aadd_corpus_to_text_model,
+    acombine_text_models,
+    agenerate_sentence,
+    aupdate_text_model_from_corpus,
+    generate_sentence,
+    make_sentences,
+    markov_model_cache,
+)
 from django_quotes.rules import (  # is_character_owner,; is_group_owner_and_authenticated,
     is_owner,
     is_owner_or_public,
 )
-from django_quotes.signals import quote_random_retrieved
+from django_quotes.sampling import (
+    ainvalidate_pool,
+    apick_quote_id,
+    get_selection_cache,
+    invalidate_pool,
+    pick_quote_id,
+    pick_quote_ids,
+)
+from django_quotes.sentences import atake_sentence, take_sentence
+from django_quotes.signals import markov_sentences_generated, quote_random_retrieved, quotes_random_retrieved
 from django_quotes.utils import generate_unique_slug_for_model
 
 MAX_QUOTES_FOR_RANDOM_SET = 50
 MAX_QUOTES_FOR_RANDOM_GROUP_SET = 50
+MAX_MARKOV_SENTENCES = 20
+MARKOV_DIRTY_FIELDS = ["markov_dirty", "markov_generation"]
+STATS_CACHE_PREFIX = "django_quotes:stats"
 
 if hasattr(settings, "MAX_QUOTES_FOR_RANDOM_SET"):  # pragma: nocover
     MAX_QUOTES_FOR_RANDOM_SET = settings.MAX_QUOTES_FOR_RANDOM_SET
@@ -45,6 +67,109 @@ if hasattr(settings, "MAX_QUOTES_FOR_RANDOM_SET"):  # pragma: nocover
 if hasattr(settings, "MAX_QUOTES_FOR_RANDOM_GROUP_SET"):  # pragma: nocover
     MAX_QUOTES_FOR_RANDOM_GROUP_SET = settings.MAX_QUOTES_FOR_RANDOM_GROUP_SET
 
+if hasattr(settings, "MAX_MARKOV_SENTENCES"):  # pragma: nocover
+    MAX_MARKOV_SENTENCES = settings.MAX_MARKOV_SENTENCES
+
+
+def _get_store_compiled_markov_models() -> bool:
+    """Check whether text models should be stored compiled by default, defaulting to False."""
+    return getattr(settings, "STORE_COMPILED_MARKOV_MODELS", False)
+
+
+def _serve_pooled_sentence(instance: Source | SourceGroup, scope: str, max_characters: int) -> str | None:
+    """Take a pre-generated sentence from the pool of a source or group, sending `sentence_generated` for it.
+
+    Args:
+        instance (Source | SourceGroup): The object to serve the sentence for.
+        scope (str): Either "source" or "group".
+        max_characters (int): Maximum characters allowed in the sentence.
+
+    Returns:
+        (str | None): The sentence, or None if the pool has none to give.
+    """
+    sentence = take_sentence(scope, instance.pk, max_characters)
+    if sentence is not None:
+        sentence_generated.send(
+            MarkovTextModel, instance=_get_text_model(instance), char_limit=max_characters, sentence=sentence
+        )
+    return sentence
+
+
+async def _aserve_pooled_sentence(instance: Source | SourceGroup, scope: str, max_characters: int) -> str | None:
+    """Async version of `_serve_pooled_sentence`.
+
+    Args:
+        instance (Source | SourceGroup): The object to serve the sentence for.
+        scope (str): Either "source" or "group".
+        max_characters (int): Maximum characters allowed in the sentence.
+
+    Returns:
+        (str | None): The sentence, or None if the pool has none to give.
+    """
+    sentence = await atake_sentence(scope, instance.pk, max_characters)
+    if sentence is not None:
+        await sentence_generated.asend(
+            MarkovTextModel, instance=await _aget_text_model(instance), char_limit=max_characters, sentence=sentence
+        )
+    return sentence
+
+
+class PreservedOnUpdateMixin:
+    """
+    A field that is only changed with atomic queryset updates, e.g. a counter. `save()` writes it when inserting
+    a row, but leaves the column as it is when updating one, so that an instance loaded before such an update
+    cannot overwrite it. Migrations see the plain field it is mixed into.
+    """
+
+    def pre_save(self, model_instance: models.Model, add: bool):  # noqa: FBT001
+        if add:
+            return super().pre_save(model_instance, add)  # type: ignore
+        return F(self.attname)  # type: ignore
+
+    def deconstruct(self):
+        name, _, args, kwargs = super().deconstruct()  # type: ignore
+        return name, f"django.db.models.{type(self).__mro__[2].__name__}", args, kwargs
+
+
+class PreservedBooleanField(PreservedOnUpdateMixin, models.BooleanField):
+    """A `BooleanField` that `save()` leaves alone when updating an existing row."""
+
+
+class PreservedPositiveIntegerField(PreservedOnUpdateMixin, models.PositiveIntegerField):
+    """A `PositiveIntegerField` that `save()` leaves alone when updating an existing row."""
+
+
+async def _aclear_markov_dirty(instance: Source | SourceGroup) -> None:
+    """Flag the text model of a source or group as up to date, unless it was marked dirty again since the instance
+    was loaded, i.e. while it was being rebuilt.
+
+    Args:
+        instance (Source | SourceGroup): The object whose text model was rebuilt.
+    """
+    await (
+        type(instance)
+        .objects.filter(pk=instance.pk, markov_generation=instance.markov_generation)
+        .aupdate(markov_dirty=False)
+    )
+    instance.markov_dirty = False
+
+
+def mark_markov_models_dirty(source_ids: Iterable[int] = (), group_ids: Iterable[int] = ()) -> None:
+    """Flag the text models of markov enabled sources, their groups, and any other groups as needing a rebuild,
+    bumping their generation. `makemarkov` then only rebuilds the dirty models.
+
+    Args:
+        source_ids (Iterable[int]): The ids of the sources whose quotes changed.
+        group_ids (Iterable[int]): The ids of further groups whose sources changed.
+    """
+    markov_sources = Source.objects.filter(pk__in=list(source_ids), allow_markov=True)
+    bump = {"markov_dirty": True, "markov_generation": F("markov_generation") + 1}
+    with transaction.atomic():
+        markov_sources.update(**bump)
+        SourceGroup.objects.filter(Q(pk__in=list(group_ids)) | Q(pk__in=markov_sources.values("group_id"))).update(
+            **bump
+        )
+
 
 class QuoteCorpusError(Exception):
     """
@@ -54,6 +179,40 @@ class QuoteCorpusError(Exception):
     pass
 
 
+def _get_text_model(instance: Source | SourceGroup) -> MarkovTextModel | None:
+    """Get the text model of a source or group. If it is not loaded yet, it is fetched without its `data`, which
+    is only needed when its chain is not cached yet (see `django_quotes.markov`).
+
+    Args:
+        instance (Source | SourceGroup): The object owning the text model.
+
+    Returns:
+        (MarkovTextModel | None): The text model, or None if the object does not have one.
+    """
+    if instance.text_model_id is None:
+        return None
+    if not type(instance).text_model.is_cached(instance):  # type: ignore
+        instance.text_model = MarkovTextModel.objects.defer("data").get(pk=instance.text_model_id)
+    return instance.text_model
+
+
+async def _aget_text_model(instance: Source | SourceGroup) -> MarkovTextModel | None:
+    """Get the text model of a source or group, fetching it asynchronously and without its `data` if it is not
+    loaded yet.
+
+    Args:
+        instance (Source | SourceGroup): The object owning the text model.
+
+    Returns:
+        (MarkovTextModel | None): The text model, or None if the object does not have one.
+    """
+    if instance.text_model_id is None:
+        return None
+    if not type(instance).text_model.is_cached(instance):  # type: ignore
+        instance.text_model = await MarkovTextModel.objects.defer("data").aget(pk=instance.text_model_id)
+    return instance.text_model
+
+
 class AbstractOwnerModel(models.Model):
     """
     Abstract model for representing an entity owned by a user with toggles for either allowing submissions for it
@@ -101,14 +260,21 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
         allow_submissions (bool): Allow other users to submit characters to this. Not yet implemented.
         slug (str): A unique slug to represent this group. Generated automatically from name.
         text_model (MarkovTextModel | None): The current text model.
+        store_compiled_model (bool | None): Store the text model compiled. Defaults to the
+            `STORE_COMPILED_MARKOV_MODELS` setting if None.
+        markov_dirty (bool): Whether the text model needs to be rebuilt, because quotes changed since it was built.
+        markov_generation (int): Bumped along with `markov_dirty`, so a rebuild only clears the flag if nothing
+            changed while it ran.
         created (datetime): When this object was first created. Auto-generated.
         modified (datetime): Last time this object was modified. Auto-generated.
 
     """
 
     if TYPE_CHECKING:
+        text_model_id: int | None
         source_set: RelatedManager[Source]
         stats: GroupStats
+        usage_buckets: RelatedManager[GroupUsageBucket]
 
     name = models.CharField(
         _("Source Name"),
@@ -135,6 +301,21 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
         blank=True,
         help_text=_("The markov model for this group."),
     )
+    store_compiled_model = models.BooleanField(
+        null=True,
+        blank=True,
+        default=None,
+        help_text=_(
+            "Store the markov model compiled, so it loads faster but takes more space. "
+            "Leave empty to use the site default."
+        ),
+    )
+    markov_dirty = PreservedBooleanField(
+        default=True, editable=False, help_text=_("Whether the markov model needs to be rebuilt.")
+    )
+    markov_generation = PreservedPositiveIntegerField(
+        default=0, editable=False, help_text=_("Bumped whenever the markov model needs to be rebuilt.")
+    )
 
     class Meta:
         rules_permissions = {
@@ -144,12 +325,16 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
             "delete": is_owner,
         }
         ordering = ["name"]
+        indexes = [
+            # Finding the groups whose markov model needs to be rebuilt.
+            models.Index(fields=["id"], condition=models.Q(markov_dirty=True), name="group_markov_dirty_idx"),
+        ]
 
     def __str__(self):  # no cov
         return self.name
 
     def save(self, *args, **kwargs):
-        """Save and create slug if missing."""
+        """Save and create slug if missing. The markov dirty flag is left alone when updating an existing group."""
         if not self.slug:  # Once this slug is set, it does not change except through devil pacts
             logger.debug("Group is being saved and a slug was provided.")
             self.slug = generate_unique_slug_for_model(model_class=type(self), text=self.name)
@@ -174,6 +359,13 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
             return ""
         return markdown(self.description)
 
+    @property
+    def stores_compiled_model(self) -> bool:
+        """Whether the text model is stored compiled, per `store_compiled_model` or the site default."""
+        if self.store_compiled_model is None:
+            return _get_store_compiled_markov_models()
+        return self.store_compiled_model
+
     @cached_property
     def total_sources(self) -> int:
         """Total number of sources for the group."""
@@ -192,16 +384,16 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
     @cached_property
     def markov_ready(self) -> bool:
         """Checks to see if there are Markov enabled sources and sufficient quotes."""
-        if (
-            self.markov_sources > 0
-            and self.text_model is not None
-            and Quote.objects.filter(source__in=self.source_set.filter(allow_markov=True)).count() > 10  # noqa:PLR2004
-        ):
+        markov_quotes = Quote.objects.filter(source__in=self.source_set.filter(allow_markov=True), published=True)
+        if self.markov_sources > 0 and self.text_model_id is not None and markov_quotes.count() > 10:  # noqa:PLR2004
             return True
         return False
 
     async def aupdate_markov_model(self, additional_model: MarkovTextModel | None = None) -> None:
-        """Updates the related MarkovTextModel.
+        """Updates the related MarkovTextModel. The models of the sources are combined, unless this group or one of
+        the sources stores its model compiled. Compiled models cannot be combined, so the model is rebuilt from the
+        quotes of the sources instead. The chains are built and combined by `django_quotes.markov.run_markov_task`,
+        off the event loop.
 
         Args:
             additional_model (MarkovTextModel | None): An additional model to include in the combination. Useful for
@@ -213,26 +405,35 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
                 .prefetch_related("quote_set")
                 .filter(allow_markov=True, text_model__data__isnull=False)
             )
-            markov_sources = sources.annotate(num_quotes=Count("quote")).filter(num_quotes__gt=10)
-            models_to_combine = []
-            if additional_model is not None:
-                models_to_combine.append(additional_model)
-            if await markov_sources.aexists():
-                models_to_combine += [source.text_model async for source in markov_sources]
-            if len(models_to_combine) > 0:
+            markov_sources = [
+                source
+                async for source in sources.annotate(
+                    num_quotes=Count("quote", filter=models.Q(quote__published=True))
+                ).filter(num_quotes__gt=10)
+            ]
+            models_to_combine = [source.text_model for source in markov_sources if source.text_model is not None]
+            if additional_model is not None and additional_model.pk not in {model.pk for model in models_to_combine}:
+                models_to_combine.insert(0, additional_model)
+            if markov_sources and (
+                self.stores_compiled_model or any(source.stores_compiled_model for source in markov_sources)
+            ):
+                await aupdate_text_model_from_corpus(
+                    self.text_model,
+                    [
+                        quote.quote
+                        async for quote in Quote.objects.filter(source__in=markov_sources, published=True).only("quote")
+                    ],
+                    store_compiled=self.stores_compiled_model,
+                )
+            elif len(models_to_combine) > 0:
                 if len(models_to_combine) > 1:
-                    new_text_model, num_combined = await self.text_model.acombine_models(
-                        models_to_combine, mode="strict", return_type="text_model"
-                    )
-                    if not isinstance(new_text_model, POSifiedText):  # no cov
-                        msg = "Only an instance of POSifiedText is allowed when updating the SourceGroup text_model!"
-                        raise TypeError(msg)
-                    self.text_model.data = new_text_model.to_json()  # type: ignore
+                    self.text_model.data = await acombine_text_models(models_to_combine)  # type: ignore
                 else:
                     # There is a only a single source
                     source = models_to_combine[0]
-                    self.text_model.data = source.data
+                    self.text_model.data = source.data  # type: ignore
                 await self.text_model.asave()
+        await _aclear_markov_dirty(self)
 
     def update_markov_model(self, additional_model: MarkovTextModel | None = None) -> None:
         """Updates the related MarkovTextModel."""
@@ -250,25 +451,100 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
             (str | None): The generated sentence or None if no sentence was possible for the number
                 of tries.
         """
-        if self.markov_ready and self.text_model is not None:
+        if self.text_model_id is not None and (sentence := _serve_pooled_sentence(self, "group", max_characters)):
+            return sentence
+        if self.markov_ready and self.text_model_id is not None:
             logger.debug("Group is ready for markov sentences. Checking model...")
-            mmodel = self.text_model
-            if not mmodel.is_ready:
+            mmodel = _get_text_model(self)
+            if markov_model_cache.get(mmodel) is None:  # type: ignore
                 logger.debug("Markov model for group is not generated yet! Generating...")
                 self.update_markov_model()
-                mmodel.refresh_from_db()
+                mmodel.refresh_from_db()  # type: ignore
             logger.debug("Generating sentence...")
-            sentence: str | None = mmodel.generate_sentence(char_limit=max_characters, tries=tries)
+            sentence = generate_sentence(mmodel, char_limit=max_characters, tries=tries)  # type: ignore
             if sentence is not None:
                 logger.debug(f"Returning generated sentence: '{sentence}'")
                 return sentence
         logger.debug("Group is not ready for markov requests yet!")
         return None
 
+    def generate_markov_sentences(self, count: int, max_characters: int = 280, tries: int = 20) -> list[str]:
+        """
+        Generate a batch of distinct markov sentences for the group. The model is loaded once for the whole batch
+        and its stats are updated with a single write.
+
+        Args:
+            count (int): The number of sentences to return.
+            max_characters (int): Maximum characters allowed in each sentence.
+            tries (int): Number of tries per requested sentence. The batch shares `count * tries` tries, so
+                sentences that are hard to make do not hold up the others.
+
+        Returns:
+            (list[str]): The sentences, which may be fewer than requested or empty if the group is not ready.
+        """
+        if not self.markov_ready:
+            logger.debug("Group is not ready for markov requests yet!")
+            return []
+        mmodel = _get_text_model(self)
+        if markov_model_cache.get(mmodel) is None:  # type: ignore
+            logger.debug("Markov model for group is not generated yet! Generating...")
+            self.update_markov_model()
+            mmodel.refresh_from_db()  # type: ignore
+        sentences = make_sentences(mmodel, count, char_limit=max_characters, tries=count * tries)  # type: ignore
+        if sentences:
+            markov_sentences_generated.send(type(self), instance=self, sentences=sentences)
+        return sentences
+
+    async def _amarkov_ready(self) -> bool:
+        """Async version of markov ready.
+
+        Returns:
+            (bool): If ready for markov
+        """
+        markov_sources = self.source_set.filter(allow_markov=True)
+        if (
+            self.text_model_id is not None
+            and await markov_sources.aexists()
+            and await Quote.objects.filter(source__in=markov_sources, published=True).acount() > 10  # noqa: PLR2004
+        ):
+            return True
+        return False
+
+    async def agenerate_markov_sentence(self, max_characters: int = 280, tries: int = 20) -> str | None:
+        """
+        Async version of `generate_markov_sentence`.
+
+        Args:
+            max_characters (int): Maximum characters allowed in the resulting sentence.
+            tries (int): Maximum number of tries django_markov should use to create the sentence.
+
+        Returns:
+            (str | None): The generated sentence or None if no sentence was possible for the number
+                of tries.
+        """
+        if self.text_model_id is not None and (
+            sentence := await _aserve_pooled_sentence(self, "group", max_characters)
+        ):
+            return sentence
+        if await self._amarkov_ready():
+            mmodel = await _aget_text_model(self)
+            if mmodel is not None:
+                if await markov_model_cache.aget(mmodel) is None:
+                    logger.debug("Markov model for group is not generated yet! Generating...")
+                    await self.aupdate_markov_model()
+                    await mmodel.arefresh_from_db()
+                sentence = await agenerate_sentence(mmodel, char_limit=max_characters, tries=tries)
+                if sentence is not None:
+                    return sentence
+        logger.debug("Group is not ready for markov requests yet!")
+        return None
+
     def get_random_quote(self, max_quotes_to_process: int | None = MAX_QUOTES_FOR_RANDOM_GROUP_SET) -> Any:
         """
         Get a random quote object from any of the characters defined within the group.
-        Prioritizes quotes that have been returned less often.
+        Prioritizes quotes that have been returned less often. Like `Source.get_random_quote`, the
+        least used quotes of the group are kept in a cached pool, so a pick only costs a single
+        primary key lookup rather than a sort over every quote in the group.
 
         Args:
             max_quotes_to_process (int | None): Maximum number of quotes to retrieve before
@@ -277,18 +553,93 @@ class SourceGroup(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metacla
         Returns:
              (Quote | None) Quote object or None if no quotes are found.
         """
-        # TODO: Create Q object to filter for null datetimes or less than now.
-        quotes = (
-            Quote.objects.filter(source__in=self.source_set.all())
-            .filter(models.Q(pub_date__isnull=True) | models.Q(pub_date__lte=timezone.now()))
-            .select_related("stats")
-            .order_by("stats__times_used")[:max_quotes_to_process]
+        quote_id = pick_quote_id("group", self.pk, Quote.objects.filter(source__group=self), max_quotes_to_process)
+        if quote_id is None:
+            return None
+        try:
+            quote = Quote.objects.select_related("source", "source__group").get(pk=quote_id)
+        except Quote.DoesNotExist:  # no cov
+            invalidate_pool("group", self.pk)
+            return self.get_random_quote(max_quotes_to_process=max_quotes_to_process)
+        quote_random_retrieved.send(type(quote.source), instance=quote.source, quote_retrieved=quote)
+        return quote
+
+    async def aget_random_quote(self, max_quotes_to_process: int | None = MAX_QUOTES_FOR_RANDOM_GROUP_SET) -> Any:
+        """
+        Async version of `get_random_quote`. The pool is read through the async cache interface, and the
+        `quote_random_retrieved` signal is dispatched with `asend`.
+
+        Args:
+            max_quotes_to_process (int | None): Maximum number of quotes to retrieve before
+                selecting a random one.
+
+        Returns:
+             (Quote | None) Quote object or None if no quotes are found.
+        """
+        quote_id = await apick_quote_id(
+            "group", self.pk, Quote.objects.filter(source__group=self), max_quotes_to_process
         )
-        if quotes.exists():
-            quote = random.choice(list(quotes))  # noqa: S311
-            quote_random_retrieved.send(type(quote.source), instance=quote.source, quote_retrieved=quote)
-            return quote
-        return None
+        if quote_id is None:
+            return None
+        try:
+            quote = await Quote.objects.select_related("source", "source__group").aget(pk=quote_id)
+        except Quote.DoesNotExist:  # no cov
+            await ainvalidate_pool("group", self.pk)
+            return await self.aget_random_quote(max_quotes_to_process=max_quotes_to_process)
+        await quote_random_retrieved.asend(type(quote.source), instance=quote.source, quote_retrieved=quote)
+        return quote
+
+    def get_random_quotes(
+        self, count: int, max_quotes_to_process: int | None = MAX_QUOTES_FOR_RANDOM_GROUP_SET
+    ) -> list[Quote]:
+        """
+        Get a batch of distinct random quotes from any of the characters defined within the group, using the
+        same prioritization as `get_random_quote`. The quotes are fetched in a single query and their stats
+        are updated in bulk.
+
+        Args:
+            count (int): The number of quotes to return.
+            max_quotes_to_process (int | None): Maximum number of quotes to select from. At most this many
+                quotes are returned.
+
+        Returns:
+            (list[Quote]): The quotes, which may be fewer than requested or empty if there are not enough quotes.
+        """
+        quote_ids = pick_quote_ids(
+            "group", self.pk, Quote.objects.filter(source__group=self), max_quotes_to_process, count
+        )
+        quotes = Quote.objects.select_related("source", "source__group").in_bulk(quote_ids)
+        quotes_to_return = [quotes[quote_id] for quote_id in quote_ids if quote_id in quotes]
+        if quotes_to_return:
+            quotes_random_retrieved.send(type(self), instance=self, quotes_retrieved=quotes_to_return)
+        return quotes_to_return
+
+    def get_stats(self) -> GroupStats:
+        """
+        Get the usage stats of this group, the same as `stats`. Stats rows are only created by the first write to
+        them, so until then an unsaved `GroupStats`, whose counters are zero, is returned.
+
+        Returns:
+            (GroupStats): The stats.
+        """
+        return self.stats
+
+    def get_usage_series(
+        self, period: str = "day", since: datetime | None = None, until: datetime | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Get the number of quotes requested and sentences generated for this group and its sources per hour or day.
+
+        Args:
+            period (str): Either "hour" or "day".
+            since (datetime | None): Start of the series. Defaults to 48 hours or 30 days ago.
+            until (datetime | None): End of the series, exclusive. Defaults to now.
+
+        Returns:
+            (list[dict[str, Any]]): The `start`, `quotes_requested`, and `quotes_generated` of each hour or day
+                with any usage, in order.
+        """
+        return get_usage_series(self.usage_buckets.all(), period, since, until)
 
 
 class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=RulesModelBase):
@@ -307,14 +658,22 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
         public (bool): Is the character public to other users? Defaults to False.
         allow_submissions (bool): Allow other users to submit quotes for this character? Defaults to False.
         text_model (MarkovTextModel | None): The current text_model.
+        store_compiled_model (bool | None): Store the text model compiled. Defaults to the
+            `STORE_COMPILED_MARKOV_MODELS` setting if None.
+        markov_dirty (bool): Whether the text model needs to be rebuilt, because quotes changed since it was built.
+        markov_generation (int): Bumped along with `markov_dirty`, so a rebuild only clears the flag if nothing
+            changed while it ran.
         created (datetime): When this object was first created. Auto-generated.
         modified (datetime): Last time this object was modified. Auto-generated.
 
     """
 
     if TYPE_CHECKING:
+        group_id: int
+        text_model_id: int | None
         quote_set: RelatedManager[Quote]
         stats: SourceStats
+        usage_buckets: RelatedManager[SourceUsageBucket]
 
     name = models.CharField(max_length=100, help_text=_("Name of the character"))
     slug = models.SlugField(
@@ -343,6 +702,21 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
         blank=True,
         help_text=_("The text model for this character."),
     )
+    store_compiled_model = models.BooleanField(
+        null=True,
+        blank=True,
+        default=None,
+        help_text=_(
+            "Store the markov model compiled, so it loads faster but takes more space. "
+            "Leave empty to use the site default."
+        ),
+    )
+    markov_dirty = PreservedBooleanField(
+        default=True, editable=False, help_text=_("Whether the markov model needs to be rebuilt.")
+    )
+    markov_generation = PreservedPositiveIntegerField(
+        default=0, editable=False, help_text=_("Bumped whenever the markov model needs to be rebuilt.")
+    )
 
     class Meta:
         rules_permissions = {
@@ -351,12 +725,18 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
             "edit": is_owner,
             "delete": is_owner,
         }
+        indexes = [
+            # Listing the sources of a group by name.
+            models.Index(fields=["group", "name"], name="source_group_name_idx"),
+            # Finding the sources whose markov model needs to be rebuilt.
+            models.Index(fields=["group"], condition=models.Q(markov_dirty=True), name="source_markov_dirty_idx"),
+        ]
 
     def __str__(self):  # no cov
         return self.name
 
     def save(self, *args, **kwargs):
-        """Save and create slug, if missing."""
+        """Save and create slug, if missing. The markov dirty flag is left alone when updating an existing source."""
         if not self.slug:
             self.slug = generate_unique_slug_for_model(type(self), text=f"{self.group.slug} {self.name}")
         super().save(*args, **kwargs)
@@ -368,6 +748,13 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
             return ""
         return markdown(self.description)
 
+    @property
+    def stores_compiled_model(self) -> bool:
+        """Whether the text model is stored compiled, per `store_compiled_model` or the site default."""
+        if self.store_compiled_model is None:
+            return _get_store_compiled_markov_models()
+        return self.store_compiled_model
+
     @property
     def markov_ready(self) -> bool:
         """
@@ -377,7 +764,7 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
         Returns:
             (bool): If ready for markov requests.
         """
-        if self.allow_markov and Quote.objects.filter(source=self).count() > 10:  # noqa:PLR2004
+        if self.allow_markov and Quote.objects.filter(source=self, published=True).count() > 10:  # noqa:PLR2004
             return True
         return False
 
@@ -387,20 +774,22 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
         Returns:
             (bool): If ready for markov
         """
-        if self.allow_markov and await Quote.objects.filter(source=self).acount() > 10:  # noqa: PLR2004
+        if self.allow_markov and await Quote.objects.filter(source=self, published=True).acount() > 10:  # noqa: PLR2004
             return True
         return False
 
     async def aupdate_markov_model(self) -> None:
         """
-        Process all quotes into the associated model.
+        Process all quotes into the associated model. The chain is built by `django_quotes.markov.run_markov_task`,
+        off the event loop.
         """
         if await self._amarkov_ready():
-            await self.text_model.aupdate_model_from_corpus(  # type: ignore
-                corpus_entries=[quote.quote async for quote in self.quote_set.all()],
-                char_limit=0,
-                store_compiled=False,
+            await aupdate_text_model_from_corpus(
+                self.text_model,  # type: ignore
+                [quote.quote async for quote in self.quote_set.filter(published=True)],
+                store_compiled=self.stores_compiled_model,
             )
+        await _aclear_markov_dirty(self)
 
     def update_markov_model(self) -> None:
         """
@@ -411,12 +800,17 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
     async def aadd_new_quote_to_model(self, quote_to_add: Quote | Iterable[Quote] | AsyncIterable[Quote]) -> None:
         """Allows adding a new quote to the source's (and group's) text model without parsing the whole corpus.
         Note that deleting or editing a quote will still require a full re-ingest of the corpus to remove old data.
+        Compiled models cannot be added to, so models that are stored compiled are rebuilt instead.
 
         Args:
             quote_to_add (Quote | Iterable[Quote] | AsyncIterable[Quote]): A Quote instance, or an iterable of Quote
                 instances to add to the source text model.
         """
-        if self.allow_markov and await self.quote_set.acount() > 10 and self.text_model is not None:  # noqa: PLR2004
+        if (
+            self.allow_markov
+            and await self.quote_set.filter(published=True).acount() > 10  # noqa: PLR2004
+            and self.text_model is not None
+        ):
             if not self.text_model.data:
                 await self.aupdate_markov_model()
                 await self.group.aupdate_markov_model()
@@ -430,8 +824,14 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
                 else:
                     corpus_entries = [quote_to_add.quote]
                 try:
-                    await self.text_model.aadd_new_corpus_data_to_model(corpus_entries=corpus_entries)
-                    await self.group.text_model.aadd_new_corpus_data_to_model(corpus_entries=corpus_entries)
+                    if self.stores_compiled_model:
+                        await self.aupdate_markov_model()
+                    else:
+                        await aadd_corpus_to_text_model(self.text_model, corpus_entries)
+                    if self.group.stores_compiled_model:
+                        await self.group.aupdate_markov_model()
+                    else:
+                        await aadd_corpus_to_text_model(self.group.text_model, corpus_entries)
                 except ValueError as ve:  # no cov
                     msg = f"Unable to combine models: {ve}"
                     raise QuoteCorpusError(msg) from ve
@@ -466,24 +866,81 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
         """
         if not max_characters:  # no cov
             max_characters = 280
+        if self.allow_markov and (sentence := _serve_pooled_sentence(self, "source", max_characters)):
+            return sentence
         logger.debug("Checking to see if character is markov ready...")
-        if self.markov_ready and self.text_model is not None:
+        if self.markov_ready and self.text_model_id is not None:
             logger.debug("It IS ready. Fetching markov model.")
-            markov_model = self.text_model
-            if not markov_model.is_ready:
+            markov_model = _get_text_model(self)
+            if markov_model_cache.get(markov_model) is None:  # type: ignore
                 logger.debug("No model defined yet, generating...")
                 self.update_markov_model()
             logger.debug("Markov text model loaded. Generating sentence.")
-            sentence: str | None = markov_model.generate_sentence(char_limit=max_characters, tries=tries)
+            sentence = generate_sentence(markov_model, char_limit=max_characters, tries=tries)  # type: ignore
             if sentence is not None:
                 return sentence
         return None
 
+    async def aget_markov_sentence(self, max_characters: int | None = 280, tries: int = 20) -> str | None:
+        """
+        Async version of `get_markov_sentence`.
+
+        Args:
+            max_characters (int | None): Maximum number of characters allowed in
+                resulting sentence.
+            tries (int): Number of times django_markov may try to generate sentence.
+
+        Returns:
+            (str | None): The resulting sentence or None if a sentence could not be formed.
+        """
+        if not max_characters:  # no cov
+            max_characters = 280
+        if self.allow_markov and (sentence := await _aserve_pooled_sentence(self, "source", max_characters)):
+            return sentence
+        if await self._amarkov_ready():
+            markov_model = await _aget_text_model(self)
+            if markov_model is not None:
+                if await markov_model_cache.aget(markov_model) is None:
+                    logger.debug("No model defined yet, generating...")
+                    await self.aupdate_markov_model()
+                sentence = await agenerate_sentence(markov_model, char_limit=max_characters, tries=tries)
+                if sentence is not None:
+                    return sentence
+        return None
+
+    def get_markov_sentences(self, count: int, max_characters: int | None = 280, tries: int = 20) -> list[str]:
+        """
+        Generate a batch of distinct markov sentences for this source. The model is loaded once for the whole
+        batch and its stats are updated with a single write.
+
+        Args:
+            count (int): The number of sentences to return.
+            max_characters (int | None): Maximum number of characters allowed in each sentence.
+            tries (int): Number of tries per requested sentence. The batch shares `count * tries` tries, so
+                sentences that are hard to make do not hold up the others.
+
+        Returns:
+            (list[str]): The sentences, which may be fewer than requested or empty if the source is not ready.
+        """
+        if not max_characters:  # no cov
+            max_characters = 280
+        if not self.markov_ready or self.text_model_id is None:
+            return []
+        markov_model = _get_text_model(self)
+        if markov_model_cache.get(markov_model) is None:  # type: ignore
+            logger.debug("No model defined yet, generating...")
+            self.update_markov_model()
+        sentences = make_sentences(markov_model, count, char_limit=max_characters, tries=count * tries)  # type: ignore
+        if sentences:
+            markov_sentences_generated.send(type(self), instance=self, sentences=sentences)
+        return sentences
+
     def get_random_quote(self, max_quotes_to_process: int | None = MAX_QUOTES_FOR_RANDOM_SET) -> Any | None:
         """
-        This actually not all that random. It's going to grab the quotes
-        ordered ordered by how infrequently they've been returned, and then grab a random one
-        in the set. But for our purposes, it's fine. If there aren't any quotes, it will return None.
+        This actually not all that random. It's going to pick from the quotes that have been returned
+        least often, and then grab a random one in the set. But for our purposes, it's fine. The set is kept
+        in a cached pool (see `django_quotes.sampling`), so a pick only costs a single primary key lookup.
+        If there aren't any quotes, it will return None.
 
         Args:
             max_quotes_to_process (int | None): Maximum number of quotes to retrive before
@@ -492,18 +949,89 @@ class Source(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Ru
         Returns:
             (Quote | None): The quote object or None if no quotes found.
         """
-        quotes_to_pick = (
-            Quote.objects.filter(source=self)
-            .filter(models.Q(pub_date__isnull=True) | models.Q(pub_date__lte=timezone.now()))
-            .select_related("stats")
-            .order_by("stats__times_used")[:max_quotes_to_process]
-        )
-        if quotes_to_pick.exists():
-            # Select a random index in the result set.
-            quote_to_return = random.choice(list(quotes_to_pick))  # noqa: S311
-            quote_random_retrieved.send(type(self), instance=self, quote_retrieved=quote_to_return)
-            return quote_to_return
-        return None
+        quote_id = pick_quote_id("source", self.pk, Quote.objects.filter(source=self), max_quotes_to_process)
+        if quote_id is None:
+            return None
+        try:
+            quote_to_return = Quote.objects.select_related("source", "source__group").get(pk=quote_id)
+        except Quote.DoesNotExist:  # no cov
+            # The quote was removed without the pool being invalidated, e.g. via a queryset delete.
+            invalidate_pool("source", self.pk)
+            return self.get_random_quote(max_quotes_to_process=max_quotes_to_process)
+        quote_random_retrieved.send(type(self), instance=self, quote_retrieved=quote_to_return)
+        return quote_to_return
+
+    async def aget_random_quote(self, max_quotes_to_process: int | None = MAX_QUOTES_FOR_RANDOM_SET) -> Any | None:
+        """
+        Async version of `get_random_quote`. The pool is read through the async cache interface, and the
+        `quote_random_retrieved` signal is dispatched with `asend`.
+
+        Args:
+            max_quotes_to_process (int | None): Maximum number of quotes to retrive before
+                selecting at random.
+
+        Returns:
+            (Quote | None): The quote object or None if no quotes found.
+        """
+        quote_id = await apick_quote_id("source", self.pk, Quote.objects.filter(source=self), max_quotes_to_process)
+        if quote_id is None:
+            return None
+        try:
+            quote_to_return = await Quote.objects.select_related("source", "source__group").aget(pk=quote_id)
+        except Quote.DoesNotExist:  # no cov
+            await ainvalidate_pool("source", self.pk)
+            return await self.aget_random_quote(max_quotes_to_process=max_quotes_to_process)
+        await quote_random_retrieved.asend(type(self), instance=self, quote_retrieved=quote_to_return)
+        return quote_to_return
+
+    def get_random_quotes(
+        self, count: int, max_quotes_to_process: int | None = MAX_QUOTES_FOR_RANDOM_SET
+    ) -> list[Quote]:
+        """
+        Get a batch of distinct random quotes for this source, using the same prioritization as
+        `get_random_quote`. The quotes are fetched in a single query and their stats are updated in bulk.
+
+        Args:
+            count (int): The number of quotes to return.
+            max_quotes_to_process (int | None): Maximum number of quotes to select from. At most this many
+                quotes are returned.
+
+        Returns:
+            (list[Quote]): The quotes, which may be fewer than requested or empty if there are not enough quotes.
+        """
+        quote_ids = pick_quote_ids("source", self.pk, Quote.objects.filter(source=self), max_quotes_to_process, count)
+        quotes = Quote.objects.select_related("source", "source__group").in_bulk(quote_ids)
+        quotes_to_return = [quotes[quote_id] for quote_id in quote_ids if quote_id in quotes]
+        if quotes_to_return:
+            quotes_random_retrieved.send(type(self), instance=self, quotes_retrieved=quotes_to_return)
+        return quotes_to_return
+
+    def get_stats(self) -> SourceStats:
+        """
+        Get the usage stats of this source, the same as `stats`. Stats rows are only created by the first write to
+        them, so until then an unsaved `SourceStats`, whose counters are zero, is returned.
+
+        Returns:
+            (SourceStats): The stats.
+        """
+        return self.stats
+
+    def get_usage_series(
+        self, period: str = "day", since: datetime | None = None, until: datetime | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Get the number of quotes requested and sentences generated for this source per hour or day.
+
+        Args:
+            period (str): Either "hour" or "day".
+            since (datetime | None): Start of the series. Defaults to 48 hours or 30 days ago.
+            until (datetime | None): End of the series, exclusive. Defaults to now.
+
+        Returns:
+            (list[dict[str, Any]]): The `start`, `quotes_requested`, and `quotes_generated` of each hour or day
+                with any usage, in order.
+        """
+        return get_usage_series(self.usage_buckets.all(), period, since, until)
 
 
 class Quote(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=RulesModelBase):
@@ -516,6 +1044,12 @@ class Quote(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Rul
         citation (str | None): Optional description of quote source, e.g. episode number or book title.
         citation_url (str | None): Optional accompanying URL for the citation.
         pub_date (datetime| None): Date and time when the quote was published.
+        published (bool): Whether the pub_date has passed, making the quote eligible for random selection
+            and markov models. Kept up to date on save and by `django_quotes.tasks.publish_scheduled_quotes`.
+            Bulk writes skip `save`, so they should set it along with `pub_date`.
+        times_used (int): The number of times this has been returned as a random quote. Only changed with atomic
+            updates by the stats receivers, and mirrored to `QuoteStats.times_used` unless
+            `MIRROR_QUOTE_USAGE_TO_STATS` is False.
         source (Source): The source of this quote.
         owner (User): The user that created and owns this quote.
         created (datetime): When this object was first created. Auto-generated.
@@ -525,6 +1059,7 @@ class Quote(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Rul
 
     if TYPE_CHECKING:
         id: int
+        source_id: int
 
     quote = models.CharField(
         max_length=280,  # Keep the base limit to 280 so that quotes are 'tweetable'
@@ -547,6 +1082,14 @@ class Quote(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Rul
         blank=True,
         help_text=_("When is the earliest time this should appear in random results?"),
     )
+    published = models.BooleanField(
+        default=True,
+        editable=False,
+        help_text=_("Has the pub_date passed? Updated on save and by the publishing schedule."),
+    )
+    times_used = PreservedPositiveIntegerField(
+        default=0, editable=False, help_text=_("Times used for random quotes, etc.")
+    )
 
     class Meta:
         rules_permissions = {
@@ -555,10 +1098,33 @@ class Quote(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Rul
             "edit": is_owner,
             "delete": is_owner,
         }
+        indexes = [
+            # Random selection pools and markov corpora only ever consider published quotes of a source,
+            # and the pools want the least used ones first.
+            models.Index(
+                fields=["source", "times_used"], condition=models.Q(published=True), name="quote_source_usage_idx"
+            ),
+            # Listing the quotes of a source, newest first.
+            models.Index(fields=["source", "-created"], name="quote_source_created_idx"),
+            # Finding scheduled quotes whose pub_date has passed.
+            models.Index(fields=["pub_date"], condition=models.Q(published=False), name="quote_scheduled_idx"),
+            # Finding published quotes whose pub_date was moved into the future by a bulk write.
+            models.Index(
+                fields=["pub_date"],
+                condition=models.Q(published=True, pub_date__isnull=False),
+                name="quote_dated_published_idx",
+            ),
+        ]
 
     def __str__(self):  # no cov
         return f"{self.source.name}: {self.quote}"
 
+    def save(self, *args, **kwargs):
+        """Save and update the published flag from the pub_date. The usage counter is left alone when updating
+        an existing quote, so that an instance loaded before a random retrieval cannot overwrite the new count."""
+        self.published = self.pub_date is None or self.pub_date <= timezone.now()
+        super().save(*args, **kwargs)
+
     @property
     def quote_rendered(self) -> str:
         """Return the markdown rendered version of the quote."""
@@ -567,6 +1133,33 @@ class Quote(AbstractOwnerModel, RulesModelMixin, TimeStampedModel, metaclass=Rul
         return markdown(self.quote)
 
 
+class LazyStatsDescriptor(ReverseOneToOneDescriptor):
+    """
+    The `stats` accessor of a group, source, or quote. Stats rows are only created by the first write to them, so
+    until then it returns an unsaved stats object whose counters are zero, instead of raising `DoesNotExist`.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        try:
+            return super().__get__(instance, cls)
+        except self.RelatedObjectDoesNotExist:
+            # Set the id rather than the instance, which would cache these unsaved stats on it for good.
+            return self.related.related_model(**{self.related.field.attname: instance.pk})
+
+
+class StatsOneToOneField(models.OneToOneField):
+    """A one to one field from a stats model to its owner, whose `stats` accessor never raises `DoesNotExist`."""
+
+    related_accessor_class = LazyStatsDescriptor
+
+    def deconstruct(self):
+        # Migrations see a plain one to one field, the accessor makes no difference to the schema.
+        name, _, args, kwargs = super().deconstruct()
+        return name, "django.db.models.OneToOneField", args, kwargs
+
+
 class QuoteStats(TimeStampedModel):
     """
     A simple object used to track how often an individual quote is used.
@@ -574,12 +1167,13 @@ class QuoteStats(TimeStampedModel):
     Attributes:
         id (int): The database primary key of this object.
         quote (Quote): The quote this stat relates to.
-        times_used (int): The number of times this has been used by an service such as random quote.
+        times_used (int): The number of times this has been used by an service such as random quote. A mirror
+            of `Quote.times_used`, which is what random selection reads.
         created (datetime): When this was created.
         modified (datetime): When this was last modified.
     """
 
-    quote = models.OneToOneField(
+    quote = StatsOneToOneField(
         Quote,
         on_delete=models.CASCADE,
         related_name="stats",
@@ -591,17 +1185,18 @@ class QuoteStats(TimeStampedModel):
         return f"Stats for Quote {self.quote.id}"
 
 
-class GroupStats(TimeStampedModel):
+class AbstractStatsShard(models.Model):
     """
-    An object for using to track usage stats for ``CharacterGroup``.
+    One slice of the usage counters of a group or source. Writes are spread over several shards picked at random,
+    so that concurrent requests do not all wait on the lock of a single row.
 
     Attributes:
-        group (SourceGroup): The group this is collecting stats for.
-        quotes_requested (int): The number of times a quote from this object or its children has been requested.
-        quotes_generated (int): The number of times a markov quote has been generated for this or it's children.
+        shard (int): The number of this shard for its group or source.
+        quotes_requested (int): The number of quotes requested that were counted in this shard.
+        quotes_generated (int): The number of markov sentences generated that were counted in this shard.
     """
 
-    group = models.OneToOneField(SourceGroup, related_name="stats", on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField(help_text=_("Number of this shard."))
     quotes_requested = models.PositiveIntegerField(
         default=0, help_text=_("Number of time child quotes have been requested.")
     )
@@ -610,21 +1205,71 @@ class GroupStats(TimeStampedModel):
         help_text=_("Number of times markov generated quotes have been requested."),
     )
 
+    class Meta:
+        abstract = True
+
+
+class GroupStatsShard(AbstractStatsShard):
+    """
+    A shard of the usage counters for a ``SourceGroup``.
+
+    Attributes:
+        group (SourceGroup): The group this is counting for.
+    """
+
+    if TYPE_CHECKING:
+        group_id: int
+
+    group = models.ForeignKey(SourceGroup, related_name="stats_shards", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["group", "shard"], name="unique_group_stats_shard")]
+
     def __str__(self):  # no cov
-        return f"Stats for Group {self.group.name}"
+        return f"Stats shard {self.shard} for Group {self.group_id}"
 
 
-class SourceStats(TimeStampedModel):
+class SourceStatsShard(AbstractStatsShard):
     """
-    An object for using to track usage stats for ``Character``.
+    A shard of the usage counters for a ``Source``.
 
     Attributes:
-        source (Source): The source this is collecting stats for.
-        quotes_requested (int): The number of times a quote from this object or its children has been requested.
-        quotes_generated (int): The number of times a markov quote has been generated for this or it's children.
+        source (Source): The source this is counting for.
+    """
+
+    if TYPE_CHECKING:
+        source_id: int
+
+    source = models.ForeignKey(Source, related_name="stats_shards", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["source", "shard"], name="unique_source_stats_shard")]
+
+    def __str__(self):  # no cov
+        return f"Stats shard {self.shard} for Source {self.source_id}"
+
+
+class AbstractUsageBucket(models.Model):
+    """
+    The usage counters of a group or source for one hour or one day, starting at `start` in UTC. Like the stats,
+    the counters of each hour are spread over shards. Hourly buckets are compacted into daily buckets, with a
+    single shard, by the `rollupusage` command.
+
+    Attributes:
+        start (datetime): The start of the hour or day counted.
+        period (str): Either "hour" or "day".
+        shard (int): The number of this shard for its group or source and period.
+        quotes_requested (int): The number of quotes requested that were counted in this bucket.
+        quotes_generated (int): The number of markov sentences generated that were counted in this bucket.
     """
 
-    source = models.OneToOneField(Source, related_name="stats", on_delete=models.CASCADE)
+    class Period(models.TextChoices):
+        HOUR = "hour", _("Hour")
+        DAY = "day", _("Day")
+
+    start = models.DateTimeField(help_text=_("Start of the period counted."))
+    period = models.CharField(max_length=4, choices=Period.choices, help_text=_("Length of the period counted."))
+    shard = models.PositiveSmallIntegerField(default=0, help_text=_("Number of this shard."))
     quotes_requested = models.PositiveIntegerField(
         default=0, help_text=_("Number of time child quotes have been requested.")
     )
@@ -633,5 +1278,179 @@ class SourceStats(TimeStampedModel):
         help_text=_("Number of times markov generated quotes have been requested."),
     )
 
+    class Meta:
+        abstract = True
+
+
+class GroupUsageBucket(AbstractUsageBucket):
+    """
+    The usage counters of a ``SourceGroup`` for one hour or day.
+
+    Attributes:
+        group (SourceGroup): The group this is counting for.
+    """
+
+    if TYPE_CHECKING:
+        group_id: int
+
+    group = models.ForeignKey(SourceGroup, related_name="usage_buckets", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group", "start", "period", "shard"], name="unique_group_usage_bucket")
+        ]
+
+    def __str__(self):  # no cov
+        return f"Usage for Group {self.group_id} for the {self.period} starting {self.start}"
+
+
+class SourceUsageBucket(AbstractUsageBucket):
+    """
+    The usage counters of a ``Source`` for one hour or day.
+
+    Attributes:
+        source (Source): The source this is counting for.
+    """
+
+    if TYPE_CHECKING:
+        source_id: int
+
+    source = models.ForeignKey(Source, related_name="usage_buckets", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "start", "period", "shard"], name="unique_source_usage_bucket")
+        ]
+
+    def __str__(self):  # no cov
+        return f"Usage for Source {self.source_id} for the {self.period} starting {self.start}"
+
+
+def get_usage_series(
+    buckets: QuerySet, period: str = "day", since: datetime | None = None, until: datetime | None = None
+) -> list[dict[str, Any]]:
+    """
+    Sum usage buckets into a series of hours or days. Reads a single range of the unique index of the buckets.
+    Hours that have already been rolled up into days are reported at the start of their day.
+
+    Args:
+        buckets (QuerySet): The usage buckets of a group or source.
+        period (str): Either "hour" or "day".
+        since (datetime | None): Start of the series. Defaults to 48 hours or 30 days ago.
+        until (datetime | None): End of the series, exclusive. Defaults to now.
+
+    Returns:
+        (list[dict[str, Any]]): The `start`, `quotes_requested`, and `quotes_generated` of each hour or day
+            with any usage, in order.
+    """
+    if period not in AbstractUsageBucket.Period.values:
+        msg = f"Usage series period must be one of {AbstractUsageBucket.Period.values}, not '{period}'."
+        raise ValueError(msg)
+    until = until or timezone.now()
+    since = since or until - (timedelta(hours=48) if period == AbstractUsageBucket.Period.HOUR else timedelta(days=30))
+    rows = (
+        buckets.filter(start__gte=since, start__lt=until)
+        .annotate(bucket_start=Trunc("start", period, tzinfo=UTC))
+        .values("bucket_start")
+        .annotate(requested=Sum("quotes_requested"), generated=Sum("quotes_generated"))
+        .order_by("bucket_start")
+    )
+    return [
+        {"start": row["bucket_start"], "quotes_requested": row["requested"], "quotes_generated": row["generated"]}
+        for row in rows
+    ]
+
+
+def _get_stats_cache_timeout() -> int:
+    """Get the number of seconds summed stats shards are cached for from settings or return a default."""
+    timeout = getattr(settings, "STATS_CACHE_TIMEOUT", 0)
+    if not isinstance(timeout, int):  # no cov
+        return 0
+    return timeout
+
+
+class AbstractShardedStats(TimeStampedModel):
+    """
+    Usage stats whose counters are the sum of their shards. The sums are computed with a single query the first
+    time a counter is read and cached on the instance until `refresh_from_db`. If `STATS_CACHE_TIMEOUT` is set,
+    they are also shared between instances via the cache for that many seconds, and may lag behind the writes.
+    """
+
+    shard_model: type[AbstractStatsShard]
+    owner_field: str
+    _totals: dict[str, int] | None = None
+
+    class Meta:
+        abstract = True
+
+    def refresh_from_db(self, *args, **kwargs):
+        """Refresh and discard the cached counter sums."""
+        super().refresh_from_db(*args, **kwargs)
+        self._totals = None
+
+    def _get_totals(self) -> dict[str, int]:
+        """Sum the counters of the shards, or get the cached sums."""
+        if self._totals is None:
+            owner_id = getattr(self, f"{self.owner_field}_id")
+            key = f"{STATS_CACHE_PREFIX}:{self.owner_field}:{owner_id}"
+            timeout = _get_stats_cache_timeout()
+            totals: dict[str, int] | None = get_selection_cache().get(key) if timeout > 0 else None
+            if totals is None:
+                totals = self.shard_model.objects.filter(**{f"{self.owner_field}_id": owner_id}).aggregate(
+                    quotes_requested=Coalesce(Sum("quotes_requested"), 0),
+                    quotes_generated=Coalesce(Sum("quotes_generated"), 0),
+                )
+                if timeout > 0:
+                    get_selection_cache().set(key, totals, timeout)
+            self._totals = totals
+        return self._totals
+
+    @property
+    def quotes_requested(self) -> int:
+        """The number of times a quote from this object or its children has been requested."""
+        return self._get_totals()["quotes_requested"]
+
+    @property
+    def quotes_generated(self) -> int:
+        """The number of times a markov quote has been generated for this or its children."""
+        return self._get_totals()["quotes_generated"]
+
+
+class GroupStats(AbstractShardedStats):
+    """
+    An object for using to track usage stats for ``CharacterGroup``. The counters are summed from the
+    ``GroupStatsShard`` objects of the group.
+
+    Attributes:
+        group (SourceGroup): The group this is collecting stats for.
+        quotes_requested (int): The number of times a quote from this object or its children has been requested.
+        quotes_generated (int): The number of times a markov quote has been generated for this or it's children.
+    """
+
+    shard_model = GroupStatsShard
+    owner_field = "group"
+
+    group = StatsOneToOneField(SourceGroup, related_name="stats", on_delete=models.CASCADE)
+
+    def __str__(self):  # no cov
+        return f"Stats for Group {self.group.name}"
+
+
+class SourceStats(AbstractShardedStats):
+    """
+    An object for using to track usage stats for ``Character``. The counters are summed from the
+    ``SourceStatsShard`` objects of the source.
+
+    Attributes:
+        source (Source): The source this is collecting stats for.
+        quotes_requested (int): The number of times a quote from this object or its children has been requested.
+        quotes_generated (int): The number of times a markov quote has been generated for this or it's children.
+    """
+
+    shard_model = SourceStatsShard
+    owner_field = "source"
+
+    source = StatsOneToOneField(Source, related_name="stats", on_delete=models.CASCADE)
+
     def __str__(self):  # no cov
         return f"Stats for Source {self.source.name}"
@@ -5,22 +5,23 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
-from django.db.models import F
-from django.db.models.signals import post_save, pre_delete, pre_save
+from collections import Counter
+from typing import Any
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from loguru import logger
 
 from django_markov.models import MarkovTextModel, sentence_generated
-from django_quotes.models import (
-    GroupStats,
-    Quote,
-    QuoteStats,
-    Source,
-    SourceGroup,
-    SourceStats,
-)
-from django_quotes.signals import quote_random_retrieved
+from django_quotes.dispatch import dispatch
+from django_quotes.leaderboards import invalidate_leaderboards
+from django_quotes.models import Quote, Source, SourceGroup, mark_markov_models_dirty
+from django_quotes.sampling import invalidate_pool
+from django_quotes.sentences import invalidate_sentence_pool
+from django_quotes.signals import markov_sentences_generated, quote_random_retrieved, quotes_random_retrieved
+from django_quotes.stats import write_generation_counts
+from django_quotes.tasks import record_retrieval_stats, update_markov_models_for_quote, update_markov_models_for_source
 
 
 @receiver(pre_save, sender=SourceGroup)
@@ -33,81 +34,181 @@ def initialize_markov_object(sender, instance, *args, **kwargs):
         instance.text_model = MarkovTextModel.objects.create()
 
 
-@receiver(post_save, sender=SourceGroup)
-@receiver(post_save, sender=Source)
 @receiver(post_save, sender=Quote)
-def initialize_grouping_stat_object(sender, instance, created, *args, **kwargs):
+@receiver(post_delete, sender=Quote)
+def invalidate_random_quote_pools(sender, instance, *args, **kwargs):
+    """
+    Discard the cached random quote pools and leaderboards for the quote's source and group so that they are
+    rebuilt with the change.
+    """
+    if isinstance(kwargs.get("origin"), Source | SourceGroup):
+        # Cascading delete, the pools are discarded once for the deleted source instead.
+        return
+    invalidate_pool("source", instance.source_id)
+    invalidate_pool("group", instance.source.group_id)
+    invalidate_leaderboards("source", instance.source_id)
+    invalidate_leaderboards("group", instance.source.group_id)
+
+
+@receiver(post_save, sender=Quote)
+@receiver(post_delete, sender=Quote)
+def mark_markov_models_dirty_for_quote(sender, instance, *args, **kwargs):
+    """
+    Flag the markov models of the quote's source and group as needing a rebuild, including when the quote is
+    deleted or its pub_date moves, which leave the modified times of the remaining quotes alone.
+    """
+    if kwargs.get("raw") or isinstance(kwargs.get("origin"), Source | SourceGroup):
+        # Loading fixtures, or a cascading delete, in which case the group is flagged for the deleted source.
+        return
+    if Quote.source.is_cached(instance) and not instance.source.allow_markov:
+        # Only the models of markov enabled sources are built, no need to query for it.
+        return
+    mark_markov_models_dirty(source_ids=[instance.source_id])
+
+
+@receiver(post_delete, sender=Source)
+def invalidate_random_quote_pools_for_source(sender, instance, *args, **kwargs):
     """
-    Creates the initial stat objects in the database.
+    Discard the cached random quote pools, leaderboards, and sentence pools for a deleted source and its group.
     """
-    if created:
-        if sender == SourceGroup:
-            GroupStats.objects.create(group=instance)
-        elif sender == Source:
-            SourceStats.objects.create(source=instance)
-        elif sender == Quote:
-            QuoteStats.objects.create(quote=instance)
+    invalidate_pool("source", instance.pk)
+    invalidate_pool("group", instance.group_id)
+    invalidate_leaderboards("source", instance.pk)
+    invalidate_leaderboards("group", instance.group_id)
+    invalidate_sentence_pool("source", instance.pk)
+    invalidate_sentence_pool("group", instance.group_id)
+    if instance.allow_markov:
+        mark_markov_models_dirty(group_ids=[instance.group_id])
 
 
 @receiver(quote_random_retrieved, sender=Source)
 def update_stats_for_quote_character(sender, instance, quote_retrieved, *args, **kwargs):
     """
-    Update the stats for the source, source group, and quote for a random retrieval.
+    Update the stats for the source, source group, and quote for a random retrieval. See `django_quotes.stats`
+    for how the increments can be buffered.
     :param sender: Usually a source or sourcegroup class.
     :param instance: The source this was generated for.
     :param quote_retrieved: The quote that was returned.
     :return: None
     """
-    group_stats = instance.group.stats
-    character_stats = instance.stats
-    quote_stats = quote_retrieved.stats
-    with transaction.atomic():
-        group_stats.quotes_requested = F("quotes_requested") + 1
-        group_stats.save()
-        character_stats.quotes_requested = F("quotes_requested") + 1
-        character_stats.save()
-        quote_stats.times_used = F("times_used") + 1
-        quote_stats.save()
+    dispatch(record_retrieval_stats, [[instance.group_id, 1]], [[instance.pk, 1]], [[quote_retrieved.pk, 1]])
+
+
+@receiver(quotes_random_retrieved, sender=Source)
+@receiver(quotes_random_retrieved, sender=SourceGroup)
+def update_stats_for_quote_batch(sender, instance, quotes_retrieved, *args, **kwargs):
+    """
+    Update the stats for the group, sources, and quotes of a batch of random quotes, issuing a single
+    UPDATE per stats table.
+    :param sender: The Source or SourceGroup class.
+    :param instance: The source or group the batch was requested from.
+    :param quotes_retrieved: The list of quotes that were returned.
+    :return: None
+    """
+    group_id = instance.pk if isinstance(instance, SourceGroup) else instance.group_id
+    dispatch(
+        record_retrieval_stats,
+        [[group_id, len(quotes_retrieved)]],
+        [list(pair) for pair in Counter(quote.source_id for quote in quotes_retrieved).items()],
+        [list(pair) for pair in Counter(quote.pk for quote in quotes_retrieved).items()],
+    )
+
+
+def _get_text_model_owner(text_model: MarkovTextModel) -> tuple[int, int | None] | None:
+    """
+    Get the ids of the group and source a text model belongs to. The source or group that generated the
+    sentence is already cached on its text model, so this only queries for text models used directly.
+    :param text_model: The text model that generated a sentence.
+    :return: A tuple of the group id and the source id, if any, or None if the text model is orphaned.
+    """
+    # Reverse one-to-one relations are cached under their accessor name, which defaults to the model name.
+    fields_cache: dict[str, Any] = text_model._state.fields_cache  # type: ignore
+    source = fields_cache.get("source")
+    if source is not None:
+        return source.group_id, source.pk
+    group = fields_cache.get("sourcegroup")
+    if group is not None:
+        return group.pk, None
+    source_ids = Source.objects.filter(text_model=text_model).values_list("group_id", "pk").first()
+    if source_ids is not None:
+        return source_ids
+    group_id = SourceGroup.objects.filter(text_model=text_model).values_list("pk", flat=True).first()
+    if group_id is not None:
+        return group_id, None
+    return None  # no cov
 
 
 @receiver(sentence_generated, sender=MarkovTextModel)
 def update_stats_for_markov(sender, instance, char_limit, sentence, *args, **kwargs):
     """
     For a given source, update the stats on the Source and SourceGroup for markov requests.
-    :param sender: The requesting class, usually Source.
-    :param instance: The specific source requested.
+    :param sender: MarkovTextModel.
+    :param instance: The text model that generated the sentence.
     :param char_limit: The character limit used when generating the sentence.
     :param sentence: The sentence that was generated.
     :return: None
     """
-    try:
-        source = Source.objects.get(text_model__pk=instance.pk)
-        group = source.group
-    except ObjectDoesNotExist:
-        # this is a group model
-        source = None
-        group = SourceGroup.objects.get(text_model__pk=instance.pk)
-    group_stats = group.stats
-    source_stats = source.stats if source else None
-    with transaction.atomic():
-        group_stats.quotes_generated = F("quotes_generated") + 1
-        group_stats.save()
-        if source_stats is not None:
-            source_stats.quotes_generated = F("quotes_generated") + 1
-            source_stats.save()
+    owner = _get_text_model_owner(instance)
+    if owner is None:  # no cov
+        logger.warning(f"Generated a sentence from text model {instance.pk}, which has no source or group.")
+        return
+    dispatch(write_generation_counts, *owner)
+
+
+@receiver(markov_sentences_generated, sender=Source)
+@receiver(markov_sentences_generated, sender=SourceGroup)
+def update_stats_for_markov_batch(sender, instance, sentences, *args, **kwargs):
+    """
+    Update the stats on the Source and SourceGroup for a batch of markov sentences, issuing a single
+    UPDATE per stats table.
+    :param sender: The Source or SourceGroup class.
+    :param instance: The source or group the batch was generated for.
+    :param sentences: The list of sentences that were returned.
+    :return: None
+    """
+    if isinstance(instance, SourceGroup):
+        dispatch(write_generation_counts, instance.pk, None, len(sentences))
+    else:
+        dispatch(write_generation_counts, instance.group_id, instance.pk, len(sentences))
 
 
 @receiver(pre_save, sender=Source)
 def update_markov_model_for_character_enabling_markov(sender, instance, *args, **kwargs):
     """
-    When updating a source to allow_markov, trigger markov model updates.
+    When updating a source to allow_markov, flag it so that its markov models are updated once it is saved. When it
+    stops allowing markov, flag it so that its group's model is marked dirty once it is saved.
+    """
+    if instance.id:
+        allowed_markov = Source.objects.filter(id=instance.id).values_list("allow_markov", flat=True).first()
+        if instance.allow_markov and allowed_markov is False:
+            instance._enabled_markov = True
+        elif not instance.allow_markov and allowed_markov:
+            instance._disabled_markov = True
+
+
+@receiver(post_save, sender=Source)
+def dispatch_markov_model_update_for_source(sender, instance, *args, **kwargs):
+    """
+    Once a source that was changed to allow_markov is saved, mark its markov models dirty and dispatch their update.
+    If it does not allow markov sentences, discard its pre-generated ones, and mark its group's model dirty if it
+    just stopped allowing them.
+    """
+    if instance.__dict__.pop("_enabled_markov", False):
+        mark_markov_models_dirty(source_ids=[instance.pk])
+        dispatch(update_markov_models_for_source, instance.pk)
+    elif not instance.allow_markov:
+        invalidate_sentence_pool("source", instance.pk)
+        if instance.__dict__.pop("_disabled_markov", False):
+            mark_markov_models_dirty(group_ids=[instance.group_id])
+
+
+@receiver(post_save, sender=Quote)
+def dispatch_markov_model_update_for_quote(sender, instance, *args, **kwargs):
+    """
+    If `UPDATE_MARKOV_ON_QUOTE_SAVE` is enabled, dispatch the update of the markov models of a saved quote.
     """
-    if instance.id and instance.allow_markov:
-        old_version = Source.objects.get(id=instance.id)
-        if not old_version.allow_markov:
-            instance.update_markov_model()
-            instance.text_model.refresh_from_db()
-            instance.group.update_markov_model(additional_model=instance.text_model)
+    if not kwargs.get("raw") and getattr(settings, "UPDATE_MARKOV_ON_QUOTE_SAVE", False):
+        dispatch(update_markov_models_for_quote, instance.pk)
 
 
 @receiver(pre_delete, sender=Source)
@@ -0,0 +1,612 @@
+#
+# sampling.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Cached candidate pools used for random quote selection.
+
+Rather than sorting a source's quotes by usage and loading them on every request, a small window of the
+least used quote ids is kept in the Django cache alongside their usage counts. Picking a quote is then a
+cache read plus a single primary key fetch. Each pick bumps the usage count held in the pool, and once a
+quote has been used more often than the least used quote outside the window it drops out of the pool. When
+the pool runs dry, expires, or is invalidated because the underlying quotes changed or were published, it is
+rebuilt from the database with a single `values_list` query.
+
+Concurrent requests may occasionally read the same pool before either writes it back. That only makes the
+"least used first" bias approximate; the stats themselves are still recorded by the receivers.
+
+Setting `RANDOM_QUOTE_SELECTION_MODE` to `"shuffle"` switches to a shuffle bag instead. Every eligible quote
+id is shuffled into a deck stored in the cache, and each pick takes the next id from it using an atomic
+`incr` on a shared cursor, so every quote is served once before any is repeated, even across web workers.
+The deck is reshuffled from the database once it has been dealt out.
+
+Setting it to `"weighted"` draws quotes from every eligible quote of the source or group with a probability
+proportional to `1 / (1 + times_used)`, using a Walker/Vose alias table stored in the cache, so a draw is two
+random numbers and two list lookups regardless of how many quotes there are. Picks are counted with an atomic
+`incr`, and once they exceed `RANDOM_QUOTE_WEIGHT_DRIFT` times the number of quotes, the usage counts have
+drifted enough that the table is rebuilt from the current `Quote.times_used` values. The table is rebuilt
+in full rather than updated in place, since changing one weight changes how the columns are paired up. With
+`BUFFER_QUOTE_STATS`, the counts it is rebuilt from lag behind by the retrievals still waiting in the stats
+buffers of each process, at most `QUOTE_STATS_FLUSH_INTERVAL` seconds' worth, which only makes the weights
+slightly stale.
+
+Every entry point has an `a`-prefixed twin (`apick_quote_ids`, `ainvalidate_pool`, ...) that goes through the
+async cache and ORM interfaces instead, for use from async views.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from loguru import logger
+
+if TYPE_CHECKING:
+    from django.db.models.query import ValuesQuerySet
+
+POOL_CACHE_PREFIX = "django_quotes:pool"
+DECK_CACHE_PREFIX = "django_quotes:deck"
+ALIAS_CACHE_PREFIX = "django_quotes:alias"
+SELECTION_MODES = ["least_used", "shuffle", "weighted"]
+
+
+def get_selection_cache() -> BaseCache:
+    """Get the cache configured for random quote selection and other short lived data, or the default cache.
+
+    Returns:
+        (BaseCache): The cache named by `RANDOM_QUOTE_CACHE_ALIAS`.
+    """
+    return caches[getattr(settings, "RANDOM_QUOTE_CACHE_ALIAS", "default")]
+
+
+def _get_pool_timeout() -> int:
+    """Get the maximum number of seconds a pool may live in the cache from settings or return a default."""
+    timeout = getattr(settings, "RANDOM_QUOTE_POOL_TIMEOUT", 300)
+    if not isinstance(timeout, int):  # no cov
+        return 300
+    return timeout
+
+
+def _get_selection_mode() -> str:
+    """Get the random quote selection mode from settings or return the default."""
+    mode = getattr(settings, "RANDOM_QUOTE_SELECTION_MODE", "least_used")
+    if mode not in SELECTION_MODES:  # no cov
+        logger.warning(f"Unknown RANDOM_QUOTE_SELECTION_MODE '{mode}', using 'least_used'.")
+        return "least_used"
+    return mode
+
+
+def _get_weight_drift() -> float:
+    """Get the share of picks, relative to the number of quotes, after which an alias table is rebuilt."""
+    drift = getattr(settings, "RANDOM_QUOTE_WEIGHT_DRIFT", 0.1)
+    if not isinstance(drift, int | float) or drift <= 0:  # no cov
+        return 0.1
+    return drift
+
+
+def _get_expiry(now: datetime) -> datetime:
+    """Get when a pool or deck built now should be discarded."""
+    return now + timedelta(seconds=_get_pool_timeout())
+
+
+def _get_timeout(expires: datetime, now: datetime) -> int:
+    """Convert an expiry into a cache timeout in seconds."""
+    return max(int((expires - now).total_seconds()), 1)
+
+
+def pool_cache_key(scope: str, pk: int) -> str:
+    """Get the cache key for the pool of a given object.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+
+    Returns:
+        (str): The cache key.
+    """
+    return f"{POOL_CACHE_PREFIX}:{scope}:{pk}"
+
+
+def deck_cache_keys(scope: str, pk: int) -> tuple[str, str]:
+    """Get the cache keys for the shuffled deck of a given object, and the cursor into it.
+
+    Args:
+        scope (str): The kind of object owning the deck, e.g. "source".
+        pk (int): The primary key of the object.
+
+    Returns:
+        (tuple[str, str]): The deck and cursor cache keys.
+    """
+    return f"{DECK_CACHE_PREFIX}:{scope}:{pk}", f"{DECK_CACHE_PREFIX}:{scope}:{pk}:cursor"
+
+
+def alias_cache_keys(scope: str, pk: int) -> tuple[str, str]:
+    """Get the cache keys for the weighted alias table of a given object, and the count of picks made from it.
+
+    Args:
+        scope (str): The kind of object owning the table, e.g. "source".
+        pk (int): The primary key of the object.
+
+    Returns:
+        (tuple[str, str]): The table and pick counter cache keys.
+    """
+    return f"{ALIAS_CACHE_PREFIX}:{scope}:{pk}", f"{ALIAS_CACHE_PREFIX}:{scope}:{pk}:picks"
+
+
+def _all_cache_keys(scope: str, pk: int) -> list[str]:
+    """Get every cache key holding selection state for an object."""
+    return [pool_cache_key(scope, pk), *deck_cache_keys(scope, pk), *alias_cache_keys(scope, pk)]
+
+
+def invalidate_pool(scope: str, pk: int) -> None:
+    """Discard the cached pool, deck, and alias table for an object so that they are rebuilt on the next pick.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+    """
+    get_selection_cache().delete_many(_all_cache_keys(scope, pk))
+
+
+async def ainvalidate_pool(scope: str, pk: int) -> None:
+    """Async version of `invalidate_pool`.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+    """
+    await get_selection_cache().adelete_many(_all_cache_keys(scope, pk))
+
+
+def _pool_rows(queryset: QuerySet, window: int | None) -> ValuesQuerySet:
+    """Get the query for the `(quote_id, times_used)` rows of a pool, least used first."""
+    published = queryset.filter(published=True).order_by("times_used")
+    if window is not None:
+        published = published[: window + 1]
+    return published.values_list("pk", "times_used")
+
+
+def _pool_from_rows(rows: Iterable[tuple[int, int]], window: int | None, now: datetime) -> dict[str, Any]:
+    """Assemble a pool out of the rows fetched by `_pool_rows`."""
+    entries = [[quote_id, times_used] for quote_id, times_used in rows]
+    ceiling = None
+    if window is not None and len(entries) > window:
+        # The first quote outside the window tells us when a quote inside it stops being among the least used.
+        ceiling = entries.pop()[1]
+    return {"entries": entries, "ceiling": ceiling, "window": window, "expires": _get_expiry(now)}
+
+
+def _deck_from_ids(ids: list[int], now: datetime) -> dict[str, Any]:
+    """Shuffle quote ids into a deck."""
+    random.shuffle(ids)
+    return {"ids": ids, "expires": _get_expiry(now)}
+
+
+def _start_deck(deck: dict[str, Any], tail: list[int], count: int) -> int:
+    """
+    Move the ids dealt from the end of the previous deck to the back of a new deck, so that the rest of the deal
+    is made up of other quotes, and get the cursor after the ids dealt from the new deck.
+    """
+    dealt = set(tail)
+    fresh = [quote_id for quote_id in deck["ids"] if quote_id not in dealt]
+    deck["ids"] = fresh + [quote_id for quote_id in deck["ids"] if quote_id in dealt]
+    return min(count - len(tail), len(fresh))
+
+
+def _pool_is_stale(pool: dict[str, Any] | None, window: int | None, count: int, now: datetime) -> bool:
+    """Check whether a cached pool has to be rebuilt before picking `count` quotes from it."""
+    return (
+        pool is None
+        or pool["window"] != window
+        or pool["expires"] <= now
+        or (len(pool["entries"]) < count and (pool["ceiling"] is not None or not pool["entries"]))
+    )
+
+
+def _take_from_pool(pool: dict[str, Any], count: int) -> list[int]:
+    """Pick quote ids from a pool, bumping their usage and dropping those that are no longer least used."""
+    entries = pool["entries"]
+    picked = random.sample(range(len(entries)), min(count, len(entries)))
+    quote_ids = [entries[index][0] for index in picked]
+    for index in sorted(picked, reverse=True):
+        times_used = entries[index][1] + 1
+        if pool["ceiling"] is not None and times_used > pool["ceiling"]:
+            del entries[index]
+        else:
+            entries[index][1] = times_used
+    return quote_ids
+
+
+def _alias_table_rows(queryset: QuerySet) -> ValuesQuerySet:
+    """Get the query for the `(quote_id, times_used)` rows of an alias table."""
+    return queryset.filter(published=True).values_list("pk", "times_used")
+
+
+def make_alias_table(weights: list[float]) -> tuple[list[float], list[int]]:
+    """Build the probability and alias columns of a Walker/Vose alias table for the given weights.
+
+    Args:
+        weights (list[float]): The positive weight of each outcome.
+
+    Returns:
+        (tuple[list[float], list[int]]): The probability of keeping each column's own outcome, and the outcome
+            to use instead otherwise.
+    """
+    count = len(weights)
+    total = sum(weights)
+    scaled = [weight * count / total for weight in weights]
+    prob = [1.0] * count
+    alias = list(range(count))
+    small = [index for index, value in enumerate(scaled) if value < 1]
+    large = [index for index, value in enumerate(scaled) if value >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1
+        (small if scaled[more] < 1 else large).append(more)
+    # Anything left over is only there because of rounding errors, and keeps its own outcome.
+    return prob, alias
+
+
+def _table_from_rows(rows: Iterable[tuple[int, int]], now: datetime) -> dict[str, Any]:
+    """Assemble a weighted alias table out of the rows fetched by `_alias_table_rows`."""
+    ids = []
+    weights = []
+    for quote_id, times_used in rows:
+        ids.append(quote_id)
+        weights.append(1 / (1 + times_used))
+    prob, alias = make_alias_table(weights) if ids else ([], [])
+    return {"ids": ids, "prob": prob, "alias": alias, "expires": _get_expiry(now)}
+
+
+def _draw_from_table(table: dict[str, Any], count: int) -> list[int]:
+    """Draw distinct quote ids from an alias table."""
+    ids = table["ids"]
+    if count >= len(ids):
+        drawn = list(ids)
+        random.shuffle(drawn)
+        return drawn
+    prob, alias = table["prob"], table["alias"]
+    picked: dict[int, None] = {}
+    for _ in range(count * 10):
+        column = random.randrange(len(ids))  # noqa: S311
+        picked[column if random.random() < prob[column] else alias[column]] = None  # noqa: S311
+        if len(picked) == count:
+            break
+    else:  # no cov
+        # A few heavily weighted quotes keep coming up, top the batch up uniformly from the rest.
+        remaining = [index for index in range(len(ids)) if index not in picked]
+        picked.update(dict.fromkeys(random.sample(remaining, count - len(picked))))
+    return [ids[index] for index in picked]
+
+
+def _table_is_stale(table: dict[str, Any] | None, picks: int | None, now: datetime) -> bool:
+    """Check whether a cached alias table expired, or has been picked from often enough to have drifted."""
+    return (
+        table is None
+        or picks is None
+        or table["expires"] <= now
+        or picks > max(1, int(len(table["ids"]) * _get_weight_drift()))
+    )
+
+
+def build_pool(queryset: QuerySet, window: int | None) -> dict[str, Any]:
+    """Build a new candidate pool out of the published quotes in the queryset.
+
+    Args:
+        queryset (QuerySet[Quote]): The quotes eligible for selection.
+        window (int | None): The maximum number of least used quotes to keep in the pool. None for all of them.
+
+    Returns:
+        (dict[str, Any]): The pool, containing the `entries` as `[quote_id, times_used]` pairs, the `ceiling`
+            usage count after which an entry leaves the pool (None if every eligible quote is in the pool),
+            the `window` used to build it, and when it `expires`.
+    """
+    now = timezone.now()
+    return _pool_from_rows(_pool_rows(queryset, window), window, now)
+
+
+async def abuild_pool(queryset: QuerySet, window: int | None) -> dict[str, Any]:
+    """Async version of `build_pool`.
+
+    Args:
+        queryset (QuerySet[Quote]): The quotes eligible for selection.
+        window (int | None): The maximum number of least used quotes to keep in the pool. None for all of them.
+
+    Returns:
+        (dict[str, Any]): The pool.
+    """
+    now = timezone.now()
+    return _pool_from_rows([row async for row in _pool_rows(queryset, window)], window, now)
+
+
+def build_deck(queryset: QuerySet) -> dict[str, Any]:
+    """Shuffle the ids of the published quotes in the queryset into a new deck.
+
+    Args:
+        queryset (QuerySet[Quote]): The quotes eligible for selection.
+
+    Returns:
+        (dict[str, Any]): The deck, containing the shuffled quote `ids` and when it `expires`.
+    """
+    now = timezone.now()
+    return _deck_from_ids(list(queryset.filter(published=True).values_list("pk", flat=True)), now)
+
+
+async def abuild_deck(queryset: QuerySet) -> dict[str, Any]:
+    """Async version of `build_deck`.
+
+    Args:
+        queryset (QuerySet[Quote]): The quotes eligible for selection.
+
+    Returns:
+        (dict[str, Any]): The deck.
+    """
+    now = timezone.now()
+    return _deck_from_ids([pk async for pk in queryset.filter(published=True).values_list("pk", flat=True)], now)
+
+
+def deal_quote_ids(scope: str, pk: int, queryset: QuerySet, count: int = 1) -> list[int]:
+    """Deal the next quote ids from the shuffled deck of an object, reshuffling it once it runs out.
+
+    Args:
+        scope (str): The kind of object owning the deck, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the deck needs to be built.
+        count (int): The number of distinct quotes to deal. If the deck does not have that many ids left, the
+            rest of it is dealt and the deal is completed from a reshuffled deck.
+
+    Returns:
+        (list[int]): The ids of the dealt quotes. Empty if there are no eligible quotes.
+    """
+    cache = get_selection_cache()
+    deck_key, cursor_key = deck_cache_keys(scope, pk)
+    now = timezone.now()
+    deck: dict[str, Any] | None = cache.get(deck_key)
+    end = None
+    if deck is not None and deck["expires"] > now:
+        try:
+            end = cache.incr(cursor_key, count)
+        except ValueError:
+            # The cursor was evicted, start dealing from a fresh deck.
+            pass
+    if deck is None or end is None or end > len(deck["ids"]):
+        tail = deck["ids"][end - count :] if deck is not None and end is not None else []
+        logger.debug(f"Shuffling random quote deck for {scope} {pk}.")
+        deck = build_deck(queryset)
+        end = _start_deck(deck, tail, count)
+        timeout = _get_timeout(deck["expires"], now)
+        cache.set(deck_key, deck, timeout)
+        cache.set(cursor_key, end, timeout)
+        return tail + deck["ids"][:end]
+    return deck["ids"][end - count : end]
+
+
+async def adeal_quote_ids(scope: str, pk: int, queryset: QuerySet, count: int = 1) -> list[int]:
+    """Async version of `deal_quote_ids`.
+
+    Args:
+        scope (str): The kind of object owning the deck, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the deck needs to be built.
+        count (int): The number of distinct quotes to deal.
+
+    Returns:
+        (list[int]): The ids of the dealt quotes. Empty if there are no eligible quotes.
+    """
+    cache = get_selection_cache()
+    deck_key, cursor_key = deck_cache_keys(scope, pk)
+    now = timezone.now()
+    deck: dict[str, Any] | None = await cache.aget(deck_key)
+    end = None
+    if deck is not None and deck["expires"] > now:
+        try:
+            end = await cache.aincr(cursor_key, count)  # type: ignore
+        except ValueError:
+            pass
+    if deck is None or end is None or end > len(deck["ids"]):
+        tail = deck["ids"][end - count :] if deck is not None and end is not None else []
+        logger.debug(f"Shuffling random quote deck for {scope} {pk}.")
+        deck = await abuild_deck(queryset)
+        end = _start_deck(deck, tail, count)
+        timeout = _get_timeout(deck["expires"], now)
+        await cache.aset_many({deck_key: deck, cursor_key: end}, timeout)
+        return tail + deck["ids"][:end]
+    return deck["ids"][end - count : end]
+
+
+def build_alias_table(queryset: QuerySet) -> dict[str, Any]:
+    """Build a weighted alias table out of the published quotes in the queryset.
+
+    Args:
+        queryset (QuerySet[Quote]): The quotes eligible for selection.
+
+    Returns:
+        (dict[str, Any]): The table, containing the quote `ids`, the `prob` and `alias` columns, and when it
+            `expires`.
+    """
+    now = timezone.now()
+    return _table_from_rows(_alias_table_rows(queryset), now)
+
+
+async def abuild_alias_table(queryset: QuerySet) -> dict[str, Any]:
+    """Async version of `build_alias_table`.
+
+    Args:
+        queryset (QuerySet[Quote]): The quotes eligible for selection.
+
+    Returns:
+        (dict[str, Any]): The table.
+    """
+    now = timezone.now()
+    return _table_from_rows([row async for row in _alias_table_rows(queryset)], now)
+
+
+def draw_quote_ids(scope: str, pk: int, queryset: QuerySet, count: int = 1) -> list[int]:
+    """Draw distinct quote ids from an object's quotes, weighted towards the less used ones.
+
+    Args:
+        scope (str): The kind of object owning the table, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the table needs to be built.
+        count (int): The number of distinct quotes to draw.
+
+    Returns:
+        (list[int]): The ids of the drawn quotes. Empty if there are no eligible quotes.
+    """
+    cache = get_selection_cache()
+    table_key, picks_key = alias_cache_keys(scope, pk)
+    now = timezone.now()
+    table: dict[str, Any] | None = cache.get(table_key)
+    picks = None
+    if table is not None:
+        try:
+            picks = cache.incr(picks_key, count)
+        except ValueError:
+            pass
+    if _table_is_stale(table, picks, now):
+        logger.debug(f"Building weighted random quote table for {scope} {pk}.")
+        table = build_alias_table(queryset)
+        timeout = _get_timeout(table["expires"], now)
+        cache.set(table_key, table, timeout)
+        cache.set(picks_key, count, timeout)
+    return _draw_from_table(table, count)  # type: ignore
+
+
+async def adraw_quote_ids(scope: str, pk: int, queryset: QuerySet, count: int = 1) -> list[int]:
+    """Async version of `draw_quote_ids`.
+
+    Args:
+        scope (str): The kind of object owning the table, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the table needs to be built.
+        count (int): The number of distinct quotes to draw.
+
+    Returns:
+        (list[int]): The ids of the drawn quotes. Empty if there are no eligible quotes.
+    """
+    cache = get_selection_cache()
+    table_key, picks_key = alias_cache_keys(scope, pk)
+    now = timezone.now()
+    table: dict[str, Any] | None = await cache.aget(table_key)
+    picks = None
+    if table is not None:
+        try:
+            picks = await cache.aincr(picks_key, count)  # type: ignore
+        except ValueError:
+            pass
+    if _table_is_stale(table, picks, now):
+        logger.debug(f"Building weighted random quote table for {scope} {pk}.")
+        table = await abuild_alias_table(queryset)
+        timeout = _get_timeout(table["expires"], now)
+        await cache.aset_many({table_key: table, picks_key: count}, timeout)
+    return _draw_from_table(table, count)  # type: ignore
+
+
+def pick_quote_ids(scope: str, pk: int, queryset: QuerySet, window: int | None, count: int = 1) -> list[int]:
+    """Pick distinct quote ids at random from the least used quotes of an object, building its pool if required.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the pool needs to be built.
+        window (int | None): The maximum number of least used quotes to pick from. None for all of them.
+            Ignored when dealing from a shuffled deck or drawing from a weighted table.
+        count (int): The number of distinct quotes to pick. Fewer are returned if the window is smaller.
+
+    Returns:
+        (list[int]): The ids of the picked quotes, in the order they were picked. Empty if there are no
+            eligible quotes.
+    """
+    mode = _get_selection_mode()
+    if mode == "shuffle":
+        return deal_quote_ids(scope, pk, queryset, count)
+    if mode == "weighted":
+        return draw_quote_ids(scope, pk, queryset, count)
+    cache = get_selection_cache()
+    key = pool_cache_key(scope, pk)
+    pool: dict[str, Any] | None = cache.get(key)
+    now = timezone.now()
+    if _pool_is_stale(pool, window, count, now):
+        logger.debug(f"Building random quote pool for {scope} {pk}.")
+        pool = build_pool(queryset, window)
+    quote_ids = _take_from_pool(pool, count)  # type: ignore
+    cache.set(key, pool, _get_timeout(pool["expires"], now))  # type: ignore
+    return quote_ids
+
+
+async def apick_quote_ids(scope: str, pk: int, queryset: QuerySet, window: int | None, count: int = 1) -> list[int]:
+    """Async version of `pick_quote_ids`, using the async cache and ORM interfaces.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the pool needs to be built.
+        window (int | None): The maximum number of least used quotes to pick from. None for all of them.
+        count (int): The number of distinct quotes to pick.
+
+    Returns:
+        (list[int]): The ids of the picked quotes, in the order they were picked.
+    """
+    mode = _get_selection_mode()
+    if mode == "shuffle":
+        return await adeal_quote_ids(scope, pk, queryset, count)
+    if mode == "weighted":
+        return await adraw_quote_ids(scope, pk, queryset, count)
+    cache = get_selection_cache()
+    key = pool_cache_key(scope, pk)
+    pool: dict[str, Any] | None = await cache.aget(key)
+    now = timezone.now()
+    if _pool_is_stale(pool, window, count, now):
+        logger.debug(f"Building random quote pool for {scope} {pk}.")
+        pool = await abuild_pool(queryset, window)
+    quote_ids = _take_from_pool(pool, count)  # type: ignore
+    await cache.aset(key, pool, _get_timeout(pool["expires"], now))  # type: ignore
+    return quote_ids
+
+
+def pick_quote_id(scope: str, pk: int, queryset: QuerySet, window: int | None) -> int | None:
+    """Pick a quote id at random from the least used quotes of an object, building its pool if required.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the pool needs to be built.
+        window (int | None): The maximum number of least used quotes to pick from. None for all of them.
+
+    Returns:
+        (int | None): The id of the picked quote, or None if there are no eligible quotes.
+    """
+    quote_ids = pick_quote_ids(scope, pk, queryset, window)
+    if not quote_ids:
+        return None
+    return quote_ids[0]
+
+
+async def apick_quote_id(scope: str, pk: int, queryset: QuerySet, window: int | None) -> int | None:
+    """Async version of `pick_quote_id`.
+
+    Args:
+        scope (str): The kind of object owning the pool, e.g. "source".
+        pk (int): The primary key of the object.
+        queryset (QuerySet[Quote]): The quotes eligible for selection, used if the pool needs to be built.
+        window (int | None): The maximum number of least used quotes to pick from. None for all of them.
+
+    Returns:
+        (int | None): The id of the picked quote, or None if there are no eligible quotes.
+    """
+    quote_ids = await apick_quote_ids(scope, pk, queryset, window)
+    if not quote_ids:
+        return None
+    return quote_ids[0]
@@ -0,0 +1,206 @@
+#
+# sentences.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Pools of pre-generated markov sentences for sources and groups.
+
+Generating a markov sentence takes a varying number of tries, and sometimes fails altogether. When
+`MARKOV_SENTENCE_POOL_SIZE` is set, up to that many sentences per source and group are generated ahead of time
+and kept in the random quote selection cache. `Source.get_markov_sentence` and
+`SourceGroup.generate_markov_sentence` serve the next sentence from the pool, taking it with an atomic `incr` on
+a shared cursor like the shuffled quote deck (see `django_quotes.sampling`), so concurrent requests get
+different sentences. Once half of the pool is used up, or if it is empty, `fill_sentence_pool` is dispatched to
+the task backend (see `django_quotes.dispatch`) to generate a fresh pool, and requests fall back to generating
+sentences live until it is ready. The `fillsentencepools` management command fills the pools of every markov
+enabled source and group ahead of time. With the default "inline" task backend, the refill runs in the request
+that triggered it, which still serves a live sentence if the pool was empty.
+
+Sentences are generated with the character limit of the request that triggered the fill, and are only served to
+requests whose limit they fit in. The next sentence is checked before the cursor is moved, so a request with a
+lower limit leaves it for the next request instead of using it up. Served sentences send the
+`sentence_generated` signal, so they are counted in the stats like live ones. Pools expire after
+`MARKOV_SENTENCE_POOL_TIMEOUT` seconds, so they follow updates of the markov models.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from loguru import logger
+
+from django_markov.models import MarkovTextModel
+from django_quotes.dispatch import dispatch
+from django_quotes.markov import make_sentences
+from django_quotes.sampling import get_selection_cache
+
+SENTENCE_POOL_CACHE_PREFIX = "django_quotes:sentences"
+
+# Seconds until another refill may be dispatched, in case a refill is lost.
+REFILL_TIMEOUT = 60
+
+# The reverse lookups from a text model to the source or group that owns it.
+TEXT_MODEL_OWNER_LOOKUPS = {"source": "source__pk", "group": "sourcegroup__pk"}
+
+
+def get_sentence_pool_size() -> int:
+    """Get the number of sentences to pre-generate per source and group from settings. 0 disables the pools.
+
+    Returns:
+        (int): The pool size.
+    """
+    size = getattr(settings, "MARKOV_SENTENCE_POOL_SIZE", 0)
+    if not isinstance(size, int) or size < 0:  # no cov
+        return 0
+    return size
+
+
+def _get_sentence_pool_timeout() -> int:
+    """Get the number of seconds a sentence pool is kept for from settings or return a default."""
+    timeout = getattr(settings, "MARKOV_SENTENCE_POOL_TIMEOUT", 3600)
+    if not isinstance(timeout, int) or timeout < 1:  # no cov
+        return 3600
+    return timeout
+
+
+def sentence_pool_cache_keys(scope: str, pk: int) -> tuple[str, str, str]:
+    """Get the cache keys for the sentence pool of an object, the cursor into it, and its pending refill.
+
+    Args:
+        scope (str): The kind of object owning the pool, i.e. "source" or "group".
+        pk (int): The primary key of the object.
+
+    Returns:
+        (tuple[str, str, str]): The pool, cursor, and refill cache keys.
+    """
+    key = f"{SENTENCE_POOL_CACHE_PREFIX}:{scope}:{pk}"
+    return key, f"{key}:cursor", f"{key}:refill"
+
+
+def invalidate_sentence_pool(scope: str, pk: int) -> None:
+    """Discard the sentence pool of an object.
+
+    Args:
+        scope (str): The kind of object owning the pool, i.e. "source" or "group".
+        pk (int): The primary key of the object.
+    """
+    get_selection_cache().delete_many(list(sentence_pool_cache_keys(scope, pk)))
+
+
+def fill_sentence_pool(scope: str, pk: int, char_limit: int = 280, tries: int = 20) -> int:
+    """Generate a fresh sentence pool for a source or group from its markov model, replacing the current one.
+
+    Args:
+        scope (str): The kind of object owning the pool, i.e. "source" or "group".
+        pk (int): The primary key of the object.
+        char_limit (int): Maximum characters of the sentences. If zero, no limit.
+        tries (int): Number of tries per sentence in the pool, shared by the whole pool.
+
+    Returns:
+        (int): The number of sentences in the pool.
+    """
+    cache = get_selection_cache()
+    pool_key, cursor_key, refill_key = sentence_pool_cache_keys(scope, pk)
+    text_model = MarkovTextModel.objects.filter(**{TEXT_MODEL_OWNER_LOOKUPS[scope]: pk}).first()
+    size = get_sentence_pool_size()
+    sentences = make_sentences(text_model, size, char_limit, size * tries) if text_model else []
+    if sentences:
+        logger.debug(f"Filled the sentence pool of {scope} {pk} with {len(sentences)} sentences.")
+        timeout = _get_sentence_pool_timeout()
+        cache.set_many({pool_key: sentences, cursor_key: 0}, timeout)
+    cache.delete(refill_key)
+    return len(sentences)
+
+
+def _fits(pool: list[str] | None, cursor: int | None, char_limit: int) -> bool:
+    """Check whether there is a next sentence in the pool and it fits in the character limit, without taking it."""
+    if pool is None or cursor is None or cursor >= len(pool):
+        return False
+    return not char_limit or len(pool[cursor]) <= char_limit
+
+
+def _take(pool: list[str], end: int | None, char_limit: int) -> str | None:
+    """Get the sentence taken by moving the cursor to the given end, if it fits in the character limit."""
+    if end is None or end > len(pool):
+        return None
+    sentence = pool[end - 1]
+    if char_limit and len(sentence) > char_limit:
+        # Another request moved the cursor since the sentence was checked.
+        return None
+    return sentence
+
+
+def _needs_refill(pool: list[str] | None, cursor: int | None, size: int) -> bool:
+    """Check whether the pool is missing or half used up."""
+    left = len(pool) - cursor if pool is not None and cursor is not None else 0
+    return left < size // 2 + 1
+
+
+def take_sentence(scope: str, pk: int, char_limit: int = 280) -> str | None:
+    """Take the next sentence from the pool of a source or group, and dispatch a refill if it is running low.
+
+    Args:
+        scope (str): The kind of object owning the pool, i.e. "source" or "group".
+        pk (int): The primary key of the object.
+        char_limit (int): Maximum characters of the sentence. If zero, no limit.
+
+    Returns:
+        (str | None): The sentence, or None if the pool is disabled, empty, or the sentence does not fit.
+    """
+    size = get_sentence_pool_size()
+    if not size:
+        return None
+    cache = get_selection_cache()
+    pool_key, cursor_key, refill_key = sentence_pool_cache_keys(scope, pk)
+    values: dict[str, Any] = cache.get_many([pool_key, cursor_key])  # type: ignore
+    pool: list[str] | None = values.get(pool_key)
+    cursor: int | None = values.get(cursor_key)
+    sentence = None
+    if _fits(pool, cursor, char_limit):
+        try:
+            cursor = cache.incr(cursor_key)
+        except ValueError:  # no cov
+            # The cursor was evicted, the pool is refilled.
+            cursor = None
+        sentence = _take(pool, cursor, char_limit)  # type: ignore
+    if _needs_refill(pool, cursor, size) and cache.add(refill_key, True, REFILL_TIMEOUT):
+        dispatch(fill_sentence_pool, scope, pk, char_limit)
+    return sentence
+
+
+async def atake_sentence(scope: str, pk: int, char_limit: int = 280) -> str | None:
+    """Async version of `take_sentence`.
+
+    Args:
+        scope (str): The kind of object owning the pool, i.e. "source" or "group".
+        pk (int): The primary key of the object.
+        char_limit (int): Maximum characters of the sentence. If zero, no limit.
+
+    Returns:
+        (str | None): The sentence, or None if the pool is disabled, empty, or the sentence does not fit.
+    """
+    size = get_sentence_pool_size()
+    if not size:
+        return None
+    cache = get_selection_cache()
+    pool_key, cursor_key, refill_key = sentence_pool_cache_keys(scope, pk)
+    values: dict[str, Any] = await cache.aget_many([pool_key, cursor_key])  # type: ignore
+    pool: list[str] | None = values.get(pool_key)
+    cursor: int | None = values.get(cursor_key)
+    sentence = None
+    if _fits(pool, cursor, char_limit):
+        try:
+            cursor = await cache.aincr(cursor_key)  # type: ignore
+        except ValueError:  # no cov
+            # The cursor was evicted, the pool is refilled.
+            cursor = None
+        sentence = _take(pool, cursor, char_limit)  # type: ignore
+    if _needs_refill(pool, cursor, size) and await cache.aadd(refill_key, True, REFILL_TIMEOUT):
+        await sync_to_async(dispatch)(fill_sentence_pool, scope, pk, char_limit)
+    return sentence
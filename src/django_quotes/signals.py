@@ -16,9 +16,29 @@ The `sender` should in most contexts be either `Source` or `SourceGroup`
 The `instance` should be the actual instance of the `Source` that is being used.
 
 This signal will update the `quotes_retrieved` stats in the related ``GroupStats``,
-`SourceStats`, and `QuoteStats` objects.
+`SourceStats`, and `QuoteStats` objects, as well as `Quote.times_used`.
+
+quotes_random_retrieved is emitted when a batch of random quotes is supplied.
+
+The `sender` should be either the `Source` or `SourceGroup` class the batch was requested from,
+and the `instance` the actual instance of that class. The `quotes_retrieved` argument is the list
+of `Quote` instances that were returned.
+
+This signal will update the same stats as `quote_random_retrieved`, using a single `UPDATE`
+for each of the stats tables rather than one per quote.
+
+markov_sentences_generated is emitted when a batch of markov sentences is supplied.
+
+The `sender` should be either the `Source` or `SourceGroup` class the batch was requested from,
+and the `instance` the actual instance of that class. The `sentences` argument is the list of
+sentences that were returned.
+
+This signal will update the `quotes_generated` stats in the related `GroupStats` and `SourceStats`
+once for the whole batch, rather than once per sentence like `sentence_generated`.
 """
 
 import django.dispatch
 
 quote_random_retrieved = django.dispatch.Signal()
+quotes_random_retrieved = django.dispatch.Signal()
+markov_sentences_generated = django.dispatch.Signal()
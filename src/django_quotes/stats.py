@@ -0,0 +1,457 @@
+#
+# stats.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+#
+
+"""Recording usage stats for random quote retrievals and generated sentences.
+
+The counters of groups and sources are spread over `STATS_SHARDS` shard rows each (see
+`django_quotes.models.AbstractShardedStats`). Every write picks one of them at random, so concurrent writes
+for the same group rarely wait on each other. Stats rows are created lazily: the first write to a shard
+creates it, along with the `GroupStats` or `SourceStats` row the first time, and the first retrieval of a
+quote creates its `QuoteStats` row. Until then the counters read as zero, so bulk created objects need no
+stats rows.
+
+Unless `RECORD_USAGE_HISTORY` is False, the same shard of the usage bucket of the current hour (see
+`django_quotes.models.AbstractUsageBucket`) is incremented as well. The first write of each hour creates the
+bucket rows for it. `rollup_usage_history` later compacts the hourly buckets into daily ones.
+
+By default the receivers write the increments for each retrieval as soon as it happens, with one `UPDATE`
+per table, which is still a transaction per request. Setting `BUFFER_QUOTE_STATS` to True collects the
+increments in memory in each process instead, and writes them out with a single `UPDATE ... CASE` per table.
+A background thread flushes the buffer once it holds `QUOTE_STATS_BUFFER_SIZE` increments or every
+`QUOTE_STATS_FLUSH_INTERVAL` seconds, on its own database connection, and it is flushed once more when the
+process exits. Increments still in the buffer are lost if the process is killed outright.
+
+Once the retrieval counts are committed, the cached leaderboards they affect are updated as well (see
+`django_quotes.leaderboards`).
+"""
+
+from __future__ import annotations
+
+import atexit
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import Case, F, OuterRef, Q, QuerySet, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from loguru import logger
+
+from django_quotes.leaderboards import leaderboard_cache_key, update_leaderboards
+from django_quotes.models import (
+    STATS_CACHE_PREFIX,
+    AbstractShardedStats,
+    AbstractStatsShard,
+    AbstractUsageBucket,
+    GroupStats,
+    GroupStatsShard,
+    GroupUsageBucket,
+    Quote,
+    QuoteStats,
+    Source,
+    SourceGroup,
+    SourceStats,
+    SourceStatsShard,
+    SourceUsageBucket,
+)
+from django_quotes.sampling import get_selection_cache
+
+COUNTER_MODELS: dict[str, tuple[type[AbstractShardedStats], type[AbstractStatsShard], type[AbstractUsageBucket]]] = {
+    "group": (GroupStats, GroupStatsShard, GroupUsageBucket),
+    "source": (SourceStats, SourceStatsShard, SourceUsageBucket),
+}
+
+
+def _get_mirror_usage_to_stats() -> bool:
+    """Check whether quote usage should also be recorded on `QuoteStats`, defaulting to True."""
+    return getattr(settings, "MIRROR_QUOTE_USAGE_TO_STATS", True)
+
+
+def _get_shard_count() -> int:
+    """Get the number of shards to spread the counters of each group and source over."""
+    shards = getattr(settings, "STATS_SHARDS", 8)
+    if not isinstance(shards, int) or shards < 1:  # no cov
+        return 8
+    return shards
+
+
+def _get_record_usage_history() -> bool:
+    """Check whether usage should also be counted in hourly buckets, defaulting to True."""
+    return getattr(settings, "RECORD_USAGE_HISTORY", True)
+
+
+def _get_buffer_stats() -> bool:
+    """Check whether retrieval stats should be buffered, defaulting to False."""
+    return getattr(settings, "BUFFER_QUOTE_STATS", False)
+
+
+def _get_buffer_size() -> int:
+    """Get the number of buffered increments that triggers a flush from settings or return a default."""
+    size = getattr(settings, "QUOTE_STATS_BUFFER_SIZE", 100)
+    if not isinstance(size, int) or size < 1:  # no cov
+        return 100
+    return size
+
+
+def _get_flush_interval() -> float:
+    """Get the maximum number of seconds increments are buffered for from settings or return a default."""
+    interval = getattr(settings, "QUOTE_STATS_FLUSH_INTERVAL", 5)
+    if not isinstance(interval, int | float) or interval <= 0:  # no cov
+        return 5
+    return interval
+
+
+def _rows_filter(owner: str, rows: Mapping[int, dict[str, Any]]) -> Q:
+    """Match the row of each group, source, or quote with the given lookups."""
+    if not any(rows.values()):
+        return Q(**{f"{owner}_id__in": list(rows)})
+    row_filter = Q()
+    for owner_id, lookups in rows.items():
+        row_filter |= Q(**{f"{owner}_id": owner_id}, **lookups)
+    return row_filter
+
+
+def _update_rows(
+    model: type[models.Model], owner: str, field: str, counts: Mapping[int, int], rows: Mapping[int, dict[str, Any]]
+) -> int:
+    """Add each count to the field of the row of its group, source, or quote that matches the given lookups."""
+    amounts = {counts[owner_id] for owner_id in rows}
+    if len(amounts) == 1:
+        amount = Value(amounts.pop())
+    else:
+        amount = Case(
+            *[When(**{f"{owner}_id": owner_id}, then=Value(counts[owner_id])) for owner_id in rows], default=Value(0)
+        )
+    return model.objects.filter(_rows_filter(owner, rows)).update(**{field: F(field) + amount})
+
+
+def _increment_rows(
+    model: type[models.Model], owner: str, field: str, counts: Mapping[int, int], rows: Mapping[int, dict[str, Any]]
+) -> set[int]:
+    """
+    Add each count to the field of the row of its group, source, or quote that matches the given lookups, using a
+    single UPDATE. Stats rows are created lazily, so rows that do not exist yet, e.g. the stats of a new quote or
+    the bucket of a new hour, are created with zeros and then updated, with a few more queries.
+
+    Returns:
+        (set[int]): The ids of the groups, sources, or quotes that rows were created for.
+    """
+    if _update_rows(model, owner, field, counts, rows) == len(rows):
+        return set()
+    existing = set(model.objects.filter(_rows_filter(owner, rows)).values_list(f"{owner}_id", flat=True))
+    # Foreign keys may only be checked on commit, so skip the owners that have been deleted up front.
+    owner_model = model._meta.get_field(owner).related_model
+    live_owners = set(owner_model.objects.filter(pk__in=list(rows)).values_list("pk", flat=True))  # type: ignore
+    missing = {
+        owner_id: lookups for owner_id, lookups in rows.items() if owner_id in live_owners and owner_id not in existing
+    }
+    if not missing:
+        return set()
+    model.objects.bulk_create(
+        [model(**{f"{owner}_id": owner_id}, **lookups) for owner_id, lookups in missing.items()],
+        ignore_conflicts=True,
+    )
+    _update_rows(model, owner, field, counts, missing)
+    return set(missing)
+
+
+def _increment_quotes(counts: Mapping[int, int]) -> None:
+    """Add each count to the usage counter of the quote it is keyed by, and to its `QuoteStats` mirror."""
+    counts = {quote_id: n for quote_id, n in counts.items() if n}
+    if not counts:
+        return
+    amounts = set(counts.values())
+    if len(amounts) == 1:
+        amount = Value(amounts.pop())
+    else:
+        amount = Case(*[When(pk=quote_id, then=Value(n)) for quote_id, n in counts.items()], default=Value(0))
+    Quote.objects.filter(pk__in=list(counts)).update(times_used=F("times_used") + amount)
+    if _get_mirror_usage_to_stats():
+        _increment_rows(QuoteStats, "quote", "times_used", counts, {quote_id: {} for quote_id in counts})
+
+
+def _increment_counters(owner: str, field: str, counts: Mapping[int, int]) -> None:
+    """
+    Add each count to the field of a random stats shard of the group or source it is keyed by, and to the same
+    shard of its usage bucket for the current hour.
+    """
+    counts = {owner_id: n for owner_id, n in counts.items() if n}
+    if not counts:
+        return
+    stats_model, shard_model, bucket_model = COUNTER_MODELS[owner]
+    shards = {owner_id: random.randrange(_get_shard_count()) for owner_id in counts}  # noqa: S311
+    created = _increment_rows(
+        shard_model, owner, field, counts, {owner_id: {"shard": shard} for owner_id, shard in shards.items()}
+    )
+    if created:
+        # The stats row of a group or source is created along with its first shard.
+        stats_model.objects.bulk_create(
+            [stats_model(**{f"{owner}_id": owner_id}) for owner_id in created], ignore_conflicts=True
+        )
+    if _get_record_usage_history():
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        _increment_rows(
+            bucket_model,
+            owner,
+            field,
+            counts,
+            {
+                owner_id: {"start": hour, "period": AbstractUsageBucket.Period.HOUR, "shard": shard}
+                for owner_id, shard in shards.items()
+            },
+        )
+
+
+def write_retrieval_counts(
+    group_counts: Mapping[int, int], source_counts: Mapping[int, int], quote_counts: Mapping[int, int]
+) -> None:
+    """
+    Write the stats for random quote retrievals, issuing a single UPDATE per table.
+
+    Args:
+        group_counts (Mapping[int, int]): Quotes requested, keyed by the group id.
+        source_counts (Mapping[int, int]): Quotes requested, keyed by the source id.
+        quote_counts (Mapping[int, int]): Times used, keyed by the quote id.
+    """
+    with transaction.atomic():
+        _increment_counters("group", "quotes_requested", group_counts)
+        _increment_counters("source", "quotes_requested", source_counts)
+        _increment_quotes(quote_counts)
+        transaction.on_commit(lambda: update_leaderboards(list(group_counts), list(source_counts), list(quote_counts)))
+
+
+def write_generation_counts(group_id: int, source_id: int | None, count: int = 1) -> None:
+    """
+    Write the stats for generated markov sentences.
+
+    Args:
+        group_id (int): The id of the group the sentences were generated for, or the group of the source.
+        source_id (int | None): The id of the source the sentences were generated for, if any.
+        count (int): The number of sentences generated.
+    """
+    with transaction.atomic():
+        _increment_counters("group", "quotes_generated", {group_id: count})
+        if source_id is not None:
+            _increment_counters("source", "quotes_generated", {source_id: count})
+
+
+def _chunked_ids(queryset: QuerySet, chunk_size: int):
+    """Yield the primary keys of a queryset in ascending chunks, paging on the key rather than with offsets."""
+    last_id = 0
+    while ids := list(queryset.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:chunk_size]):
+        yield ids
+        last_id = ids[-1]
+
+
+def _reconcile_counters(owner: str, owner_ids: list[int]) -> None:
+    """
+    Create the missing stats rows of a chunk of groups or sources, and recount their requested quotes. Must be
+    called in a transaction, which holds the locks on their shards until it commits.
+    """
+    stats_model, shard_model, _ = COUNTER_MODELS[owner]
+    stats_model.objects.bulk_create(
+        [stats_model(**{f"{owner}_id": owner_id}) for owner_id in owner_ids], ignore_conflicts=True
+    )
+    shard_model.objects.bulk_create(
+        [shard_model(**{f"{owner}_id": owner_id}, shard=0) for owner_id in owner_ids], ignore_conflicts=True
+    )
+    # Writers increment the shards before the quotes in the same transaction, so once they hold no shard of
+    # the chunk, the quote counters summed below include all of their increments, and the ones that follow
+    # wait for the recount to commit instead of being overwritten by it.
+    list(
+        shard_model.objects.select_for_update()
+        .filter(**{f"{owner}_id__in": owner_ids})
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    quote_owner = "source" if owner == "source" else "source__group"
+    total = (
+        Quote.objects.filter(**{quote_owner: OuterRef(f"{owner}_id")})
+        .order_by()
+        .values(quote_owner)
+        .annotate(total=Sum("times_used"))
+        .values("total")
+    )
+    # The whole count goes to the first shard, the others only keep their generated sentences.
+    shard_model.objects.filter(**{f"{owner}_id__in": owner_ids}).update(
+        quotes_requested=Case(When(shard=0, then=Coalesce(Subquery(total), Value(0))), default=Value(0))
+    )
+
+
+def reconcile_stats(chunk_size: int = 1000) -> tuple[int, int, int]:
+    """
+    Rebuild the `quotes_requested` counters of all groups and sources from the `times_used` counters of their
+    quotes, and create any missing stats rows. Unless `MIRROR_QUOTE_USAGE_TO_STATS` is False, the `QuoteStats`
+    of every quote are created and set to `Quote.times_used` as well. The `quotes_generated` counters cannot be
+    recomputed and are left as they are.
+
+    This loses history: the uses of deleted quotes, which their source and group keep counting until then, are
+    dropped for good, and so are any counts edited by hand. The hourly and daily usage history is left as it
+    is. Each chunk of `chunk_size` objects is updated in its own transaction with a single statement per table,
+    locking the shards of the chunk, so retrievals recorded meanwhile wait for the chunk rather than being lost.
+
+    Args:
+        chunk_size (int): The number of objects to update per statement.
+
+    Returns:
+        tuple[int, int, int]: The number of groups, sources, and quotes reconciled.
+    """
+    cache = get_selection_cache()
+    num_groups = num_sources = num_quotes = 0
+    for group_ids in _chunked_ids(SourceGroup.objects.all(), chunk_size):
+        with transaction.atomic():
+            _reconcile_counters("group", group_ids)
+        cache.delete_many(
+            [f"{STATS_CACHE_PREFIX}:group:{group_id}" for group_id in group_ids]
+            + [leaderboard_cache_key("sources", "group", group_id) for group_id in group_ids]
+        )
+        num_groups += len(group_ids)
+    for source_ids in _chunked_ids(Source.objects.all(), chunk_size):
+        with transaction.atomic():
+            _reconcile_counters("source", source_ids)
+        cache.delete_many([f"{STATS_CACHE_PREFIX}:source:{source_id}" for source_id in source_ids])
+        num_sources += len(source_ids)
+    if _get_mirror_usage_to_stats():
+        for quote_ids in _chunked_ids(Quote.objects.all(), chunk_size):
+            with transaction.atomic():
+                QuoteStats.objects.bulk_create(
+                    [QuoteStats(quote_id=quote_id) for quote_id in quote_ids], ignore_conflicts=True
+                )
+                QuoteStats.objects.filter(quote_id__in=quote_ids).update(
+                    times_used=Subquery(Quote.objects.filter(pk=OuterRef("quote_id")).values("times_used"))
+                )
+            num_quotes += len(quote_ids)
+    return num_groups, num_sources, num_quotes
+
+
+class StatsBuffer:
+    """
+    Per process buffer of retrieval stats increments. It is safe to use from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._group_counts: Counter[int] = Counter()
+        self._source_counts: Counter[int] = Counter()
+        self._quote_counts: Counter[int] = Counter()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._due = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of retrievals waiting to be written."""
+        return self._pending
+
+    def add(self, group_counts: Mapping[int, int], source_counts: Mapping[int, int], quote_counts: Counter[int]):
+        """
+        Buffer the stats for random quote retrievals, waking up the background flusher if the buffer is full or
+        overdue. The buffer is never flushed from here: the caller may be in a transaction that is rolled back
+        later, which would take the buffered retrievals of every other request with it.
+
+        Args:
+            group_counts (Mapping[int, int]): Quotes requested, keyed by the group id.
+            source_counts (Mapping[int, int]): Quotes requested, keyed by the source id.
+            quote_counts (Counter[int]): Times used, keyed by the quote id.
+        """
+        self._start()
+        with self._lock:
+            self._group_counts.update(group_counts)
+            self._source_counts.update(source_counts)
+            self._quote_counts.update(quote_counts)
+            self._pending += quote_counts.total()
+            due = self._pending >= _get_buffer_size() or time.monotonic() - self._last_flush >= _get_flush_interval()
+        if due:
+            self._due.set()
+
+    def flush(self) -> int:
+        """
+        Write out everything in the buffer.
+
+        Returns:
+            (int): The number of retrievals written.
+        """
+        with self._lock:
+            group_counts, self._group_counts = self._group_counts, Counter()
+            source_counts, self._source_counts = self._source_counts, Counter()
+            quote_counts, self._quote_counts = self._quote_counts, Counter()
+            pending, self._pending = self._pending, 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            write_retrieval_counts(group_counts, source_counts, quote_counts)
+        except Exception:
+            logger.exception(f"Unable to write {pending} buffered quote retrievals, keeping them for the next flush.")
+            with self._lock:
+                self._group_counts.update(group_counts)
+                self._source_counts.update(source_counts)
+                self._quote_counts.update(quote_counts)
+                self._pending += pending
+            return 0
+        logger.debug(f"Wrote {pending} buffered quote retrievals.")
+        return pending
+
+    def _start(self) -> None:
+        """Start the background flusher and register the flush at exit, the first time the buffer is used."""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:  # no cov
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name="django-quotes-stats", daemon=True)
+            self._flusher.start()
+        atexit.register(self.flush)
+
+    def _flush_when_due(self) -> int:
+        """
+        Wait until the buffer is full or the flush interval has passed, and flush it.
+
+        Returns:
+            (int): The number of retrievals written.
+        """
+        woken = self._due.wait(_get_flush_interval())
+        self._due.clear()
+        if not woken and time.monotonic() - self._last_flush < _get_flush_interval():
+            return 0
+        return self.flush()
+
+    def _run_flusher(self) -> None:  # no cov
+        """Flush the buffer whenever it is due, even when no retrievals arrive to trigger it."""
+        while True:
+            self._flush_when_due()
+            # Release the connection this thread opened, it may be a long time until the next flush.
+            connections.close_all()
+
+
+stats_buffer = StatsBuffer()
+
+
+def record_quote_retrievals(
+    group_counts: Mapping[int, int], source_counts: Mapping[int, int], quote_counts: Counter[int]
+) -> None:
+    """
+    Record the stats for random quote retrievals, either right away or via the buffer if `BUFFER_QUOTE_STATS`
+    is enabled.
+
+    Args:
+        group_counts (Mapping[int, int]): Quotes requested, keyed by the group id.
+        source_counts (Mapping[int, int]): Quotes requested, keyed by the source id.
+        quote_counts (Counter[int]): Times used, keyed by the quote id.
+    """
+    if _get_buffer_stats():
+        stats_buffer.add(group_counts, source_counts, quote_counts)
+    else:
+        write_retrieval_counts(group_counts, source_counts, quote_counts)
@@ -7,15 +7,35 @@
 
 """Utility tasks for use with distributed queues."""
 
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db.models import Sum, TextField
+from django.db.models.functions import Cast, Length, Trunc
 from django.db.transaction import atomic
 from django.utils import timezone
 
-from django_markov.models import MarkovCombineError
-from django_quotes.models import Quote, QuoteCorpusError
+from django_markov.models import MarkovCombineError, MarkovTextModel
+from django_quotes.models import (
+    MARKOV_DIRTY_FIELDS,
+    AbstractUsageBucket,
+    GroupUsageBucket,
+    Quote,
+    QuoteCorpusError,
+    Source,
+    SourceGroup,
+    SourceUsageBucket,
+    mark_markov_models_dirty,
+)
+from django_quotes.sampling import invalidate_pool
+from django_quotes.stats import record_quote_retrievals
 
 
 def update_models_on_quote_save(quote: Quote) -> bool:
-    """Evaluate the quote to see if the source and group Markov models require updates
+    """Evaluate the quote to see if the source and group Markov models require updates, i.e. they are marked dirty,
     and then execute those updates.
 
     Args:
@@ -24,10 +44,12 @@ def update_models_on_quote_save(quote: Quote) -> bool:
     Returns:
         bool: True if the source and group were updated, False otherwise, i.e. because update was not required.
     """
-    if not quote.id or quote.modified < quote.source.text_model.modified or not quote.source.markov_ready:  # type: ignore
-        return False  # We don't update based off of an unsaved quote, or if we pass an older quote.
-    if quote.pub_date is not None and quote.pub_date > timezone.now():
-        return False
+    if not quote.id or not quote.published:
+        return False  # We don't update based off of an unsaved or unpublished quote.
+    quote.source.refresh_from_db(fields=MARKOV_DIRTY_FIELDS)
+    if not quote.source.markov_dirty or not quote.source.markov_ready:
+        return False  # The models were already rebuilt since the quote was saved, or cannot be built yet.
+    quote.source.group.refresh_from_db(fields=MARKOV_DIRTY_FIELDS)
     try:
         with atomic():
             quote.source.update_markov_model()
@@ -36,3 +58,246 @@ def update_models_on_quote_save(quote: Quote) -> bool:
         msg = f"Encountered an error when combining source models to the group model: {mce}"
         raise QuoteCorpusError(msg) from mce
     return True
+
+
+def update_markov_models_for_quote(quote_id: int) -> bool:
+    """Task version of `update_models_on_quote_save`, dispatched when `UPDATE_MARKOV_ON_QUOTE_SAVE` is enabled.
+
+    Args:
+        quote_id (int): The id of the saved quote.
+
+    Returns:
+        bool: True if the source and group were updated, False otherwise, e.g. because the quote was deleted.
+    """
+    quote = Quote.objects.select_related("source__text_model", "source__group__text_model").filter(pk=quote_id).first()
+    if quote is None:
+        return False
+    return update_models_on_quote_save(quote)
+
+
+def update_markov_models_for_source(source_id: int) -> None:
+    """Rebuild the Markov model of a source that now allows Markov sentences, and add it to the model of its group.
+
+    Args:
+        source_id (int): The id of the source.
+    """
+    source = Source.objects.select_related("text_model", "group__text_model").filter(pk=source_id).first()
+    if source is None or not source.allow_markov:
+        return
+    source.update_markov_model()
+    if source.text_model is not None:
+        source.text_model.refresh_from_db()
+    source.group.update_markov_model(additional_model=source.text_model)
+
+
+def _timed_rebuild(owner: Source | SourceGroup, kind: str) -> dict[str, Any] | None:
+    """Rebuild the Markov model of a source or group, and report how long it took and the size of the model, or
+    None if it was not rebuilt, e.g. because the source does not have enough quotes yet."""
+    text_model: MarkovTextModel = owner.text_model  # type: ignore
+    last_modified = text_model.modified
+    start = time.perf_counter()
+    owner.update_markov_model()
+    seconds = time.perf_counter() - start
+    if text_model.modified == last_modified:
+        return None
+    # The data was deferred, so measure it in the database instead of loading it.
+    size = (
+        MarkovTextModel.objects.filter(pk=text_model.pk)
+        .values_list(Length(Cast("data", TextField())), flat=True)
+        .first()
+    )
+    return {"model": kind, "slug": owner.slug, "seconds": seconds, "bytes": size or 0}
+
+
+def find_stale_markov_models(
+    *, force: bool = False, group_ids: list[int] | None = None, source_ids: list[int] | None = None
+) -> dict[int, list[int]]:
+    """Find the Markov models that are marked dirty, with a query per table on the partial indexes of the dirty
+    sources and groups, so it takes time in proportion to the number of dirty models rather than all of them.
+
+    Args:
+        force (bool): Whether to treat all models of markov enabled sources and all groups as dirty.
+        group_ids (list[int] | None): If given, only the groups with these ids are checked.
+        source_ids (list[int] | None): If given, only the sources with these ids, and their groups, are checked.
+
+    Returns:
+        dict[int, list[int]]: The ids of the sources to rebuild, keyed by the id of each group to rebuild.
+    """
+    sources = Source.objects.filter(allow_markov=True)
+    groups = SourceGroup.objects.all()
+    if not force:
+        sources = sources.filter(markov_dirty=True)
+        groups = groups.filter(markov_dirty=True)
+    if group_ids is not None:
+        sources = sources.filter(group_id__in=group_ids)
+        groups = groups.filter(pk__in=group_ids)
+    if source_ids is not None:
+        sources = sources.filter(pk__in=source_ids)
+        groups = groups.filter(source__pk__in=source_ids)
+    stale: dict[int, list[int]] = {
+        group_id: [] for group_id in groups.order_by("pk").values_list("pk", flat=True).distinct()
+    }
+    for source_id, group_id in sources.order_by("group_id", "pk").values_list("pk", "group_id"):
+        # Dirty sources always come with a dirty group, unless the group was rebuilt in the meantime.
+        stale.setdefault(group_id, []).append(source_id)
+    return stale
+
+
+def rebuild_group_markov_models(group_id: int, source_ids: list[int]) -> list[dict[str, Any]]:
+    """Rebuild the Markov models of some sources of a group, followed by the group model, clearing their dirty
+    flags unless they were marked dirty again in the meantime. Groups are independent
+    of each other, so the `makemarkov` management command runs this for several groups in parallel, with the ids
+    found by `find_stale_markov_models`.
+
+    Args:
+        group_id (int): The id of the group.
+        source_ids (list[int]): The ids of the sources to rebuild.
+
+    Returns:
+        list[dict[str, Any]]: The `model` kind ("source" or "group"), `slug`, `seconds` taken, and `bytes` written
+            for each model that was rebuilt. Sources without enough quotes and groups without any markov ready
+            sources are skipped.
+    """
+    # The models are rebuilt from scratch, so their current data is not needed.
+    group = SourceGroup.objects.select_related("text_model").defer("text_model__data").filter(pk=group_id).first()
+    if group is None:  # no cov
+        return []
+    if group.text_model is None:  # no cov
+        group.text_model = MarkovTextModel.objects.create()
+    sources = Source.objects.select_related("text_model").defer("text_model__data").filter(pk__in=source_ids)
+    rebuilt = []
+    for source in sources.order_by("pk"):
+        if source.text_model is None:  # no cov
+            source.text_model = MarkovTextModel.objects.create()
+        rebuilt.append(_timed_rebuild(source, "source"))
+    rebuilt.append(_timed_rebuild(group, "group"))
+    return [result for result in rebuilt if result is not None]
+
+
+def record_retrieval_stats(
+    group_counts: list[list[int]], source_counts: list[list[int]], quote_counts: list[list[int]]
+) -> None:
+    """Record the stats for random quote retrievals. The counts are passed as lists of `[id, count]` pairs, so that
+    external task queues can serialize them as JSON without turning the ids into strings.
+
+    Args:
+        group_counts (list[list[int]]): Quotes requested per group id.
+        source_counts (list[list[int]]): Quotes requested per source id.
+        quote_counts (list[list[int]]): Times used per quote id.
+    """
+    record_quote_retrievals(dict(group_counts), dict(source_counts), Counter(dict(quote_counts)))  # type: ignore
+
+
+def publish_scheduled_quotes() -> int:
+    """Flag the quotes whose pub_date has passed as published, and discard the random quote pools
+    of their sources and groups so that they are picked up. The Markov models of their sources and groups are
+    marked dirty, so that `makemarkov` adds them.
+
+    Bulk writes, such as `bulk_create` or `update(pub_date=...)`, skip `Quote.save`, which sets the flag, and
+    leave quotes whose pub_date is in the future published. Those quotes are flagged as unpublished again here.
+
+    This should be run regularly, e.g. every minute from a task queue scheduler or a cronjob
+    running the `publishquotes` management command. Scheduled quotes will not appear otherwise.
+
+    Returns:
+        int: The number of quotes that were published.
+    """
+    now = timezone.now()
+    due_quotes = Quote.objects.filter(published=False, pub_date__lte=now)
+    early_quotes = Quote.objects.filter(published=True, pub_date__gt=now)
+    owners = list(
+        due_quotes.values_list("source_id", "source__group_id")
+        .union(early_quotes.values_list("source_id", "source__group_id"))
+        .order_by()
+    )
+    if not owners:
+        return 0
+    num_published = due_quotes.update(published=True, modified=now)
+    early_quotes.update(published=False, modified=now)
+    mark_markov_models_dirty(source_ids=[source_id for source_id, _ in owners])
+    for source_id, group_id in owners:
+        invalidate_pool("source", source_id)
+        invalidate_pool("group", group_id)
+    return num_published
+
+
+def _get_hourly_usage_days() -> int:
+    """Get the number of days hourly usage buckets are kept for before being rolled up, or return a default."""
+    days = getattr(settings, "USAGE_HISTORY_HOURLY_DAYS", 2)
+    if not isinstance(days, int) or days < 1:  # no cov
+        return 2
+    return days
+
+
+def _get_usage_history_days() -> int:
+    """Get the number of days usage buckets are kept for from settings or return a default. 0 keeps them forever."""
+    days = getattr(settings, "USAGE_HISTORY_DAYS", 365)
+    if not isinstance(days, int) or days < 0:  # no cov
+        return 365
+    return days
+
+
+def _rollup_buckets(bucket_model: type[AbstractUsageBucket], owner: str, before: datetime) -> int:
+    """Sum the hourly buckets that start before the given time into daily buckets, and delete them."""
+    hourly = bucket_model.objects.filter(period=AbstractUsageBucket.Period.HOUR, start__lt=before)
+    totals = {
+        (row[f"{owner}_id"], row["day"]): [row["requested"], row["generated"]]
+        for row in hourly.annotate(day=Trunc("start", "day", tzinfo=UTC))
+        .values(f"{owner}_id", "day")
+        .annotate(requested=Sum("quotes_requested"), generated=Sum("quotes_generated"))
+        .order_by()
+    }
+    if not totals:
+        return 0
+    existing = bucket_model.objects.filter(
+        period=AbstractUsageBucket.Period.DAY,
+        shard=0,
+        start__in={day for _, day in totals},
+        **{f"{owner}_id__in": {owner_id for owner_id, _ in totals}},
+    )
+    for bucket in existing:
+        key = (getattr(bucket, f"{owner}_id"), bucket.start)
+        if key in totals:
+            totals[key][0] += bucket.quotes_requested
+            totals[key][1] += bucket.quotes_generated
+    bucket_model.objects.bulk_create(
+        [
+            bucket_model(
+                **{f"{owner}_id": owner_id},
+                start=day,
+                period=AbstractUsageBucket.Period.DAY,
+                shard=0,
+                quotes_requested=requested,
+                quotes_generated=generated,
+            )
+            for (owner_id, day), (requested, generated) in totals.items()
+        ],
+        update_conflicts=True,
+        unique_fields=[owner, "start", "period", "shard"],
+        update_fields=["quotes_requested", "quotes_generated"],
+    )
+    num_rolled_up, _ = hourly.delete()
+    return num_rolled_up
+
+
+def rollup_usage_history() -> tuple[int, int]:
+    """Compact the hourly usage buckets of groups and sources that are older than `USAGE_HISTORY_HOURLY_DAYS`
+    into daily buckets, and delete the buckets that are older than `USAGE_HISTORY_DAYS`.
+
+    This should be run regularly, e.g. daily from a task queue scheduler or a cronjob running the
+    `rollupusage` management command. The hourly buckets are kept otherwise.
+
+    Returns:
+        tuple[int, int]: The number of hourly buckets that were rolled up, and the number of buckets deleted.
+    """
+    today = timezone.now().astimezone(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    num_rolled_up = num_pruned = 0
+    with atomic():
+        for bucket_model, owner in [(GroupUsageBucket, "group"), (SourceUsageBucket, "source")]:
+            num_rolled_up += _rollup_buckets(bucket_model, owner, today - timedelta(days=_get_hourly_usage_days()))
+            if _get_usage_history_days():
+                num_deleted, _ = bucket_model.objects.filter(
+                    start__lt=today - timedelta(days=_get_usage_history_days())
+                ).delete()
+                num_pruned += num_deleted
+    return num_rolled_up, num_pruned
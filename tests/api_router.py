@@ -6,8 +6,15 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
+from django_quotes.api.async_views import (
+    SourceGenerateSentenceView,
+    SourceGroupGenerateSentenceView,
+    SourceGroupRandomQuoteView,
+    SourceRandomQuoteView,
+)
 from django_quotes.api.views import SourceGroupViewSet, SourceViewSet
 
 if settings.DEBUG:
@@ -20,4 +27,26 @@ router.register("sources", SourceViewSet, basename="source")
 
 
 app_name = "api"
-urlpatterns = router.urls
+urlpatterns = [
+    *router.urls,
+    path(
+        "async/groups/<slug:group>/get_random_quote/",
+        SourceGroupRandomQuoteView.as_view(),
+        name="async-group-random-quote",
+    ),
+    path(
+        "async/groups/<slug:group>/generate_sentence/",
+        SourceGroupGenerateSentenceView.as_view(),
+        name="async-group-generate-sentence",
+    ),
+    path(
+        "async/sources/<slug:source>/get_random_quote/",
+        SourceRandomQuoteView.as_view(),
+        name="async-source-random-quote",
+    ),
+    path(
+        "async/sources/<slug:source>/generate_sentence/",
+        SourceGenerateSentenceView.as_view(),
+        name="async-source-generate-sentence",
+    ),
+]
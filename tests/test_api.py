@@ -6,16 +6,24 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import pytest
+from django.contrib.auth import get_user_model
 from django.test import RequestFactory
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import AllowAny
 from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
 
+from django_quotes.api.async_views import AsyncReadView, SourceRandomQuoteView
 from django_quotes.api.serializers import SourceSerializer
 from django_quotes.api.views import SourceGroupViewSet
 from django_quotes.models import Source, SourceGroup
 from tests.factories.users import UserFactory
 
+User = get_user_model()
+
 pytestmark = pytest.mark.django_db(transaction=True)
 
 
@@ -60,6 +68,29 @@ class TestGroupViewSet:
         )
         assert response.status_code == status.HTTP_200_OK
 
+    def test_random_quotes(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        response = apiclient.get(
+            reverse("api:group-get-random-quotes", kwargs={"group": property_group.slug}) + "?count=5"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 5
+
+    @pytest.mark.parametrize("count", ["0", "51", "many"])
+    def test_random_quotes_invalid_count(self, apiclient, property_group, count):
+        apiclient.force_authenticate(user=property_group.owner)
+        response = apiclient.get(
+            reverse("api:group-get-random-quotes", kwargs={"group": property_group.slug}) + f"?count={count}"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_empty_random_quotes(self, apiclient):
+        user = UserFactory()
+        apiclient.force_authenticate(user=user)
+        group = SourceGroup.objects.create(name="Nothing here", owner=user)
+        response = apiclient.get(reverse("api:group-get-random-quotes", kwargs={"group": group.slug}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     def test_markov_group(self, apiclient, property_group):
         apiclient.force_authenticate(user=property_group.owner)
         response = apiclient.get(reverse("api:group-generate-sentence", kwargs={"group": property_group.slug}))
@@ -73,6 +104,23 @@ class TestGroupViewSet:
         response = apiclient.get(reverse("api:group-generate-sentence", kwargs={"group": group.slug}))
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_group_generate_sentences(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        url = reverse("api:group-generate-sentences", kwargs={"group": property_group.slug})
+        response = apiclient.get(url + "?count=2")
+        assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
+        if response.status_code == status.HTTP_200_OK:
+            assert 0 < len(response.data["sentences"]) <= 2
+        assert apiclient.get(url + "?count=50").status_code == status.HTTP_400_BAD_REQUEST
+        user = UserFactory()
+        group = SourceGroup.objects.create(name="Nothing here", owner=user)
+        apiclient.force_authenticate(user=user)
+        response = apiclient.get(reverse("api:group-generate-sentences", kwargs={"group": group.slug}))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        Source.objects.create(name="No Fun", group=group, owner=user, allow_markov=True)
+        response = apiclient.get(reverse("api:group-generate-sentences", kwargs={"group": group.slug}))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
     def test_empty_markov_group(self, apiclient):
         user = UserFactory()
         group = SourceGroup.objects.create(name="Nothing here", owner=user)
@@ -81,6 +129,38 @@ class TestGroupViewSet:
         response = apiclient.get(reverse("api:group-generate-sentence", kwargs={"group": group.slug}))
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
+    def test_group_usage(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        property_group.get_random_quotes(3)
+        response = apiclient.get(reverse("api:group-get-usage", kwargs={"group": property_group.slug}))
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert response.data[0]["quotes_requested"] == 3
+
+    @pytest.mark.parametrize("query", ["?period=week", "?since=yesterday", "?until=2026-13-01T00:00:00"])
+    def test_group_usage_invalid_parameters(self, apiclient, property_group, query):
+        apiclient.force_authenticate(user=property_group.owner)
+        response = apiclient.get(reverse("api:group-get-usage", kwargs={"group": property_group.slug}) + query)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_group_leaderboards(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        source = property_group.source_set.first()
+        source.get_random_quotes(3)
+        response = apiclient.get(reverse("api:group-get-top-quotes", kwargs={"group": property_group.slug}))
+        assert response.status_code == status.HTTP_200_OK
+        assert [entry["times_used"] for entry in response.data] == [1, 1, 1]
+        assert response.data[0]["quote"]["source"]["slug"] == source.slug
+        response = apiclient.get(reverse("api:group-get-top-sources", kwargs={"group": property_group.slug}))
+        assert response.status_code == status.HTTP_200_OK
+        assert [(entry["source"]["slug"], entry["quotes_requested"]) for entry in response.data] == [(source.slug, 3)]
+
+    @pytest.mark.parametrize("query", ["?count=0", "?count=11", "?count=many"])
+    def test_group_leaderboard_invalid_count(self, apiclient, property_group, query):
+        apiclient.force_authenticate(user=property_group.owner)
+        response = apiclient.get(reverse("api:group-get-top-sources", kwargs={"group": property_group.slug}) + query)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 
 class TestSourceViewSet:
     def test_list_sources(self, apiclient, property_group):
@@ -127,6 +207,29 @@ class TestSourceViewSet:
         response = apiclient.get(reverse("api:source-get-random-quote", kwargs={"source": source.slug}))
         assert response.status_code == status.HTTP_404_NOT_FOUND
 
+    def test_source_random_quotes(self, apiclient, property_group):
+        char_to_retrieve = property_group.source_set.all()[0]
+        apiclient.force_authenticate(user=property_group.owner)
+        response = apiclient.get(
+            reverse("api:source-get-random-quotes", kwargs={"source": char_to_retrieve.slug}) + "?count=3"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 3
+
+    def test_source_random_quotes_invalid_count(self, apiclient, property_group):
+        char_to_retrieve = property_group.source_set.all()[0]
+        apiclient.force_authenticate(user=property_group.owner)
+        response = apiclient.get(
+            reverse("api:source-get-random-quotes", kwargs={"source": char_to_retrieve.slug}) + "?count=-1"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_random_quotes_empty_source(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        source = Source.objects.create(name="Bobble the Elder", group=property_group, owner=property_group.owner)
+        response = apiclient.get(reverse("api:source-get-random-quotes", kwargs={"source": source.slug}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     def test_source_generate_sentence(self, apiclient, property_group):
         char_to_retrieve = property_group.source_set.filter(allow_markov=True)[0]
         apiclient.force_authenticate(user=property_group.owner)
@@ -140,6 +243,21 @@ class TestSourceViewSet:
         if response.status_code == status.HTTP_200_OK:
             assert response.data["sentence"] is not None
 
+    def test_source_generate_sentences(self, apiclient, property_group):
+        source = property_group.source_set.filter(allow_markov=True)[0]
+        apiclient.force_authenticate(user=property_group.owner)
+        url = reverse("api:source-generate-sentences", kwargs={"source": source.slug})
+        response = apiclient.get(url + "?count=3")
+        assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
+        if response.status_code == status.HTTP_200_OK:
+            assert 0 < len(response.data["sentences"]) <= 3
+            assert len(set(response.data["sentences"])) == len(response.data["sentences"])
+        for query in ["?count=0", "?count=21", "?count=some"]:
+            assert apiclient.get(url + query).status_code == status.HTTP_400_BAD_REQUEST
+        source = property_group.source_set.filter(allow_markov=False)[0]
+        response = apiclient.get(reverse("api:source-generate-sentences", kwargs={"source": source.slug}))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
     def test_disallowed_source_generate_sentence(self, apiclient, property_group):
         char_to_retrieve = property_group.source_set.filter(allow_markov=False)[0]
         apiclient.force_authenticate(user=property_group.owner)
@@ -166,3 +284,118 @@ class TestSourceViewSet:
             )
         )
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_source_usage(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        source = property_group.source_set.first()
+        source.get_random_quote()
+        url = reverse("api:source-get-usage", kwargs={"source": source.slug})
+        response = apiclient.get(url + "?period=hour&since=2000-01-01T00:00:00")
+        assert response.status_code == status.HTTP_200_OK
+        assert [entry["quotes_requested"] for entry in response.data] == [1]
+        response = apiclient.get(url + "?until=2000-01-01T00:00:00Z")
+        assert response.data == []
+
+    def test_source_top_quotes(self, apiclient, property_group):
+        apiclient.force_authenticate(user=property_group.owner)
+        source = property_group.source_set.first()
+        quote = source.get_random_quote()
+        source.get_random_quotes(2)
+        url = reverse("api:source-get-top-quotes", kwargs={"source": source.slug})
+        response = apiclient.get(url + "?count=1")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert response.data[0]["times_used"] >= 1
+        response = apiclient.get(url)
+        assert sum(entry["times_used"] for entry in response.data) == 3
+        assert quote.quote in [entry["quote"]["quote"] for entry in response.data]
+
+
+class TestAsyncViews:
+    @pytest.mark.asyncio
+    async def test_group_random_quote(self, async_client, property_group):
+        await async_client.aforce_login(await User.objects.aget(pk=property_group.owner_id))
+        response = await async_client.get(
+            reverse("api:async-group-random-quote", kwargs={"group": property_group.slug})
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["source"]["group"]["slug"] == property_group.slug
+
+    @pytest.mark.asyncio
+    async def test_source_random_quote_with_token(self, async_client, property_group):
+        source = await Source.objects.filter(group=property_group).afirst()
+        token = await Token.objects.acreate(user_id=property_group.owner_id)
+        response = await async_client.get(
+            reverse("api:async-source-random-quote", kwargs={"source": source.slug}),
+            headers={"Authorization": f"Token {token.key}"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["source"]["slug"] == source.slug
+
+    @pytest.mark.asyncio
+    async def test_authentication_required(self, async_client, property_group):
+        url = reverse("api:async-group-random-quote", kwargs={"group": property_group.slug})
+        sync_url = reverse("api:group-get-random-quote", kwargs={"group": property_group.slug})
+        for headers in [{}, {"Authorization": "Token nope"}]:
+            response = await async_client.get(url, headers=headers)
+            sync_response = await async_client.get(sync_url, headers=headers)
+            assert response.status_code == sync_response.status_code == status.HTTP_403_FORBIDDEN
+            assert response.json() == sync_response.json()
+
+    @pytest.mark.asyncio
+    async def test_api_view_class_checks_apply(self, async_rf, property_group):
+        class OnceThrottle(SimpleRateThrottle):
+            rate = "1/min"
+
+            def get_cache_key(self, request, view):
+                return "test-async-throttle"
+
+        class PublicOnlyView(SourceRandomQuoteView):
+            api_view_class = type(
+                "ThrottledAPIView", (APIView,), {"permission_classes": [AllowAny], "throttle_classes": [OnceThrottle]}
+            )
+
+        source = await Source.objects.filter(group=property_group).afirst()
+        view = PublicOnlyView.as_view()
+        response = await view(async_rf.get("/ignorethisurl/"), source=source.slug)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        await Source.objects.filter(pk=source.pk).aupdate(public=True)
+        response = await view(async_rf.get("/ignorethisurl/"), source=source.slug)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @pytest.mark.asyncio
+    async def test_private_and_empty_objects(self, async_client, property_group):
+        user = await User.objects.acreate(username="async_stranger")
+        await async_client.aforce_login(user)
+        response = await async_client.get(
+            reverse("api:async-group-random-quote", kwargs={"group": property_group.slug})
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        group = await SourceGroup.objects.acreate(name="Nothing here", owner=user)
+        response = await async_client.get(reverse("api:async-group-random-quote", kwargs={"group": group.slug}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {"error": "No quotes found."}
+
+    @pytest.mark.asyncio
+    async def test_generate_sentence(self, async_client, property_group):
+        await async_client.aforce_login(await User.objects.aget(pk=property_group.owner_id))
+        response = await async_client.get(
+            reverse("api:async-group-generate-sentence", kwargs={"group": property_group.slug})
+        )
+        assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
+        markov_source = await Source.objects.filter(group=property_group, allow_markov=True).afirst()
+        response = await async_client.get(
+            reverse("api:async-source-generate-sentence", kwargs={"source": markov_source.slug})
+        )
+        assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
+        source = await Source.objects.filter(group=property_group, allow_markov=False).afirst()
+        response = await async_client.get(reverse("api:async-source-generate-sentence", kwargs={"source": source.slug}))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_views_must_implement_respond(self):
+        class IncompleteView(AsyncReadView):
+            model = Source
+            lookup_url_kwarg = "source"
+
+        with pytest.raises(TypeError):
+            IncompleteView()
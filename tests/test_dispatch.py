@@ -0,0 +1,82 @@
+# test_dispatch.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import json
+import threading
+
+import pytest
+from django.db import transaction
+
+from django_quotes.dispatch import dispatch, run_task
+from django_quotes.models import Quote, Source
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+enqueued: list[tuple[str, list, dict]] = []
+
+
+def enqueue(path, args, kwargs):
+    enqueued.append((path, args, kwargs))
+
+
+@pytest.fixture
+def external_backend(settings):
+    settings.QUOTES_TASK_BACKEND = "tests.test_dispatch.enqueue"
+    enqueued.clear()
+    yield enqueued
+    enqueued.clear()
+
+
+def test_inline_backend_runs_right_away():
+    calls = []
+    dispatch(calls.append, 1)
+    assert calls == [1]
+
+
+def test_thread_backend_runs_after_commit(settings):
+    settings.QUOTES_TASK_BACKEND = "thread"
+    ran = threading.Event()
+    with transaction.atomic():
+        dispatch(ran.set)
+        assert not ran.is_set()
+    assert ran.wait(timeout=5)
+
+
+def test_thread_backend_logs_failures(settings, mocker):
+    settings.QUOTES_TASK_BACKEND = "thread"
+    failed = threading.Event()
+    mocker.patch("django_quotes.dispatch.logger.exception", side_effect=lambda *_: failed.set())
+
+    def explode():
+        msg = "Boom"
+        raise RuntimeError(msg)
+
+    dispatch(explode)
+    assert failed.wait(timeout=5)
+
+
+def test_external_backend_enqueues_serializable_tasks(property_group, external_backend):
+    source = Source.objects.filter(group=property_group)[0]
+    with transaction.atomic():
+        source.get_random_quotes(2)
+        assert external_backend == []
+    assert len(external_backend) == 1
+    path, args, kwargs = external_backend[0]
+    assert path == "django_quotes.tasks.record_retrieval_stats"
+    args = json.loads(json.dumps(args))
+    run_task(path, args, kwargs)
+    assert source.stats.quotes_requested == 2
+    assert Quote.objects.filter(source=source, times_used=1).count() == 2
+
+
+def test_quote_save_dispatches_markov_update(property_group, external_backend, settings):
+    quote = Quote.objects.filter(source__group=property_group)[0]
+    quote.save()
+    assert external_backend == []
+    settings.UPDATE_MARKOV_ON_QUOTE_SAVE = True
+    quote.save()
+    assert external_backend == [("django_quotes.tasks.update_markov_models_for_quote", [quote.pk], {})]
@@ -0,0 +1,81 @@
+# test_leaderboards.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+from datetime import UTC, datetime
+
+import pytest
+from django.core.cache import cache
+
+from django_quotes.leaderboards import get_top_quotes, get_top_sources, leaderboard_cache_key
+from django_quotes.models import Quote, Source
+from django_quotes.stats import write_retrieval_counts
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def count_retrievals(quote, times):
+    write_retrieval_counts({quote.source.group_id: times}, {quote.source_id: times}, {quote.pk: times})
+
+
+def test_top_quotes_built_on_first_read(property_group, django_assert_max_num_queries):
+    source = Source.objects.filter(group=property_group)[0]
+    first, second, third = Quote.objects.filter(source=source)[:3]
+    count_retrievals(first, 2)
+    count_retrievals(second, 5)
+    count_retrievals(third, 1)
+    Quote.objects.filter(pk=third.pk).update(published=False)
+    assert [entry["quote"] for entry in get_top_quotes("source", source.pk)] == [second, first]
+    assert [entry["times_used"] for entry in get_top_quotes("group", property_group.pk, 1)] == [5]
+    with django_assert_max_num_queries(1):
+        get_top_quotes("source", source.pk)
+
+
+def test_top_sources(property_group):
+    first, second = Source.objects.filter(group=property_group)[:2]
+    count_retrievals(Quote.objects.filter(source=first)[0], 1)
+    count_retrievals(Quote.objects.filter(source=second)[0], 3)
+    assert [(entry["source"], entry["quotes_requested"]) for entry in get_top_sources(property_group.pk)] == [
+        (second, 3),
+        (first, 1),
+    ]
+
+
+def test_cached_leaderboards_follow_new_counts(property_group, settings):
+    settings.LEADERBOARD_SIZE = 2
+    first, second = Source.objects.filter(group=property_group)[:2]
+    quotes = list(Quote.objects.filter(source=first)[:3])
+    count_retrievals(quotes[0], 3)
+    count_retrievals(quotes[1], 2)
+    count_retrievals(Quote.objects.filter(source=second)[0], 1)
+    get_top_quotes("source", first.pk)
+    get_top_sources(property_group.pk)
+    count_retrievals(quotes[2], 4)
+    assert cache.get(leaderboard_cache_key("quotes", "source", first.pk)) == [[quotes[2].pk, 4], [quotes[0].pk, 3]]
+    assert cache.get(leaderboard_cache_key("sources", "group", property_group.pk)) == [[first.pk, 9], [second.pk, 1]]
+    # The group leaderboard of quotes was never read, so it is not kept up to date.
+    assert cache.get(leaderboard_cache_key("quotes", "group", property_group.pk)) is None
+
+
+def test_uncached_leaderboards_cost_no_queries(property_group, django_assert_num_queries, settings, mocker):
+    settings.STATS_SHARDS = 1
+    mocker.patch("django_quotes.stats.timezone.now", return_value=datetime(2026, 5, 4, 12, 30, tzinfo=UTC))
+    quote = Quote.objects.filter(source__group=property_group).select_related("source")[0]
+    count_retrievals(quote, 1)
+    # BEGIN, one UPDATE for each of the six tables, COMMIT, and only a cache lookup for the leaderboards.
+    with django_assert_num_queries(8):
+        count_retrievals(quote, 1)
+
+
+def test_deleting_quotes_invalidates_leaderboards(property_group):
+    source = Source.objects.filter(group=property_group)[0]
+    quote = Quote.objects.filter(source=source)[0]
+    count_retrievals(quote, 1)
+    assert len(get_top_quotes("source", source.pk)) == 1
+    quote.delete()
+    assert get_top_quotes("source", source.pk) == []
+    source.delete()
+    assert cache.get(leaderboard_cache_key("quotes", "source", source.pk)) is None
@@ -5,13 +5,16 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from io import StringIO
 
 import pytest
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from django.utils import timezone
 
 from django_markov.models import MarkovTextModel
-from django_quotes.models import SourceGroup
+from django_quotes.models import Quote, SourceGroup
 
 pytestmark = pytest.mark.django_db(transaction=True)
 
@@ -35,3 +38,86 @@ def test_markov_command(property_group):
     assert char_modify < cmm.modified
     assert pgmm.data is not None
     assert cmm.data is not None
+
+
+def test_markov_command_filters(property_group):
+    source = property_group.source_set.filter(allow_markov=True)[0]
+    other_group = SourceGroup.objects.create(name="Elsewhere", owner=property_group.owner)
+    out = StringIO()
+    call_command("makemarkov", "--source", source.slug, stdout=out, stderr=StringIO())
+    assert f"Rebuilt source {source.slug} in" in out.getvalue()
+    assert f"Rebuilt group {property_group.slug} in" in out.getvalue()
+    assert "Updated models for 1 Character Groups and 1 Characters in" in out.getvalue()
+    out = StringIO()
+    call_command("makemarkov", "--group", other_group.slug, "--force", stdout=out, stderr=StringIO())
+    # The group has no sources to build its model from, so it is not counted as rebuilt.
+    assert "Updated models for 0 Character Groups and 0 Characters in" in out.getvalue()
+
+
+def test_markov_command_rejects_unknown_slugs(property_group):
+    source = property_group.source_set.first()
+    with pytest.raises(CommandError, match="nobody-here"):
+        call_command("makemarkov", "--source", source.slug, "--source", "nobody-here", stdout=StringIO())
+    with pytest.raises(CommandError, match="no-such-group"):
+        call_command("makemarkov", "--group", "no-such-group", stdout=StringIO())
+
+
+def test_markov_command_workers(property_group, mocker):
+    # The test database lives in memory, where other processes cannot see it, so the workers run in threads.
+    mocker.patch("django_quotes.management.commands.makemarkov.ProcessPoolExecutor", ThreadPoolExecutor)
+    other_group = SourceGroup.objects.create(name="Elsewhere", owner=property_group.owner)
+    out = StringIO()
+    call_command("makemarkov", "--workers", "2", "--force", stdout=out, stderr=StringIO())
+    assert "Updated models for 1 Character Groups and 5 Characters in" in out.getvalue()
+    assert f"Rebuilt group {property_group.slug} in" in out.getvalue()
+    assert f"Rebuilt group {other_group.slug} in" not in out.getvalue()
+
+
+def test_publish_command(property_group):
+    source = property_group.source_set.first()
+    quote = Quote.objects.create(
+        quote="Tomorrow, tomorrow, I love you tomorrow.",
+        source=source,
+        owner=property_group.owner,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    Quote.objects.filter(pk=quote.pk).update(pub_date=timezone.now() - timedelta(days=1))
+    out = StringIO()
+    call_command("publishquotes", stdout=out, stderr=StringIO())
+    assert "Published 1 scheduled quotes!" in out.getvalue()
+    quote.refresh_from_db()
+    assert quote.published
+
+
+def test_rollup_usage_command(property_group):
+    out = StringIO()
+    call_command("rollupusage", stdout=out, stderr=StringIO())
+    assert "Rolled up 0 hourly usage buckets and pruned 0 old buckets!" in out.getvalue()
+
+
+def test_reconcile_stats_command(property_group):
+    out = StringIO()
+    call_command("reconcilestats", "--chunk-size", "4", stdout=out, stderr=StringIO())
+    assert "Reconciled the stats of 1 groups, 10 sources, and 200 quotes!" in out.getvalue()
+    assert property_group.stats.quotes_requested == 0
+
+
+def test_benchmark_markov_command(property_group):
+    source = property_group.source_set.select_related("text_model").filter(allow_markov=True).first()
+    source.update_markov_model()
+    out = StringIO()
+    call_command("benchmarkmarkov", "--rounds", "1", stdout=out, stderr=StringIO())
+    assert f"Source {source.slug}:" in out.getvalue()
+    assert "Benchmarked 1 markov models!" in out.getvalue()
+
+
+def test_fill_sentence_pools_command(property_group, settings):
+    out = StringIO()
+    call_command("fillsentencepools", stdout=out, stderr=StringIO())
+    assert "Sentence pools are disabled" in out.getvalue()
+    settings.MARKOV_SENTENCE_POOL_SIZE = 3
+    source = property_group.source_set.select_related("text_model").filter(allow_markov=True).first()
+    source.update_markov_model()
+    out = StringIO()
+    call_command("fillsentencepools", "--char-limit", "0", stdout=out, stderr=StringIO())
+    assert "Filled 1 sentence pools with" in out.getvalue()
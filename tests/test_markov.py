@@ -0,0 +1,135 @@
+# test_markov.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import threading
+
+import pytest
+
+from django_markov.models import MarkovTextModel
+from django_quotes.chains import build_chain_data
+from django_quotes.markov import generate_sentence, make_sentences, markov_model_cache, run_markov_task
+from django_quotes.models import Source, SourceGroup
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def markov_sources(property_group):
+    markov_model_cache.clear()
+    sources = list(Source.objects.select_related("text_model").filter(group=property_group, allow_markov=True)[:2])
+    for source in sources:
+        source.update_markov_model()
+    yield sources
+    markov_model_cache.clear()
+
+
+def test_chains_are_cached_per_model_version(markov_sources, django_assert_num_queries):
+    source = markov_sources[0]
+    text_model = MarkovTextModel.objects.defer("data").get(pk=source.text_model_id)
+    assert markov_model_cache.get(text_model) is not None
+    assert markov_model_cache.info()["misses"] == 1
+    # A hit does not need the deferred data.
+    text_model = MarkovTextModel.objects.defer("data").get(pk=source.text_model_id)
+    with django_assert_num_queries(0):
+        assert markov_model_cache.get(text_model) is not None
+    assert markov_model_cache.info()["hits"] == 1
+    text_model.save()
+    markov_model_cache.get(text_model)
+    assert markov_model_cache.info()["misses"] == 2
+
+
+def test_least_recently_used_chains_are_evicted(markov_sources, settings):
+    first, second = (MarkovTextModel.objects.get(pk=source.text_model_id) for source in markov_sources)
+    settings.MARKOV_MODEL_CACHE_SIZE = max(len(first.data), len(second.data))
+    markov_model_cache.get(first)
+    markov_model_cache.get(second)
+    info = markov_model_cache.info()
+    assert info["entries"] == 1
+    assert info["size"] == len(second.data)
+    settings.MARKOV_MODEL_CACHE_SIZE = 0
+    markov_model_cache.clear()
+    assert markov_model_cache.get(first) is not None
+    assert markov_model_cache.info()["entries"] == 0
+
+
+def test_generate_sentence_records_stats(markov_sources):
+    source = markov_sources[0]
+    sentence = None
+    for _ in range(5):
+        sentence = generate_sentence(MarkovTextModel.objects.get(pk=source.text_model_id), char_limit=280, tries=50)
+        if sentence is not None:
+            break
+    assert isinstance(sentence, str)
+    assert source.get_stats().quotes_generated == 1
+
+
+def test_make_sentences_are_distinct_within_budget(markov_sources, mocker):
+    text_model = MarkovTextModel.objects.get(pk=markov_sources[0].text_model_id)
+    assert make_sentences(text_model, 5, tries=0) == []
+    chain = markov_model_cache.get(text_model)
+    mocker.patch.object(chain, "make_sentence", side_effect=["One.", None, "One.", "Two.", "Three."])
+    assert make_sentences(text_model, 2, tries=5) == ["One.", "Two."]
+    assert chain.make_sentence.call_count == 4
+
+
+def test_batch_sentences_record_stats_once(markov_sources, django_assert_max_num_queries):
+    source = Source.objects.get(pk=markov_sources[0].pk)
+    sentences = source.get_markov_sentences(3, tries=50)
+    assert 0 < len(sentences) <= 3
+    assert len(set(sentences)) == len(sentences)
+    assert source.get_stats().quotes_generated == len(sentences)
+    group = SourceGroup.objects.select_related("text_model").get(pk=source.group_id)
+    group.update_markov_model()
+    sentences = group.generate_markov_sentences(3, tries=50)
+    assert 0 < len(sentences) <= 3
+    assert group.get_stats().quotes_generated == source.get_stats().quotes_generated + len(sentences)
+
+
+def test_batch_sentences_for_sources_not_ready(property_group):
+    source = Source.objects.filter(group=property_group, allow_markov=False)[0]
+    assert source.get_markov_sentences(3) == []
+    group = SourceGroup.objects.create(name="Empty", owner=property_group.owner)
+    assert group.generate_markov_sentences(3) == []
+
+
+def test_generate_sentence_from_empty_model(property_group):
+    assert generate_sentence(MarkovTextModel.objects.create()) is None
+
+
+@pytest.mark.asyncio
+async def test_source_sentences_reuse_cached_chain(markov_sources):
+    source = await Source.objects.aget(pk=markov_sources[0].pk)
+    await source.aget_markov_sentence(tries=50)
+    source = await Source.objects.aget(pk=markov_sources[0].pk)
+    await source.aget_markov_sentence(tries=50)
+    info = markov_model_cache.info()
+    assert info["misses"] == 1
+    assert info["hits"] >= 1
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("executor", "thread_prefix"), [("thread", "django-quotes-markov"), ("process", "asyncio"), ("inline", "Main")]
+)
+async def test_markov_tasks_run_off_the_event_loop(settings, executor, thread_prefix):
+    settings.MARKOV_EXECUTOR = executor
+    # Tasks that need the chains of this process stay in it, even with the process executor.
+    assert (await run_markov_task(current_thread_name, local=True)).startswith(thread_prefix)
+    assert await run_markov_task(build_chain_data, ["The cat sat on the mat."], 2, compiled=True)
+
+
+@pytest.mark.asyncio
+async def test_models_are_built_in_process_pool(property_group, settings):
+    settings.MARKOV_EXECUTOR = "process"
+    source = await Source.objects.select_related("text_model").filter(group=property_group, allow_markov=True).afirst()
+    await source.aupdate_markov_model()
+    await source.text_model.arefresh_from_db()
+    assert source.text_model.is_ready
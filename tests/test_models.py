@@ -9,11 +9,13 @@ from datetime import timedelta
 
 import pytest
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.utils import timezone
 
 from django_markov.text_models import POSifiedText
 from django_quotes.models import Quote, QuoteCorpusError, Source, SourceGroup
+from django_quotes.sampling import _pool_rows
+from django_quotes.stats import write_retrieval_counts
 
 User = get_user_model()
 
@@ -234,6 +236,37 @@ def test_add_quote_to_text_models_success(property_group):
     assert property_group.text_model.modified > old_group_modify
 
 
+def test_compiled_source_models_are_rebuilt_instead_of_combined(property_group, settings):
+    sources = (
+        property_group.source_set.select_related("text_model", "group", "group__text_model")
+        .prefetch_related("quote_set")
+        .filter(allow_markov=True)
+    )
+    Source.objects.filter(pk=sources[0].pk).update(store_compiled_model=True)
+    for source in sources:
+        source.update_markov_model()
+    assert sources[0].text_model.is_compiled_model
+    assert not sources[1].text_model.is_compiled_model
+    property_group.update_markov_model()
+    property_group.text_model.refresh_from_db()
+    assert not property_group.text_model.is_compiled_model
+    # The group follows the site default, unless it overrides it.
+    settings.STORE_COMPILED_MARKOV_MODELS = True
+    property_group.update_markov_model()
+    property_group.text_model.refresh_from_db()
+    assert property_group.text_model.is_compiled_model
+    # Adding a quote rebuilds the compiled models instead of failing to combine them.
+    source = sources[0]
+    old_source_modify = source.text_model.modified
+    old_group_modify = property_group.text_model.modified
+    source.add_new_quote_to_model(sources[1].quote_set.first())
+    source.text_model.refresh_from_db()
+    property_group.text_model.refresh_from_db()
+    assert source.text_model.modified > old_source_modify
+    assert property_group.text_model.modified > old_group_modify
+    assert property_group.text_model.is_compiled_model
+
+
 def test_add_quote_to_too_small_corpus(property_group):
     other_source = (
         property_group.source_set.select_related("text_model", "group", "group__text_model")
@@ -359,3 +392,129 @@ def test_add_blank_quote_fails(property_group):
     quote = Quote.objects.create(quote="", source=source, owner=source.owner)
     with pytest.raises(QuoteCorpusError):
         source.add_new_quote_to_model(quote)
+
+
+def test_get_random_quotes(property_group):
+    source = Source.objects.filter(group=property_group)[0]
+    quotes = source.get_random_quotes(5)
+    assert len(quotes) == 5
+    assert len({quote.pk for quote in quotes}) == 5
+    for quote in quotes:
+        quote.refresh_from_db()
+        assert quote.times_used == 1
+        assert quote.stats.times_used == 1
+    source.stats.refresh_from_db()
+    assert source.stats.quotes_requested == 5
+    noquote_source = Source.objects.create(group=property_group, name="No One", owner=property_group.owner)
+    assert noquote_source.get_random_quotes(5) == []
+
+
+def test_get_random_group_quotes(property_group, django_assert_max_num_queries, settings):
+    settings.MIRROR_QUOTE_USAGE_TO_STATS = False
+    settings.RECORD_USAGE_HISTORY = False
+    settings.STATS_SHARDS = 1
+    # The first write to the group and its sources creates their stats rows.
+    source_ids = property_group.source_set.values_list("pk", flat=True)
+    write_retrieval_counts({property_group.pk: 1}, dict.fromkeys(source_ids, 1), {})
+    # Build the pool, fetch the quotes, and BEGIN, three UPDATEs, and COMMIT for the stats.
+    with django_assert_max_num_queries(7):
+        quotes = property_group.get_random_quotes(10)
+    assert len({quote.pk for quote in quotes}) == 10
+    property_group.stats.refresh_from_db()
+    assert property_group.stats.quotes_requested == 11
+    assert sum(source.stats.quotes_requested for source in property_group.source_set.select_related("stats")) == 20
+    assert Quote.objects.filter(source__group=property_group, times_used=1).count() == 10
+    assert not Quote.objects.filter(source__group=property_group, stats__times_used__gt=0).exists()
+    noquote_group = SourceGroup.objects.create(name="I am no one.", owner=property_group.owner)
+    assert noquote_group.get_random_quotes(3) == []
+
+
+@pytest.mark.asyncio
+async def test_aget_random_quote(property_group):
+    source = await Source.objects.filter(group=property_group).afirst()
+    quote = await source.aget_random_quote()
+    assert isinstance(quote, Quote)
+    assert (await Quote.objects.aget(pk=quote.pk)).times_used == 1
+    group = await SourceGroup.objects.aget(pk=property_group.pk)
+    assert isinstance(await group.aget_random_quote(), Quote)
+    noquote_group = await SourceGroup.objects.acreate(name="I am no one.", owner_id=property_group.owner_id)
+    assert await noquote_group.aget_random_quote() is None
+
+
+@pytest.mark.asyncio
+async def test_agenerate_markov_sentences(property_group):
+    source = await Source.objects.filter(group=property_group, allow_markov=True).afirst()
+    assert isinstance(await source.aget_markov_sentence(tries=50), str)
+    group = await SourceGroup.objects.aget(pk=property_group.pk)
+    assert isinstance(await group.agenerate_markov_sentence(tries=50), str)
+    noquote_source = await Source.objects.acreate(
+        group=property_group, name="No One", owner_id=property_group.owner_id, allow_markov=True
+    )
+    assert await noquote_source.aget_markov_sentence() is None
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="Query plans are only checked against SQLite.")
+def test_query_plans_use_indexes(property_group):
+    source = Source.objects.filter(group=property_group).first()
+    listing_plan = Quote.objects.filter(source=source).order_by("-created").explain()
+    assert "quote_source_created_idx" in listing_plan
+    assert "TEMP B-TREE FOR ORDER BY" not in listing_plan
+    scheduled_plan = Quote.objects.filter(published=False, pub_date__lte=timezone.now()).explain()
+    assert "quote_scheduled_idx" in scheduled_plan
+    early_plan = Quote.objects.filter(published=True, pub_date__gt=timezone.now()).explain()
+    assert "quote_dated_published_idx" in early_plan
+    sources_plan = Source.objects.filter(group=property_group).order_by("name").explain()
+    assert "source_group_name_idx" in sources_plan
+    assert "TEMP B-TREE FOR ORDER BY" not in sources_plan
+    source_pool_plan = _pool_rows(Quote.objects.filter(source=source), 50).explain()
+    assert "quote_source_usage_idx" in source_pool_plan
+    assert "TEMP B-TREE FOR ORDER BY" not in source_pool_plan
+    group_pool_plan = _pool_rows(Quote.objects.filter(source__group=property_group), 50).explain()
+    assert "SCAN django_quotes_quote" not in group_pool_plan
+    for pool_plan in [source_pool_plan, group_pool_plan]:
+        assert "quotestats" not in pool_plan
+
+
+def test_save_keeps_times_used(property_group):
+    quote = Quote.objects.filter(source__group=property_group).first()
+    stale_quote = Quote.objects.get(pk=quote.pk)
+    Quote.objects.filter(pk=quote.pk).update(times_used=5)
+    stale_quote.citation = "Episode 1"
+    stale_quote.save()
+    quote.refresh_from_db()
+    assert quote.citation == "Episode 1"
+    assert quote.times_used == 5
+
+
+def test_save_of_deleted_quote_inserts_it_again(property_group):
+    quote = Quote.objects.filter(source__group=property_group).first()
+    Quote.objects.filter(pk=quote.pk).update(times_used=5)
+    quote.refresh_from_db()
+    Quote.objects.filter(pk=quote.pk).delete()
+    quote.save()
+    assert Quote.objects.get(pk=quote.pk).times_used == 5
+
+
+def test_copying_quote_keeps_times_used(property_group):
+    quote = Quote.objects.filter(source__group=property_group).first()
+    Quote.objects.filter(pk=quote.pk).update(times_used=5)
+    quote.refresh_from_db()
+    quote.pk = quote.id = None
+    quote.save()
+    assert quote.pk is not None
+    assert Quote.objects.filter(source__group=property_group, times_used=5).count() == 2
+
+
+def test_copying_group_keeps_markov_state(property_group):
+    SourceGroup.objects.filter(pk=property_group.pk).update(markov_dirty=False, markov_generation=3)
+    group = SourceGroup.objects.get(pk=property_group.pk)
+    group.pk = group.id = None
+    group.text_model = None
+    group.name = "Copied group"
+    group.slug = ""
+    group.save()
+    copy = SourceGroup.objects.get(pk=group.pk)
+    assert copy.pk != property_group.pk
+    assert copy.slug != property_group.slug
+    assert not copy.markov_dirty
+    assert copy.markov_generation == 3
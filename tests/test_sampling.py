@@ -0,0 +1,216 @@
+# test_sampling.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import random
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from django_quotes.models import Quote, Source
+from django_quotes.sampling import (
+    alias_cache_keys,
+    build_pool,
+    deal_quote_ids,
+    deck_cache_keys,
+    make_alias_table,
+    pick_quote_id,
+    pick_quote_ids,
+    pool_cache_key,
+)
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def pool_source(property_group):
+    return Source.objects.filter(group=property_group)[0]
+
+
+def test_build_pool_window_and_ceiling(pool_source):
+    quotes = Quote.objects.filter(source=pool_source)
+    pool = build_pool(quotes, 5)
+    assert len(pool["entries"]) == 5
+    assert pool["ceiling"] == 0
+    assert pool["window"] == 5
+    full_pool = build_pool(quotes, None)
+    assert len(full_pool["entries"]) == quotes.count()
+    assert full_pool["ceiling"] is None
+
+
+def test_build_pool_skips_unpublished_quotes(pool_source):
+    future_quote = Quote.objects.create(
+        source=pool_source,
+        owner=pool_source.owner,
+        quote="Not yet, not yet.",
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert not future_quote.published
+    pool = build_pool(Quote.objects.filter(source=pool_source), None)
+    assert future_quote.pk not in [quote_id for quote_id, _ in pool["entries"]]
+
+
+def test_cached_pool_pick_does_not_query(pool_source, django_assert_num_queries):
+    quotes = Quote.objects.filter(source=pool_source)
+    with django_assert_num_queries(1):
+        pick_quote_id("source", pool_source.pk, quotes, 10)
+    with django_assert_num_queries(0):
+        assert pick_quote_id("source", pool_source.pk, quotes, 10) is not None
+
+
+def test_used_quotes_leave_the_pool(pool_source):
+    quotes = Quote.objects.filter(source=pool_source)
+    picked = {pick_quote_id("source", pool_source.pk, quotes, 10) for _ in range(10)}
+    assert len(picked) == 10
+    assert cache.get(pool_cache_key("source", pool_source.pk))["entries"] == []
+
+
+def test_small_pools_keep_usage_counts(pool_source):
+    quotes = Quote.objects.filter(source=pool_source)
+    for _ in range(30):
+        pick_quote_id("source", pool_source.pk, quotes, None)
+    pool = cache.get(pool_cache_key("source", pool_source.pk))
+    assert len(pool["entries"]) == quotes.count()
+    assert sum(times_used for _, times_used in pool["entries"]) == 30
+
+
+def test_new_quote_invalidates_pool(pool_source):
+    pool_source.get_random_quote()
+    assert cache.get(pool_cache_key("source", pool_source.pk)) is not None
+    Quote.objects.create(source=pool_source, owner=pool_source.owner, quote="Fresh off the press.")
+    assert cache.get(pool_cache_key("source", pool_source.pk)) is None
+
+
+def test_group_pool_invalidated_by_quote_changes(property_group):
+    property_group.get_random_quote()
+    key = pool_cache_key("group", property_group.pk)
+    assert cache.get(key) is not None
+    quote = Quote.objects.filter(source__group=property_group).first()
+    quote.pub_date = timezone.now() + timedelta(days=1)
+    quote.save()
+    assert cache.get(key) is None
+    property_group.get_random_quote()
+    assert quote.pk not in [quote_id for quote_id, _ in cache.get(key)["entries"]]
+
+
+def test_group_pool_invalidated_by_source_delete(property_group):
+    property_group.get_random_quote()
+    key = pool_cache_key("group", property_group.pk)
+    source = Source.objects.filter(group=property_group).first()
+    source.delete()
+    assert cache.get(key) is None
+
+
+def test_shuffle_mode_deals_every_quote_once(pool_source, settings):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "shuffle"
+    quotes = Quote.objects.filter(source=pool_source)
+    total = quotes.count()
+    dealt = [pool_source.get_random_quote().pk for _ in range(total)]
+    assert sorted(dealt) == sorted(quotes.values_list("pk", flat=True))
+    assert cache.get(pool_cache_key("source", pool_source.pk)) is None
+    _, cursor_key = deck_cache_keys("source", pool_source.pk)
+    assert cache.get(cursor_key) == total
+    pool_source.get_random_quote()
+    assert cache.get(cursor_key) == 1
+
+
+def test_shuffle_mode_batches(property_group, settings):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "shuffle"
+    first = property_group.get_random_quotes(150)
+    second = property_group.get_random_quotes(50)
+    assert len({quote.pk for quote in first + second}) == 200
+    assert property_group.get_random_quotes(10)
+
+
+def test_shuffle_mode_deals_the_rest_of_the_deck_first(pool_source, settings):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "shuffle"
+    quotes = Quote.objects.filter(source=pool_source)
+    total = quotes.count()
+    assert total % 3
+    deck_key, cursor_key = deck_cache_keys("source", pool_source.pk)
+    dealt = []
+    for _ in range(total // 3):
+        dealt += deal_quote_ids("source", pool_source.pk, quotes, 3)
+    old_deck = cache.get(deck_key)["ids"]
+    # The deck runs out in the middle of this deal, which is completed from a new deck.
+    batch = deal_quote_ids("source", pool_source.pk, quotes, 3)
+    tail = old_deck[len(dealt) :]
+    assert batch[: len(tail)] == tail
+    assert sorted(dealt + tail) == sorted(quotes.values_list("pk", flat=True))
+    assert len(set(batch)) == 3
+    assert cache.get(cursor_key) == 3 - len(tail)
+    assert cache.get(deck_key)["ids"][: 3 - len(tail)] == batch[len(tail) :]
+
+
+def test_shuffle_mode_deck_invalidated(pool_source, settings):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "shuffle"
+    pool_source.get_random_quote()
+    deck_key, cursor_key = deck_cache_keys("source", pool_source.pk)
+    assert cache.get(deck_key) is not None
+    Quote.objects.create(source=pool_source, owner=pool_source.owner, quote="Fresh off the press.")
+    assert cache.get(deck_key) is None
+    assert cache.get(cursor_key) is None
+    assert deal_quote_ids("source", pool_source.pk, Quote.objects.filter(source=pool_source), 3)
+
+
+def test_alias_table_matches_weights():
+    weights = [1.0, 1 / 2, 1 / 3, 1 / 11, 1 / 1001]
+    prob, alias = make_alias_table(weights)
+    share = [0.0] * len(weights)
+    for column, keep in enumerate(prob):
+        share[column] += keep / len(weights)
+        share[alias[column]] += (1 - keep) / len(weights)
+    for index, weight in enumerate(weights):
+        assert share[index] == pytest.approx(weight / sum(weights))
+
+
+def test_weighted_mode_prefers_unused_quotes(pool_source, settings):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "weighted"
+    fresh_quote = Quote.objects.filter(source=pool_source).first()
+    Quote.objects.filter(source=pool_source).exclude(pk=fresh_quote.pk).update(times_used=1000)
+    random.seed(1234)
+    picks = Counter(pool_source.get_random_quote().pk for _ in range(20))
+    assert picks.most_common(1)[0] == (fresh_quote.pk, picks[fresh_quote.pk])
+    assert picks[fresh_quote.pk] > 10
+
+
+def test_weighted_mode_rebuilds_after_drift(pool_source, settings, django_assert_num_queries):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "weighted"
+    settings.RANDOM_QUOTE_WEIGHT_DRIFT = 0.1
+    quotes = Quote.objects.filter(source=pool_source)
+    with django_assert_num_queries(1):
+        pick_quote_id("source", pool_source.pk, quotes, None)
+    with django_assert_num_queries(0):
+        pick_quote_id("source", pool_source.pk, quotes, None)
+    with django_assert_num_queries(1):
+        pick_quote_id("source", pool_source.pk, quotes, None)
+    _, picks_key = alias_cache_keys("source", pool_source.pk)
+    assert cache.get(picks_key) == 1
+    batch = pick_quote_ids("source", pool_source.pk, quotes, None, 15)
+    assert len(set(batch)) == 15
+    assert sorted(pick_quote_ids("source", pool_source.pk, quotes, None, 50)) == sorted(
+        quotes.values_list("pk", flat=True)
+    )
+
+
+def test_weighted_mode_table_invalidated(pool_source, settings):
+    settings.RANDOM_QUOTE_SELECTION_MODE = "weighted"
+    pool_source.get_random_quote()
+    table_key, _ = alias_cache_keys("source", pool_source.pk)
+    assert len(cache.get(table_key)["ids"]) == 20
+    Quote.objects.create(source=pool_source, owner=pool_source.owner, quote="Fresh off the press.")
+    assert cache.get(table_key) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["least_used", "shuffle", "weighted"])
+async def test_async_picks(pool_source, settings, mode):
+    settings.RANDOM_QUOTE_SELECTION_MODE = mode
+    picked = {(await pool_source.aget_random_quote()).pk for _ in range(3)}
+    assert picked <= {quote.pk async for quote in Quote.objects.filter(source=pool_source)}
@@ -0,0 +1,102 @@
+# test_sentences.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import pytest
+from django.core.cache import cache
+
+from django_quotes.models import Source, SourceGroup
+from django_quotes.sentences import fill_sentence_pool, sentence_pool_cache_keys, take_sentence
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def pooled_source(property_group, settings):
+    settings.MARKOV_SENTENCE_POOL_SIZE = 4
+    source = Source.objects.select_related("text_model", "group").filter(group=property_group, allow_markov=True)[0]
+    source.update_markov_model()
+    for scope, pk in [("source", source.pk), ("group", property_group.pk)]:
+        cache.delete_many(list(sentence_pool_cache_keys(scope, pk)))
+    return source
+
+
+def test_pools_are_disabled_by_default(pooled_source, settings):
+    settings.MARKOV_SENTENCE_POOL_SIZE = 0
+    assert take_sentence("source", pooled_source.pk) is None
+    assert cache.get(sentence_pool_cache_keys("source", pooled_source.pk)[0]) is None
+
+
+def test_empty_pool_falls_back_to_live_generation(pooled_source):
+    pool_key = sentence_pool_cache_keys("source", pooled_source.pk)[0]
+    # The inline backend refills the pool right away, and the sentence is still generated live.
+    assert isinstance(pooled_source.get_markov_sentence(tries=50), str)
+    pool = cache.get(pool_key)
+    assert pool
+    source = Source.objects.get(pk=pooled_source.pk)
+    assert source.get_markov_sentence() == pool[0]
+    assert source.get_stats().quotes_generated == 2
+
+
+def test_inline_backend_refills_in_request(pooled_source):
+    pool_key, cursor_key, _ = sentence_pool_cache_keys("source", pooled_source.pk)
+    cache.set_many({pool_key: ["One.", "Two.", "Three.", "Four."], cursor_key: 0})
+    assert take_sentence("source", pooled_source.pk) == "One."
+    assert take_sentence("source", pooled_source.pk) == "Two."
+    pool = cache.get(pool_key)
+    assert pool != ["One.", "Two.", "Three.", "Four."]
+    assert take_sentence("source", pooled_source.pk) == pool[0]
+
+
+def test_pool_is_refilled_once_half_used(pooled_source, mocker):
+    pool_key, cursor_key, _ = sentence_pool_cache_keys("source", pooled_source.pk)
+    cache.set_many({pool_key: ["One.", "Two.", "Three.", "Four."], cursor_key: 0})
+    dispatch = mocker.patch("django_quotes.sentences.dispatch")
+    assert take_sentence("source", pooled_source.pk) == "One."
+    dispatch.assert_not_called()
+    assert take_sentence("source", pooled_source.pk) == "Two."
+    dispatch.assert_called_once_with(fill_sentence_pool, "source", pooled_source.pk, 280)
+    # Only one refill is dispatched at a time.
+    assert take_sentence("source", pooled_source.pk) == "Three."
+    dispatch.assert_called_once()
+
+
+def test_sentences_must_fit_the_limit(pooled_source):
+    pool_key, cursor_key, refill_key = sentence_pool_cache_keys("source", pooled_source.pk)
+    cache.set_many({pool_key: ["A rather long sentence.", "Short."], cursor_key: 0, refill_key: True})
+    assert take_sentence("source", pooled_source.pk, char_limit=10) is None
+    # The sentence that did not fit is left for the next request.
+    assert take_sentence("source", pooled_source.pk) == "A rather long sentence."
+    assert take_sentence("source", pooled_source.pk, char_limit=10) == "Short."
+
+
+def test_fill_group_pool(pooled_source):
+    group = SourceGroup.objects.select_related("text_model").get(pk=pooled_source.group_id)
+    group.update_markov_model()
+    assert fill_sentence_pool("group", group.pk, tries=50) > 0
+    sentence = cache.get(sentence_pool_cache_keys("group", group.pk)[0])[0]
+    assert SourceGroup.objects.get(pk=group.pk).generate_markov_sentence() == sentence
+
+
+def test_disabling_markov_discards_pool(pooled_source):
+    pool_key = sentence_pool_cache_keys("source", pooled_source.pk)[0]
+    assert fill_sentence_pool("source", pooled_source.pk, tries=50) > 0
+    pooled_source.allow_markov = False
+    pooled_source.save()
+    assert cache.get(pool_key) is None
+    assert pooled_source.get_markov_sentence() is None
+
+
+@pytest.mark.asyncio
+async def test_async_sentences_are_taken_from_pool(pooled_source):
+    pool_key, cursor_key, refill_key = sentence_pool_cache_keys("source", pooled_source.pk)
+    await cache.aset_many({pool_key: ["One.", "Two.", "Three.", "Four."], cursor_key: 0, refill_key: True})
+    source = await Source.objects.aget(pk=pooled_source.pk)
+    assert await source.aget_markov_sentence() == "One."
+    group = await SourceGroup.objects.aget(pk=pooled_source.group_id)
+    group_pool_key, group_cursor_key, group_refill_key = sentence_pool_cache_keys("group", group.pk)
+    await cache.aset_many({group_pool_key: ["Five."], group_cursor_key: 0, group_refill_key: True})
+    assert await group.agenerate_markov_sentence() == "Five."
@@ -18,7 +18,8 @@ from django_quotes.models import (
     SourceGroup,
     SourceStats,
 )
-from django_quotes.signals import quote_random_retrieved
+from django_quotes.signals import quote_random_retrieved, quotes_random_retrieved
+from django_quotes.stats import write_generation_counts
 
 User = get_user_model()
 
@@ -88,17 +89,31 @@ def test_group_creation_creates_markov_model(user: User) -> None:
     assert group.text_model
 
 
-def test_source_group_creation_generates_stats_object(user: User) -> None:
+def test_stats_objects_are_created_lazily(user: User) -> None:
     """
-    Test that the creation of either a source group or source creates its related
-    stats object.
+    Test that stats objects are only created by the first write to them, and read as zero until then.
     """
     group = SourceGroup.objects.create(name="Monkey", owner=user)
-    assert GroupStats.objects.get(group=group)
     source = Source.objects.create(name="Curious George", group=group, owner=user)
-    assert SourceStats.objects.get(source=source)
-    quote = Quote.objects.create(quote="I'm all a twitter.", source=source, owner=user)
-    assert QuoteStats.objects.get(quote=quote)
+    Quote.objects.bulk_create(
+        [Quote(quote=f"Banana number {number}.", source=source, owner=user) for number in range(3)]
+    )
+    assert not GroupStats.objects.filter(group=group).exists()
+    assert not SourceStats.objects.filter(source=source).exists()
+    assert not QuoteStats.objects.filter(quote__source=source).exists()
+    assert group.get_stats().quotes_requested == 0
+    assert source.get_stats().quotes_generated == 0
+    # The stats accessors return unsaved stats too, rather than raising DoesNotExist.
+    assert group.stats.pk is None
+    assert group.stats.quotes_requested == 0
+    assert source.stats.quotes_requested == 0
+    assert Quote.objects.filter(source=source)[0].stats.times_used == 0
+    quote = source.get_random_quote()
+    assert QuoteStats.objects.get(quote=quote).times_used == 1
+    assert GroupStats.objects.get(group=group).quotes_requested == 1
+    assert SourceStats.objects.get(source=source).quotes_requested == 1
+    assert Source.objects.get(pk=source.pk).get_stats().quotes_requested == 1
+    assert Source.objects.get(pk=source.pk).stats.pk is not None
 
 
 @pytest.fixture
@@ -126,21 +141,31 @@ def test_quote_retrieve_stat_signal(statable_source):
     Test that stat are updated correctly when the signal is fired.
     :param statable_source: An instance of Source with stat objects attached
     """
-    char_quotes_requested = statable_source.stats.quotes_requested
-    group_quotes_requested = statable_source.group.stats.quotes_requested
+    char_quotes_requested = statable_source.get_stats().quotes_requested
+    group_quotes_requested = statable_source.group.get_stats().quotes_requested
     quote = statable_source.quote_set.all()[0]
-    quote_usage = quote.stats.times_used
+    quote_usage = quote.times_used
     quote_random_retrieved.send(Source, instance=statable_source, quote_retrieved=quote)
     statable_source.refresh_from_db()
     quote.refresh_from_db()
     assert char_quotes_requested < statable_source.stats.quotes_requested
     assert group_quotes_requested < statable_source.group.stats.quotes_requested
-    assert quote_usage < quote.stats.times_used
+    assert quote_usage < quote.times_used
+    assert quote.stats.times_used == quote.times_used
+
+
+def test_quote_batch_stat_signal(statable_source):
+    quotes = list(statable_source.quote_set.select_related("stats"))
+    quotes_random_retrieved.send(SourceGroup, instance=statable_source.group, quotes_retrieved=quotes)
+    statable_source.refresh_from_db()
+    assert statable_source.stats.quotes_requested == 3
+    assert statable_source.group.stats.quotes_requested == 3
+    assert all(quote.stats.times_used == 1 for quote in statable_source.quote_set.select_related("stats"))
 
 
 def test_markov_stat_signal(statable_source):
-    char_quotes_generated = statable_source.stats.quotes_generated
-    group_quotes_generated = statable_source.group.stats.quotes_generated
+    char_quotes_generated = statable_source.get_stats().quotes_generated
+    group_quotes_generated = statable_source.group.get_stats().quotes_generated
     sentence_generated.send(
         MarkovTextModel, instance=statable_source.text_model, char_limit=280, sentence="We all go mad sometimes."
     )
@@ -166,3 +191,30 @@ def test_delete_orphaned_text_models(property_group):
     source.delete()
     with pytest.raises(ObjectDoesNotExist):
         MarkovTextModel.objects.get(pk=model_id)
+
+
+def test_markov_stat_signal_uses_cached_owner(statable_source, django_assert_num_queries, settings):
+    settings.RECORD_USAGE_HISTORY = False
+    settings.STATS_SHARDS = 1
+    # The first write to the group and source creates their stats rows.
+    write_generation_counts(statable_source.group_id, statable_source.pk)
+    text_model = statable_source.text_model
+    # BEGIN, one UPDATE each for the group and source shards, and COMMIT.
+    with django_assert_num_queries(4):
+        sentence_generated.send(MarkovTextModel, instance=text_model, char_limit=280, sentence="Bananas!")
+    group_text_model = SourceGroup.objects.select_related("text_model").get(pk=statable_source.group_id).text_model
+    with django_assert_num_queries(3):
+        sentence_generated.send(MarkovTextModel, instance=group_text_model, char_limit=280, sentence="Bananas!")
+    statable_source.refresh_from_db()
+    assert statable_source.stats.quotes_generated == 2
+    assert statable_source.group.stats.quotes_generated == 3
+
+
+def test_markov_stat_signal_looks_up_owner(statable_source):
+    group_text_model = MarkovTextModel.objects.get(sourcegroup=statable_source.group)
+    sentence_generated.send(MarkovTextModel, instance=group_text_model, char_limit=280, sentence="Bananas!")
+    source_text_model = MarkovTextModel.objects.get(source=statable_source)
+    sentence_generated.send(MarkovTextModel, instance=source_text_model, char_limit=280, sentence="Bananas!")
+    statable_source.refresh_from_db()
+    assert statable_source.stats.quotes_generated == 1
+    assert statable_source.group.stats.quotes_generated == 2
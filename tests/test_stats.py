@@ -0,0 +1,210 @@
+# test_stats.py
+#
+# Copyright (c) 2026 Daniel Andrlik
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from django.db import transaction
+
+from django_quotes.models import (
+    GroupStats,
+    GroupStatsShard,
+    GroupUsageBucket,
+    Quote,
+    QuoteStats,
+    Source,
+    SourceGroup,
+    SourceStatsShard,
+)
+from django_quotes.stats import StatsBuffer, reconcile_stats, write_generation_counts, write_retrieval_counts
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def buffered_stats(settings, mocker):
+    settings.BUFFER_QUOTE_STATS = True
+    settings.QUOTE_STATS_BUFFER_SIZE = 25
+    settings.QUOTE_STATS_FLUSH_INTERVAL = 600
+    # A buffer without the background thread, so the tests decide when it flushes.
+    buffer = StatsBuffer()
+    mocker.patch.object(buffer, "_start")
+    mocker.patch("django_quotes.stats.stats_buffer", buffer)
+    yield buffer
+    buffer.flush()
+
+
+def test_write_retrieval_counts_uses_one_update_per_table(
+    property_group, django_assert_max_num_queries, settings, mocker
+):
+    settings.STATS_SHARDS = 1
+    mocker.patch("django_quotes.stats.timezone.now", return_value=datetime(2026, 5, 4, 12, 30, tzinfo=UTC))
+    sources = list(Source.objects.filter(group=property_group)[:2])
+    quotes = list(Quote.objects.filter(source__in=sources).order_by("pk")[:3])
+    # The first write creates the stats rows and the usage buckets of the hour.
+    write_retrieval_counts(
+        {property_group.pk: 1}, {sources[0].pk: 1, sources[1].pk: 1}, Counter(quote.pk for quote in quotes)
+    )
+    # BEGIN, one UPDATE for each of the six tables, and COMMIT.
+    with django_assert_max_num_queries(8):
+        write_retrieval_counts(
+            {property_group.pk: 6},
+            {sources[0].pk: 4, sources[1].pk: 2},
+            Counter({quotes[0].pk: 1, quotes[1].pk: 2, quotes[2].pk: 3}),
+        )
+    property_group.stats.refresh_from_db()
+    assert property_group.stats.quotes_requested == 7
+    assert [source.stats.quotes_requested for source in Source.objects.filter(pk__in=[s.pk for s in sources])] == [5, 3]
+    assert list(
+        Quote.objects.filter(pk__in=[q.pk for q in quotes]).order_by("pk").values_list("times_used", flat=True)
+    ) == [2, 3, 4]
+    assert sorted(QuoteStats.objects.filter(times_used__gt=0).values_list("times_used", flat=True)) == [2, 3, 4]
+
+
+def test_buffered_retrievals_are_written_on_flush(property_group, buffered_stats, django_assert_num_queries):
+    source = Source.objects.filter(group=property_group)[0]
+    for _ in range(5):
+        source.get_random_quote()
+    property_group.get_random_quotes(5)
+    assert buffered_stats.pending == 10
+    assert property_group.get_stats().quotes_requested == 0
+    assert buffered_stats.flush() == 10
+    assert property_group.get_stats().quotes_requested == 10
+    assert sum(Quote.objects.filter(source__group=property_group).values_list("times_used", flat=True)) == 10
+    with django_assert_num_queries(0):
+        assert buffered_stats.flush() == 0
+
+
+def test_full_buffer_is_flushed(property_group, buffered_stats):
+    property_group.get_random_quotes(20)
+    assert buffered_stats.pending == 20
+    property_group.get_random_quotes(5)
+    # The retrieval only wakes up the flusher, which writes the buffer on its own connection.
+    assert buffered_stats.pending == 25
+    assert buffered_stats._flush_when_due() == 25
+    assert buffered_stats.pending == 0
+    property_group.stats.refresh_from_db()
+    assert property_group.stats.quotes_requested == 25
+
+
+def test_rolled_back_request_keeps_buffered_counts(property_group, buffered_stats):
+    property_group.get_random_quotes(20)
+    with pytest.raises(RuntimeError), transaction.atomic():
+        property_group.get_random_quotes(5)
+        raise RuntimeError
+    assert buffered_stats.pending == 25
+    assert buffered_stats.flush() == 25
+    assert property_group.get_stats().quotes_requested == 25
+
+
+def test_failed_flush_keeps_counts(property_group, buffered_stats, mocker):
+    property_group.get_random_quote()
+    mocker.patch("django_quotes.stats.write_retrieval_counts", side_effect=RuntimeError("Database went away"))
+    assert buffered_stats.flush() == 0
+    assert buffered_stats.pending == 1
+
+
+def test_counters_are_spread_over_shards(property_group):
+    assert not GroupStatsShard.objects.filter(group=property_group).exists()
+    for _ in range(40):
+        write_retrieval_counts({property_group.pk: 1}, {}, {})
+    assert GroupStatsShard.objects.filter(group=property_group, quotes_requested__gt=0).count() > 1
+    property_group.stats.refresh_from_db()
+    assert property_group.stats.quotes_requested == 40
+
+
+def test_missing_shards_are_created(property_group, settings):
+    source = Source.objects.filter(group=property_group)[0]
+    settings.STATS_SHARDS = 64
+    for _ in range(20):
+        write_generation_counts(property_group.pk, source.pk)
+    assert GroupStatsShard.objects.filter(group=property_group).count() > 8
+    assert source.stats.quotes_generated == 20
+    property_group.stats.refresh_from_db()
+    assert property_group.stats.quotes_generated == 20
+
+
+def test_writes_skip_deleted_owners(property_group, settings):
+    settings.STATS_SHARDS = 64
+    doomed = SourceGroup.objects.create(name="Doomed", owner=property_group.owner)
+    doomed_pk = doomed.pk
+    doomed.delete()
+    for _ in range(10):
+        write_retrieval_counts({property_group.pk: 1, doomed_pk: 1}, {}, {})
+    assert not GroupStatsShard.objects.filter(group_id=doomed_pk).exists()
+    property_group.stats.refresh_from_db()
+    assert property_group.stats.quotes_requested == 10
+
+
+def test_summed_counters_are_cached(property_group, settings, django_assert_num_queries):
+    settings.STATS_CACHE_TIMEOUT = 60
+    source = Source.objects.filter(group=property_group)[0]
+    assert source.get_stats().quotes_requested == 0
+    write_retrieval_counts({}, {source.pk: 3}, {})
+    assert SourceStatsShard.objects.filter(source=source, quotes_requested=3).exists()
+    stats = Source.objects.select_related("stats").get(pk=source.pk).stats
+    with django_assert_num_queries(0):
+        assert stats.quotes_requested == 0
+        assert stats.quotes_generated == 0
+
+
+def test_usage_is_recorded_per_hour(property_group, mocker):
+    now = mocker.patch("django_quotes.stats.timezone.now", return_value=datetime(2026, 5, 4, 10, 15, tzinfo=UTC))
+    source = Source.objects.filter(group=property_group)[0]
+    write_retrieval_counts({property_group.pk: 2}, {source.pk: 2}, {})
+    write_generation_counts(property_group.pk, source.pk)
+    now.return_value = datetime(2026, 5, 4, 11, 45, tzinfo=UTC)
+    write_retrieval_counts({property_group.pk: 3}, {source.pk: 3}, {})
+    assert set(GroupUsageBucket.objects.filter(group=property_group).values_list("start", flat=True)) == {
+        datetime(2026, 5, 4, 10, tzinfo=UTC),
+        datetime(2026, 5, 4, 11, tzinfo=UTC),
+    }
+    since = datetime(2026, 5, 4, tzinfo=UTC)
+    until = datetime(2026, 5, 5, tzinfo=UTC)
+    assert property_group.get_usage_series("hour", since, until) == [
+        {"start": datetime(2026, 5, 4, 10, tzinfo=UTC), "quotes_requested": 2, "quotes_generated": 1},
+        {"start": datetime(2026, 5, 4, 11, tzinfo=UTC), "quotes_requested": 3, "quotes_generated": 0},
+    ]
+    assert source.get_usage_series("day", since, until) == [
+        {"start": since, "quotes_requested": 5, "quotes_generated": 1}
+    ]
+    assert source.get_usage_series("day", until, until + timedelta(days=1)) == []
+    with pytest.raises(ValueError):
+        source.get_usage_series("week")
+
+
+def test_usage_history_can_be_disabled(property_group, settings):
+    settings.RECORD_USAGE_HISTORY = False
+    write_retrieval_counts({property_group.pk: 1}, {}, {})
+    assert not GroupUsageBucket.objects.exists()
+    assert property_group.get_usage_series() == []
+
+
+def test_reconcile_stats_recounts_from_quotes(property_group, django_assert_max_num_queries):
+    source, other_source = Source.objects.filter(group=property_group)[:2]
+    quote = Quote.objects.filter(source=source)[0]
+    write_retrieval_counts({property_group.pk: 2}, {source.pk: 2}, {quote.pk: 2})
+    write_generation_counts(property_group.pk, source.pk)
+    # Uses recorded behind the receivers' back, a deleted stats row, and a hand edited shard.
+    Quote.objects.filter(source=other_source).update(times_used=1)
+    GroupStats.objects.filter(group=property_group).delete()
+    SourceStatsShard.objects.filter(source=source).update(quotes_requested=50)
+    empty_group = SourceGroup.objects.create(name="Empty", owner=property_group.owner)
+    # Per chunk, one query for the keys and a statement per table between BEGIN and COMMIT, plus one query
+    # per table finding the end: one chunk of groups and sources and two chunks of quotes. The chunks of
+    # groups and sources also lock their shards.
+    with django_assert_max_num_queries(27):
+        assert reconcile_stats(chunk_size=100) == (2, 10, 200)
+    assert property_group.get_stats().quotes_requested == 22
+    assert empty_group.get_stats().quotes_requested == 0
+    source.refresh_from_db()
+    assert source.get_stats().quotes_requested == 2
+    assert source.get_stats().quotes_generated == 1
+    assert other_source.get_stats().quotes_requested == 20
+    assert QuoteStats.objects.count() == 200
+    assert QuoteStats.objects.filter(quote__source=other_source, times_used=1).count() == 20
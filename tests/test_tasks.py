@@ -8,11 +8,21 @@
 from datetime import timedelta
 
 import pytest
+from django.core.cache import cache
 from django.utils import timezone
 
 from django_markov.text_models import POSifiedText
-from django_quotes.models import Quote, QuoteCorpusError, Source
-from django_quotes.tasks import update_models_on_quote_save
+from django_quotes.models import GroupUsageBucket, Quote, QuoteCorpusError, Source, SourceUsageBucket
+from django_quotes.sampling import pool_cache_key
+from django_quotes.tasks import (
+    find_stale_markov_models,
+    publish_scheduled_quotes,
+    rebuild_group_markov_models,
+    rollup_usage_history,
+    update_markov_models_for_quote,
+    update_markov_models_for_source,
+    update_models_on_quote_save,
+)
 
 pytestmark = pytest.mark.django_db(transaction=True)
 
@@ -110,3 +120,133 @@ def test_models_update_correctly_multiple_valid_source_models(property_group):
     property_group.text_model.refresh_from_db()
     assert source.text_model.modified > pre_update_source
     assert property_group.text_model.modified > pre_update_group
+
+
+def test_publish_scheduled_quotes(property_group):
+    source = property_group.source_set.first()
+    quote = Quote.objects.create(
+        quote="The snozberries taste like snozberries.",
+        source=source,
+        owner=property_group.owner,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert not quote.published
+    assert publish_scheduled_quotes() == 0
+    source.get_random_quote()
+    property_group.get_random_quote()
+    Quote.objects.filter(pk=quote.pk).update(pub_date=timezone.now() - timedelta(minutes=1))
+    assert publish_scheduled_quotes() == 1
+    quote.refresh_from_db()
+    assert quote.published
+    assert cache.get(pool_cache_key("source", source.pk)) is None
+    assert cache.get(pool_cache_key("group", property_group.pk)) is None
+    assert publish_scheduled_quotes() == 0
+
+
+def test_publish_scheduled_quotes_unpublishes_bulk_written_quotes(property_group):
+    source = property_group.source_set.first()
+    future = timezone.now() + timedelta(days=1)
+    (quote,) = Quote.objects.bulk_create(
+        [Quote(quote="Everything in this room is eatable.", source=source, owner=property_group.owner, pub_date=future)]
+    )
+    moved = Quote.objects.filter(source=source).exclude(pk=quote.pk).first()
+    Quote.objects.filter(pk=moved.pk).update(pub_date=future)
+    assert Quote.objects.filter(pk__in=[quote.pk, moved.pk], published=True).count() == 2
+    Source.objects.filter(pk=source.pk).update(markov_dirty=False)
+    source.get_random_quote()
+    assert publish_scheduled_quotes() == 0
+    assert not Quote.objects.filter(pk__in=[quote.pk, moved.pk], published=True).exists()
+    assert cache.get(pool_cache_key("source", source.pk)) is None
+    assert Source.objects.get(pk=source.pk).markov_dirty
+
+
+def test_rollup_usage_history(property_group, settings):
+    settings.USAGE_HISTORY_HOURLY_DAYS = 2
+    settings.USAGE_HISTORY_DAYS = 30
+    source = property_group.source_set.first()
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    old_day = today - timedelta(days=5)
+    GroupUsageBucket.objects.bulk_create(
+        [
+            GroupUsageBucket(group=property_group, start=old_day, period="day", quotes_requested=1),
+            GroupUsageBucket(
+                group=property_group, start=old_day + timedelta(hours=3), period="hour", quotes_requested=2
+            ),
+            GroupUsageBucket(
+                group=property_group, start=old_day + timedelta(hours=3), period="hour", shard=1, quotes_generated=4
+            ),
+            GroupUsageBucket(group=property_group, start=today - timedelta(hours=1), period="hour", quotes_requested=8),
+            GroupUsageBucket(group=property_group, start=today - timedelta(days=40), period="day", quotes_requested=16),
+        ]
+    )
+    SourceUsageBucket.objects.create(
+        source=source, start=old_day + timedelta(hours=20), period="hour", quotes_requested=2
+    )
+    assert rollup_usage_history() == (3, 1)
+    assert list(
+        GroupUsageBucket.objects.order_by("start").values_list(
+            "start", "period", "quotes_requested", "quotes_generated"
+        )
+    ) == [(old_day, "day", 3, 4), (today - timedelta(hours=1), "hour", 8, 0)]
+    assert list(SourceUsageBucket.objects.values_list("start", "period", "quotes_requested")) == [(old_day, "day", 2)]
+    assert property_group.get_usage_series("day", old_day, today) == [
+        {"start": old_day, "quotes_requested": 3, "quotes_generated": 4},
+        {"start": today - timedelta(days=1), "quotes_requested": 8, "quotes_generated": 0},
+    ]
+    assert rollup_usage_history() == (0, 0)
+
+
+def test_markov_update_tasks_skip_missing_objects(property_group):
+    assert not update_markov_models_for_quote(0)
+    assert isinstance(update_markov_models_for_quote(Quote.objects.filter(source__group=property_group)[0].pk), bool)
+    update_markov_models_for_source(0)
+    source = property_group.source_set.filter(allow_markov=False).select_related("text_model")[0]
+    last_modified = source.text_model.modified
+    update_markov_models_for_source(source.pk)
+    source.text_model.refresh_from_db()
+    assert source.text_model.modified == last_modified
+
+
+def test_only_dirty_markov_models_are_rebuilt(property_group, django_assert_num_queries):
+    source_ids = list(property_group.source_set.filter(allow_markov=True).order_by("pk").values_list("pk", flat=True))
+    # New sources and groups are dirty until their models are first built.
+    with django_assert_num_queries(2):
+        assert find_stale_markov_models() == {property_group.pk: source_ids}
+    results = rebuild_group_markov_models(property_group.pk, source_ids)
+    assert [result["model"] for result in results] == ["source"] * len(source_ids) + ["group"]
+    assert all(result["bytes"] > 0 for result in results)
+    assert find_stale_markov_models() == {}
+    assert find_stale_markov_models(force=True, group_ids=[property_group.pk]) == {property_group.pk: source_ids}
+    # Deleting a quote leaves the others alone, but still marks its models dirty.
+    Quote.objects.filter(source_id=source_ids[1]).first().delete()
+    assert find_stale_markov_models() == {property_group.pk: [source_ids[1]]}
+    assert find_stale_markov_models(source_ids=[source_ids[0]]) == {property_group.pk: []}
+
+
+def test_rebuilds_keep_changes_made_meanwhile(property_group):
+    source = Source.objects.select_related("text_model").filter(group=property_group, allow_markov=True).first()
+    stale_instance = Source.objects.get(pk=source.pk)
+    Quote.objects.create(quote="Late to the party.", source=source, owner=property_group.owner)
+    # The instance was loaded before the new quote, so the first rebuild does not clear the flag.
+    source.update_markov_model()
+    source.refresh_from_db(fields=["markov_dirty", "markov_generation"])
+    assert source.markov_dirty
+    source.update_markov_model()
+    assert not Source.objects.get(pk=source.pk).markov_dirty
+    # Saving an instance loaded before a change does not clear the flag.
+    Quote.objects.filter(source=source).first().save()
+    stale_instance.save()
+    assert Source.objects.get(pk=source.pk).markov_dirty
+
+
+def test_markov_toggles_and_publishing_mark_models_dirty(property_group):
+    source_ids = list(property_group.source_set.filter(allow_markov=True).order_by("pk").values_list("pk", flat=True))
+    rebuild_group_markov_models(property_group.pk, source_ids)
+    source = Source.objects.get(pk=source_ids[0])
+    source.allow_markov = False
+    source.save()
+    assert find_stale_markov_models() == {property_group.pk: []}
+    rebuild_group_markov_models(property_group.pk, [])
+    Quote.objects.filter(source_id=source_ids[1]).update(published=False, pub_date=timezone.now())
+    assert publish_scheduled_quotes() == 20
+    assert find_stale_markov_models() == {property_group.pk: [source_ids[1]]}